@@ -1,4 +1,10 @@
 __version__ = "1.0.9"
 
 from . import utils
-from .qr_batch_processor import QRCodeBatchProcessor
\ No newline at end of file
+
+def __getattr__(name):
+    # Loaded on first use so that importing the package does not pull in pandas.
+    if name == "QRCodeBatchProcessor":
+        from .qr_batch_processor import QRCodeBatchProcessor
+        return QRCodeBatchProcessor
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,283 @@
+import os
+import sys
+import json
+import logging
+import argparse
+import platform
+import tempfile
+import multiprocessing
+import queue
+from time import perf_counter
+from typing import Dict, Any, List, Optional
+
+import pandas as pd
+
+from qrbatch import __version__
+from qrbatch.qr_batch_processor import QRCodeBatchProcessor
+from qrbatch.utils.data_processor import DataProcessor
+from qrbatch.utils.qr_generator import QRCodeGenerator
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+STAGES = ("read", "filter", "format", "encode", "render", "save")
+
+BASE_COLUMNS = ["項目編號", "購買日期", "型號/規格/名稱及說明", "單位", "數量",
+                "存放位置", "財產編號\n設備編號", "備註"]
+IMAGE_COLUMN = "圖片"
+IMAGE_POSITION = 5
+
+def parse_arguments(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=f"QRBatch v{__version__} - Benchmark the QR batch pipeline")
+    parser.add_argument("--rows", type=int, default=1000, help="Rows per sheet in the synthetic workbook")
+    parser.add_argument("--columns", type=int, default=8, help="Data columns per sheet (at least 6, excluding the image column)")
+    parser.add_argument("--sheets", type=int, default=1, help="Number of sheets in the synthetic workbook")
+    parser.add_argument("--multiline", type=float, default=0.2, help="Fraction of text cells that contain a line break")
+    parser.add_argument("--workers", default="1,4", help="Comma separated worker counts for the end-to-end runs")
+    parser.add_argument("--stream", action="store_true", help="Also run every end-to-end configuration with --stream")
+    parser.add_argument("--output-profile", default="default", choices=list(QRCodeGenerator.OUTPUT_PROFILES),
+                        help="PNG output profile used by all runs")
+    parser.add_argument("--timeout", type=float, default=3600.0, help="Seconds an end-to-end run may take before it is stopped")
+    parser.add_argument("--skip-stages", action="store_true", help="Skip the per-stage benchmark")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    parser.add_argument("--baseline", help="Compare against a previous JSON report and exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed slowdown against the baseline (0.10 = 10%%)")
+    return parser.parse_args(argv)
+
+def build_workbook(path: str, rows: int, columns: int, sheets: int, multiline: float) -> None:
+    """Write a synthetic inventory workbook laid out like resources/data.xlsx."""
+    if columns < 6:
+        raise ValueError("At least 6 data columns are required")
+    column_names = BASE_COLUMNS[:columns] + [f"欄位{n}" for n in range(len(BASE_COLUMNS), columns)]
+    column_names.insert(IMAGE_POSITION, IMAGE_COLUMN)
+    multiline_every = max(1, round(1 / multiline)) if multiline > 0 else 0
+
+    def cell(name: str, row: int) -> Any:
+        if name == "項目編號":
+            return row + 1
+        if name == "數量":
+            return row % 10 + 1
+        if name == IMAGE_COLUMN:
+            return None
+        text = f"{name.splitlines()[0]} {row:06d}"
+        if multiline_every and (row + len(name)) % multiline_every == 0:
+            text += f"\n第二行 {row % 97}"
+        return text
+
+    with pd.ExcelWriter(path) as writer:
+        for sheet in range(sheets):
+            df = pd.DataFrame({name: [cell(name, row) for row in range(rows)] for name in column_names})
+            df.to_excel(writer, sheet_name=f"Sheet{sheet + 1}", startrow=1, index=False)
+
+def write_config(path: str, output_profile: str) -> None:
+    config = {
+        "Header": {"row": 1},
+        "Sheets": {"process": []},
+        "Columns": {"include": [], "exclude": [IMAGE_COLUMN]},
+        "QRCode": {"output_profile": output_profile}
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(config, f, ensure_ascii=False)
+
+def benchmark_stages(workbook_path: str, output_folder: str, output_profile: str) -> Dict[str, Any]:
+    """Run the pipeline serially in this process and time every stage separately."""
+    qr_config = {**QRCodeGenerator.DEFAULT_CONFIG, "output_profile": output_profile}
+    timings = dict.fromkeys(STAGES, 0.0)
+    row_count = 0
+
+    start = perf_counter()
+    with pd.ExcelFile(workbook_path) as xls:
+        for sheet_name in xls.sheet_names:
+            stage_start = perf_counter()
+            df = pd.read_excel(xls, sheet_name=sheet_name, header=1)
+            timings["read"] += perf_counter() - stage_start
+
+            stage_start = perf_counter()
+            df = DataProcessor.filter_columns(df, exclude_columns=[IMAGE_COLUMN])
+            timings["filter"] += perf_counter() - stage_start
+
+            stage_start = perf_counter()
+            payloads = DataProcessor.format_frame(df)
+            timings["format"] += perf_counter() - stage_start
+
+            for position, payload in enumerate(payloads):
+                stage_start = perf_counter()
+                qr = QRCodeGenerator._encode(payload, qr_config)
+                timings["encode"] += perf_counter() - stage_start
+
+                stage_start = perf_counter()
+                img = QRCodeGenerator._render(qr, qr_config)
+                timings["render"] += perf_counter() - stage_start
+
+                stage_start = perf_counter()
+                with open(os.path.join(output_folder, f"{sheet_name}_{position}.png"), 'wb') as f:
+                    QRCodeGenerator._save_image(img, f, qr_config)
+                timings["save"] += perf_counter() - stage_start
+            row_count += len(payloads)
+    total = perf_counter() - start
+
+    return {
+        "rows": row_count,
+        "seconds": {**{stage: round(value, 6) for stage, value in timings.items()}, "total": round(total, 6)},
+        "rows_per_sec": round(row_count / total, 2) if total else None
+    }
+
+def _peak_rss_mb(who: int) -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(who).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 2)
+
+def cli_defaults() -> argparse.Namespace:
+    """The settings a plain 'qrbatch' run uses, so end-to-end numbers match the CLI."""
+    from qrbatch.main import parse_arguments as parse_cli_arguments
+
+    return parse_cli_arguments([])
+
+def _run_end_to_end(workbook_path: str, config_path: str, output_folder: str,
+                    workers: int, streaming: bool, results: "multiprocessing.Queue") -> None:
+    from qrbatch.main import setup_dependencies
+
+    logging.disable(logging.INFO)
+    defaults = cli_defaults()
+    processor = QRCodeBatchProcessor(**setup_dependencies(config_path, cache_size=defaults.cache_size),
+                                     workers=workers,
+                                     streaming=streaming,
+                                     read_chunk_size=defaults.read_chunk_size,
+                                     max_in_flight_rows=defaults.max_in_flight,
+                                     write_threads=defaults.write_threads)
+    start = perf_counter()
+    processor.process_excel(workbook_path, output_folder)
+    wall = perf_counter() - start
+
+    rss = _peak_rss_mb(resource.RUSAGE_SELF) if resource else None
+    children_rss = _peak_rss_mb(resource.RUSAGE_CHILDREN) if resource else None
+    results.put({"wall_seconds": wall, "peak_rss_mb": rss, "peak_worker_rss_mb": children_rss})
+
+def _wait_for_result(process: "multiprocessing.Process", results: "multiprocessing.Queue",
+                     timeout: float) -> Dict[str, Any]:
+    deadline = perf_counter() + timeout
+    while True:
+        try:
+            return results.get(timeout=min(1.0, max(0.0, deadline - perf_counter())))
+        except queue.Empty:
+            pass
+        if not process.is_alive():
+            # The result may have been queued just before the process exited.
+            try:
+                return results.get(timeout=1.0)
+            except queue.Empty:
+                raise RuntimeError(f"End-to-end run exited with code {process.exitcode} without a result")
+        if perf_counter() >= deadline:
+            raise TimeoutError(f"End-to-end run did not finish within {timeout:g}s")
+
+def benchmark_end_to_end(workbook_path: str, config_path: str, output_folder: str,
+                         workers: int, streaming: bool, rows: int, timeout: float = 3600.0) -> Dict[str, Any]:
+    """Run QRCodeBatchProcessor in a fresh process so peak RSS covers only this configuration."""
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=_run_end_to_end,
+                              args=(workbook_path, config_path, output_folder, workers, streaming, results))
+    process.start()
+    try:
+        result = _wait_for_result(process, results, timeout)
+    finally:
+        if process.is_alive():
+            process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+            process.join()
+
+    return {
+        "workers": workers,
+        "streaming": streaming,
+        "wall_seconds": round(result["wall_seconds"], 6),
+        "rows_per_sec": round(rows / result["wall_seconds"], 2) if result["wall_seconds"] else None,
+        "peak_rss_mb": result["peak_rss_mb"],
+        "peak_worker_rss_mb": result["peak_worker_rss_mb"]
+    }
+
+def compare_reports(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Return a message for every stage or run that is slower than the baseline by more than tolerance."""
+    regressions = []
+    if report.get("params") != baseline.get("params"):
+        print("Warning: baseline was recorded with different parameters; comparison may not be meaningful",
+              file=sys.stderr)
+
+    stages, baseline_stages = report.get("stages"), baseline.get("stages")
+    if stages and baseline_stages:
+        for stage, seconds in stages["seconds"].items():
+            previous = baseline_stages["seconds"].get(stage)
+            if previous and seconds > previous * (1 + tolerance):
+                regressions.append(f"stage '{stage}': {previous:.3f}s -> {seconds:.3f}s")
+
+    baseline_runs = {(run["workers"], run["streaming"]): run for run in baseline.get("runs", [])}
+    for run in report.get("runs", []):
+        previous = baseline_runs.get((run["workers"], run["streaming"]))
+        if previous and previous["rows_per_sec"] and run["rows_per_sec"] < previous["rows_per_sec"] * (1 - tolerance):
+            regressions.append(f"run workers={run['workers']} streaming={run['streaming']}: "
+                               f"{previous['rows_per_sec']} -> {run['rows_per_sec']} rows/sec")
+    return regressions
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    worker_counts = [int(value) for value in args.workers.split(',') if value.strip()]
+    total_rows = args.rows * args.sheets
+    defaults = cli_defaults()
+
+    with tempfile.TemporaryDirectory(prefix="qrbatch_bench_") as temp_dir:
+        workbook_path = os.path.join(temp_dir, "bench.xlsx")
+        config_path = os.path.join(temp_dir, "bench_config.json")
+        build_workbook(workbook_path, args.rows, args.columns, args.sheets, args.multiline)
+        write_config(config_path, args.output_profile)
+
+        report: Dict[str, Any] = {
+            "version": __version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "params": {
+                "rows": args.rows, "columns": args.columns, "sheets": args.sheets,
+                "multiline": args.multiline, "output_profile": args.output_profile
+            },
+            "cli_defaults": {name: getattr(defaults, name)
+                             for name in ("write_threads", "cache_size", "read_chunk_size", "max_in_flight")}
+        }
+
+        if not args.skip_stages:
+            stage_folder = os.path.join(temp_dir, "stages")
+            os.makedirs(stage_folder)
+            report["stages"] = benchmark_stages(workbook_path, stage_folder, args.output_profile)
+
+        runs = []
+        for streaming in ([False, True] if args.stream else [False]):
+            for workers in worker_counts:
+                output_folder = os.path.join(temp_dir, f"run_w{workers}_s{int(streaming)}")
+                runs.append(benchmark_end_to_end(workbook_path, config_path, output_folder,
+                                                 workers, streaming, total_rows, args.timeout))
+        report["runs"] = runs
+    return report
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_arguments(argv)
+    report = run_benchmark(args)
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare_reports(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
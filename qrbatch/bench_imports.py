@@ -0,0 +1,138 @@
+import os
+import re
+import sys
+import json
+import argparse
+import platform
+import subprocess
+from time import perf_counter
+from typing import Dict, Any, List, Optional, Tuple
+
+from qrbatch import __version__
+
+# Modules that must stay cheap to import, with the heavy dependencies each one must not load eagerly.
+# qrbatch.main only needs them after the arguments are parsed, qrbatch.worker is what spawned pool workers import.
+TARGETS = {
+    "qrbatch.main": ("pandas", "openpyxl", "PIL", "qrcode", "numpy"),
+    "qrbatch.worker": ("pandas", "openpyxl"),
+}
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)\s*$")
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def parse_arguments(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=f"QRBatch v{__version__} - Benchmark import time and CLI start-up")
+    parser.add_argument("--modules", default=",".join(TARGETS), help="Comma separated modules to import")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per module; the fastest run is reported")
+    parser.add_argument("--top", type=int, default=10, help="Number of heaviest top-level packages listed per module")
+    parser.add_argument("--budget-ms", type=float, help="Fail when importing any module takes longer than this")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    parser.add_argument("--baseline", help="Compare against a previous JSON report and exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown against the baseline (0.25 = 25%%)")
+    return parser.parse_args(argv)
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """Parse `-X importtime` output into (module, self_us, cumulative_us) tuples in import order."""
+    entries = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, module = match.groups()
+            entries.append((module, int(self_us), int(cumulative_us)))
+    return entries
+
+def measure_import(module: str) -> List[Tuple[str, int, int]]:
+    """Import module in a fresh interpreter and return its parsed import timings."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=PACKAGE_ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+    return parse_importtime(result.stderr)
+
+def measure_help() -> float:
+    """Return the wall time of `python -m qrbatch.main --help` in seconds."""
+    start = perf_counter()
+    subprocess.run([sys.executable, "-m", "qrbatch.main", "--help"], cwd=PACKAGE_ROOT,
+                   capture_output=True, check=True)
+    return perf_counter() - start
+
+def summarize_import(module: str, entries: List[Tuple[str, int, int]], top: int) -> Dict[str, Any]:
+    cumulative_us = next((cumulative for name, _, cumulative in entries if name == module), 0)
+    packages: Dict[str, int] = {}
+    for name, self_us, _ in entries:
+        root = name.split('.')[0]
+        packages[root] = packages.get(root, 0) + self_us
+    heaviest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+
+    loaded = {name.split('.')[0] for name, _, _ in entries}
+    return {
+        "cumulative_ms": round(cumulative_us / 1000, 3),
+        "modules_imported": len(entries),
+        "heaviest_packages_ms": {name: round(self_us / 1000, 3) for name, self_us in heaviest},
+        "forbidden_loaded": sorted(loaded.intersection(TARGETS.get(module, ())))
+    }
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    modules = [module.strip() for module in args.modules.split(',') if module.strip()]
+    repeat = max(1, args.repeat)
+
+    imports = {}
+    for module in modules:
+        # keep the fastest run to filter out cold disk caches and noise from other processes
+        runs = [measure_import(module) for _ in range(repeat)]
+        fastest = min(runs, key=lambda entries: next((c for name, _, c in entries if name == module), 0))
+        imports[module] = summarize_import(module, fastest, args.top)
+
+    return {
+        "version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {"modules": modules, "repeat": repeat},
+        "imports": imports,
+        "help_seconds": round(min(measure_help() for _ in range(repeat)), 6)
+    }
+
+def check_report(report: Dict[str, Any], budget_ms: Optional[float]) -> List[str]:
+    """Return a message for every eagerly loaded heavy dependency and every import over the budget."""
+    problems = []
+    for module, result in report["imports"].items():
+        if result["forbidden_loaded"]:
+            problems.append(f"importing {module} loads {', '.join(result['forbidden_loaded'])}")
+        if budget_ms is not None and result["cumulative_ms"] > budget_ms:
+            problems.append(f"importing {module} took {result['cumulative_ms']:.1f}ms (budget {budget_ms:.1f}ms)")
+    return problems
+
+def compare_reports(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Return a message for every import or start-up time slower than the baseline by more than tolerance."""
+    regressions = []
+    for module, result in report["imports"].items():
+        previous = baseline.get("imports", {}).get(module)
+        if previous and result["cumulative_ms"] > previous["cumulative_ms"] * (1 + tolerance):
+            regressions.append(f"import {module}: {previous['cumulative_ms']:.1f}ms -> {result['cumulative_ms']:.1f}ms")
+
+    previous_help = baseline.get("help_seconds")
+    if previous_help and report["help_seconds"] > previous_help * (1 + tolerance):
+        regressions.append(f"--help: {previous_help:.3f}s -> {report['help_seconds']:.3f}s")
+    return regressions
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_arguments(argv)
+    report = run_benchmark(args)
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+
+    problems = check_report(report, args.budget_ms)
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            problems += compare_reports(report, json.load(f), args.tolerance)
+    for problem in problems:
+        print(f"Regression: {problem}", file=sys.stderr)
+    return 1 if problems else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+import os
+import sys
+import json
+import argparse
+import threading
+import subprocess
+import http.client
+from time import perf_counter, sleep
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from qrbatch import __version__
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def parse_arguments(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=f"QRBatch v{__version__} - Load test a running 'qrbatch serve' instance")
+    parser.add_argument("--url", default="http://127.0.0.1:8080", help="Base URL of the server")
+    parser.add_argument("--requests", type=int, default=1000, help="Total number of requests")
+    parser.add_argument("--concurrency", type=int, default=16, help="Client connections sending requests at the same time")
+    parser.add_argument("--payload-size", type=int, default=200, help="Characters per QR payload")
+    parser.add_argument("--unique", type=float, default=1.0, help="Fraction of distinct payloads (lower values exercise the cache)")
+    parser.add_argument("--batch", help="Send this workbook to POST /batch instead of payloads to POST /qr")
+    parser.add_argument("--spawn", action="store_true", help="Start 'qrbatch serve' on the URL's port for the duration of the test")
+    parser.add_argument("--config", default=os.path.join("config", "custom_config.json"), help="Configuration file for --spawn")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes for --spawn")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    return parser.parse_args(argv)
+
+def build_payloads(count: int, size: int, unique: float) -> List[bytes]:
+    distinct = max(1, round(count * unique))
+    payloads = []
+    for n in range(count):
+        line = f"項目編號: {n % distinct}\n存放位置: 倉庫 {n % distinct % 17}\n備註: "
+        payloads.append((line + "x" * max(0, size - len(line))).encode('utf-8'))
+    return payloads
+
+def wait_until_ready(url: str, timeout: float = 60.0) -> None:
+    parts = urlsplit(url)
+    deadline = perf_counter() + timeout
+    while perf_counter() < deadline:
+        try:
+            connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=1)
+            connection.request("GET", "/health")
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        sleep(0.2)
+    raise TimeoutError(f"Server at {url} did not become ready within {timeout:.0f}s")
+
+def run_load(url: str, requests: List[Tuple[str, bytes]], concurrency: int) -> Dict[str, Any]:
+    """Send the requests over keep-alive connections and collect per-request latencies."""
+    parts = urlsplit(url)
+    local = threading.local()
+    statuses: Dict[int, int] = {}
+    lock = threading.Lock()
+
+    def send(request: Tuple[str, bytes]) -> float:
+        path, body = request
+        if getattr(local, "connection", None) is None:
+            local.connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=300)
+        start = perf_counter()
+        try:
+            local.connection.request("POST", path, body=body)
+            response = local.connection.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            local.connection.close()
+            local.connection = None
+            status = 0
+        latency = perf_counter() - start
+        with lock:
+            statuses[status] = statuses.get(status, 0) + 1
+        return latency
+
+    start = perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        latencies = sorted(executor.map(send, requests))
+    wall = perf_counter() - start
+
+    def percentile(fraction: float) -> float:
+        return round(latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000, 3)
+
+    return {
+        "requests": len(latencies),
+        "wall_seconds": round(wall, 6),
+        "requests_per_sec": round(len(latencies) / wall, 2) if wall else None,
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "latency_ms": {"p50": percentile(0.50), "p90": percentile(0.90), "p99": percentile(0.99),
+                       "max": round(latencies[-1] * 1000, 3)} if latencies else {}
+    }
+
+def spawn_server(args: argparse.Namespace) -> subprocess.Popen:
+    port = urlsplit(args.url).port or 80
+    command = [sys.executable, "-m", "qrbatch.main", "serve", "-c", os.path.abspath(args.config),
+               "--port", str(port), "-w", str(args.workers), "--max-concurrency", str(max(1, args.concurrency)),
+               "--max-queue", str(max(64, args.concurrency))]
+    return subprocess.Popen(command, cwd=PACKAGE_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_arguments(argv)
+    if args.batch:
+        with open(args.batch, 'rb') as f:
+            upload = f.read()
+        extension = os.path.splitext(args.batch)[1].lstrip('.').lower() or "xlsx"
+        requests = [(f"/batch?format={extension}", upload)] * args.requests
+    else:
+        requests = [("/qr", payload) for payload in build_payloads(args.requests, args.payload_size, args.unique)]
+
+    server = spawn_server(args) if args.spawn else None
+    try:
+        wait_until_ready(args.url)
+        report = {"version": __version__, "url": args.url,
+                  "params": {"requests": args.requests, "concurrency": args.concurrency, "batch": args.batch,
+                             "payload_size": args.payload_size, "unique": args.unique},
+                  **run_load(args.url, requests, args.concurrency)}
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+    return 0 if set(report["statuses"]) == {"200"} else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
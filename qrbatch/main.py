@@ -1,44 +1,109 @@
 import os
+import sys
 import logging
 import argparse
-from typing import Dict, Any
+import importlib
+import cProfile
+import pstats
+from typing import TYPE_CHECKING, Dict, Any, List, Optional
 from qrbatch import __version__
 from qrbatch.exceptions import ConfigurationError, QRBatchProcessingError
-from qrbatch.qr_batch_processor import QRCodeBatchProcessor
 from qrbatch.utils.config_handler import ConfigHandler
-from qrbatch.utils.data_processor import DataProcessor
-from qrbatch.utils.file_handler import FileHandler
-from qrbatch.utils.qr_generator import QRCodeGenerator
+from qrbatch.utils.metrics import Metrics
+
+if TYPE_CHECKING:
+    from qrbatch.qr_batch_processor import QRCodeBatchProcessor
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def parse_arguments() -> argparse.Namespace:
-    parser = argparse.ArgumentParser(description=f"QRBatch v{__version__} - Generate QR codes from Excel data")
-    parser.add_argument("-d", "--data", default="resources/data.xlsx", help="Path to the input Excel file")
+# Subcommands, each a module with its own main(argv); without one the batch run below is used.
+COMMANDS = {
+    "serve": "qrbatch.server",
+    "merge": "qrbatch.merge",
+    "watch": "qrbatch.watch",
+}
+
+def parse_arguments(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=f"QRBatch v{__version__} - Generate QR codes from Excel data",
+                                     epilog=f"commands: {', '.join(COMMANDS)} (run '<command> --help' for details)")
+    parser.add_argument("-d", "--data", default="resources/data.xlsx", help="Path to the input file (.xlsx, .csv, .parquet, .feather) or a folder of CSV/Parquet/Feather files")
     parser.add_argument("-o", "--output", default="qr_codes", help="Output folder for QR codes")
     parser.add_argument("-c", "--config", default=os.path.join("config", "custom_config.json"), help="Path to the configuration file")
-    return parser.parse_args()
+    parser.add_argument("-w", "--workers", type=int, default=1, help="Number of worker processes used to generate QR codes")
+    parser.add_argument("-s", "--stream", action="store_true", help="Stream rows from the Excel file instead of loading whole sheets")
+    parser.add_argument("-i", "--incremental", action="store_true", help="Only regenerate QR codes whose content changed since the last run")
+    parser.add_argument("-a", "--archive", help="Write QR codes into a single .zip or .tar archive instead of the output folder")
+    parser.add_argument("--write-threads", type=int, default=2, help="Threads that PNG-encode and write files behind QR encoding in single-process runs (0 writes inline)")
+    parser.add_argument("--cache-size", type=int, default=1024, help="Number of encoded QR codes kept in memory to reuse for identical rows (0 disables)")
+    parser.add_argument("--read-chunk-size", type=int, default=10000, help="Rows read per batch from CSV, Parquet and Feather inputs")
+    parser.add_argument("--sheet-workers", type=int, default=1, help="Number of sheets processed at the same time (requires --workers > 1)")
+    parser.add_argument("--max-in-flight", type=int, default=0, help="Maximum rows queued in the process pool across all sheets (0 uses workers * 2 * chunk size)")
+    parser.add_argument("-r", "--resume", action="store_true", help="Skip rows completed by a previous interrupted run (not available with --archive)")
+    parser.add_argument("--continue-on-error", action="store_true", help="Record failed rows in qrbatch_errors.csv instead of aborting the run")
+    parser.add_argument("--labels", choices=["pdf", "png"], help="Also tile each sheet's QR codes into print-ready label pages under labels/ (layout from the Labels config section)")
+    parser.add_argument("--shard", help="Process only shard i of N (for example 2/4); combine the shards afterwards with 'merge'")
+    parser.add_argument("--metrics", help="Write per-stage timings and counters to this file (.prom for Prometheus textfile format, otherwise JSON)")
+    parser.add_argument("--profile", help="Run under cProfile and write the stats to this file (worker processes are not profiled)")
+    return parser.parse_args(argv)
+
+def setup_dependencies(config_path: str, cache_size: int = 0) -> Dict[str, Any]:
+    # pandas、openpyxl、qrcode 等載入較慢，延後到解析參數之後，讓 --help 與參數錯誤能立即回應
+    from qrbatch.utils.data_processor import DataProcessor
+    from qrbatch.utils.file_handler import FileHandler
+    from qrbatch.utils.qr_generator import QRCodeGenerator
 
-def setup_dependencies(config_path: str) -> Dict[str, Any]:
     return {
         'config_handler': ConfigHandler(config_path),
         'file_handler': FileHandler(),
         'data_processor': DataProcessor(),
-        'qr_generator': QRCodeGenerator()
+        'qr_generator': QRCodeGenerator(cache_size=cache_size)
     }
 
-def process_qr_codes(processor: QRCodeBatchProcessor, input_file: str, output_folder: str) -> None:
+def process_qr_codes(processor: "QRCodeBatchProcessor", input_file: str, output_folder: str,
+                     metrics_report: Optional[str] = None) -> None:
     processor.process_excel(input_file, output_folder)
-    logger.info(f"QR codes generated successfully. Output folder: {output_folder}")
+    if metrics_report:
+        processor.metrics.write_report(metrics_report, extra={"version": __version__, "input": input_file,
+                                                              "workers": processor.workers,
+                                                              "streaming": processor.streaming})
+        logger.info(f"Metrics report written to {metrics_report}")
+    if processor.archive:
+        logger.info(f"QR codes generated successfully. Output archive: {processor.archive}")
+    else:
+        logger.info(f"QR codes generated successfully. Output folder: {output_folder}")
 
-def main() -> None:
-    args = parse_arguments()
-    
+def profile_run(processor: "QRCodeBatchProcessor", input_file: str, output_folder: str,
+                metrics_report: Optional[str], profile_path: str) -> None:
+    profiler = cProfile.Profile()
     try:
-        dependencies = setup_dependencies(args.config)
-        processor = QRCodeBatchProcessor(**dependencies)
-        process_qr_codes(processor, args.data, args.output)
+        profiler.runcall(process_qr_codes, processor, input_file, output_folder, metrics_report)
+    finally:
+        profiler.dump_stats(profile_path)
+        logger.info(f"Profile written to {profile_path} (inspect with: python -m pstats {profile_path})")
+        pstats.Stats(profiler).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(20)
+
+def main(argv: Optional[List[str]] = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in COMMANDS:
+        sys.exit(importlib.import_module(COMMANDS[argv[0]]).main(argv[1:]))
+    args = parse_arguments(argv)
+
+    try:
+        from qrbatch.qr_batch_processor import QRCodeBatchProcessor
+
+        dependencies = setup_dependencies(args.config, cache_size=args.cache_size)
+        processor = QRCodeBatchProcessor(**dependencies, workers=args.workers, streaming=args.stream,
+                                         incremental=args.incremental, archive=args.archive,
+                                         metrics=Metrics(enabled=bool(args.metrics)),
+                                         sheet_workers=args.sheet_workers, max_in_flight_rows=args.max_in_flight,
+                                         resume=args.resume, continue_on_error=args.continue_on_error,
+                                         read_chunk_size=args.read_chunk_size, labels=args.labels,
+                                         shard=args.shard, write_threads=args.write_threads)
+        if args.profile:
+            profile_run(processor, args.data, args.output, args.metrics, args.profile)
+        else:
+            process_qr_codes(processor, args.data, args.output, args.metrics)
     except FileNotFoundError as e:
         logger.error(f"File not found: {e}")
     except ConfigurationError as e:
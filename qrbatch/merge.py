@@ -0,0 +1,161 @@
+import os
+import sys
+import json
+import shutil
+import logging
+import tarfile
+import zipfile
+import argparse
+from typing import Any, Dict, List, Optional
+
+from qrbatch import __version__
+from qrbatch.utils.archive_writer import ArchiveWriter
+from qrbatch.utils.shard_manifest import ShardManifest, SheetPartition
+
+logger = logging.getLogger(__name__)
+
+MERGED_FILENAME = "qrbatch_merged.json"
+
+def parse_arguments(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="qrbatch merge",
+                                     description=f"QRBatch v{__version__} - Validate and combine the outputs of a sharded run")
+    parser.add_argument("shards", nargs="+", help="Shard manifests (qrbatch_shard_<i>of<N>.json) or folders containing them")
+    parser.add_argument("-o", "--output", default="qr_codes", help="Output folder for the combined QR codes")
+    parser.add_argument("-a", "--archive", help="Combine into a single .zip or .tar archive instead of the output folder")
+    parser.add_argument("--check", action="store_true", help="Only validate that the shards cover every row exactly once")
+    return parser.parse_args(argv)
+
+class ShardSource:
+    def __init__(self, manifest: Dict[str, Any]):
+        """Read the files of one shard, from its output folder or from its archive next to the manifest."""
+        self.root = os.path.dirname(os.path.abspath(manifest["path"]))
+        self.archive = None
+        if manifest["archive"]:
+            archive_path = os.path.join(self.root, manifest["archive"])
+            if archive_path.lower().endswith(".zip"):
+                self.archive = zipfile.ZipFile(archive_path)
+                self.members = set(self.archive.namelist())
+            else:
+                self.archive = tarfile.open(archive_path)
+                self.members = set(self.archive.getnames())
+
+    def path(self, member_name: str) -> str:
+        return os.path.join(self.root, *member_name.split('/'))
+
+    def exists(self, member_name: str) -> bool:
+        if self.archive is None:
+            return os.path.isfile(self.path(member_name))
+        return member_name in self.members
+
+    def read(self, member_name: str) -> bytes:
+        if self.archive is None:
+            with open(self.path(member_name), 'rb') as f:
+                return f.read()
+        if isinstance(self.archive, zipfile.ZipFile):
+            return self.archive.read(member_name)
+        return self.archive.extractfile(member_name).read()
+
+    def close(self) -> None:
+        if self.archive is not None:
+            self.archive.close()
+
+def iter_members(manifest: Dict[str, Any]):
+    for sheet_name, summary in manifest["sheets"].items():
+        for filename in SheetPartition.files(summary):
+            yield f"{sheet_name.strip()}/{filename}"
+
+def combine(manifests: List[Dict[str, Any]], output_folder: str, archive_path: Optional[str], check: bool) -> List[str]:
+    """Copy every shard's files into the output folder or archive and return the files that are missing."""
+    missing = []
+    writer = ArchiveWriter(archive_path) if archive_path and not check else None
+    try:
+        for manifest in manifests:
+            source = ShardSource(manifest)
+            try:
+                for member_name in iter_members(manifest):
+                    if not source.exists(member_name):
+                        missing.append(f"{member_name} (shard {manifest['shard']}/{manifest['shards']})")
+                    elif check:
+                        continue
+                    elif writer is not None:
+                        writer.write(member_name, source.read(member_name))
+                    else:
+                        copy_member(source, member_name, output_folder)
+            finally:
+                source.close()
+    finally:
+        if writer is not None:
+            writer.close()
+    return missing
+
+def copy_member(source: ShardSource, member_name: str, output_folder: str) -> None:
+    target = os.path.join(output_folder, *member_name.split('/'))
+    if source.archive is None and os.path.abspath(source.path(member_name)) == os.path.abspath(target):
+        # Shards that wrote to a shared output folder are already in place.
+        return
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    if source.archive is None:
+        shutil.copyfile(source.path(member_name), target)
+    else:
+        with open(target, 'wb') as f:
+            f.write(source.read(member_name))
+
+def summarize(manifests: List[Dict[str, Any]]) -> Dict[str, Any]:
+    shards = {}
+    for manifest in sorted(manifests, key=lambda manifest: manifest["shard"]):
+        shards[f"{manifest['shard']}/{manifest['shards']}"] = {
+            "rows": sum(len(summary["covered"]) for summary in manifest["sheets"].values()),
+            "estimated_bytes": sum(summary["estimated_bytes"] for summary in manifest["sheets"].values())
+        }
+    loads = [shard["estimated_bytes"] for shard in shards.values()]
+    mean = sum(loads) / len(loads) if loads else 0
+    return {
+        "version": __version__,
+        "shards": shards,
+        # Largest shard against the average; 1.0 is a perfect split.
+        "imbalance": round(max(loads) / mean, 4) if mean else None,
+        "sheets": {sheet_name: summary["rows"] for sheet_name, summary in manifests[0]["sheets"].items()}
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_arguments(argv)
+    if args.archive and not ArchiveWriter.is_supported(args.archive):
+        logger.error(f"Unsupported archive format: {args.archive}")
+        return 1
+    try:
+        paths = [path for shard in args.shards for path in ShardManifest.find(shard)]
+        manifests = [ShardManifest.load(path) for path in paths]
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"Cannot read shard manifest: {e}")
+        return 1
+
+    problems = ShardManifest.validate(manifests)
+    for problem in problems:
+        logger.error(problem)
+    if problems:
+        return 1
+
+    # Check every file before copying so a failed merge leaves nothing half combined.
+    missing = combine(manifests, args.output, args.archive, check=True)
+    for member_name in missing:
+        logger.error(f"Missing output file: {member_name}")
+    if missing:
+        return 1
+    if not args.check:
+        if args.archive:
+            os.makedirs(os.path.dirname(os.path.abspath(args.archive)), exist_ok=True)
+        combine(manifests, args.output, args.archive, check=False)
+
+    report = summarize(manifests)
+    if not args.check:
+        root = os.path.dirname(os.path.abspath(args.archive)) if args.archive else args.output
+        os.makedirs(root, exist_ok=True)
+        with open(os.path.join(root, MERGED_FILENAME), 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        logger.info(f"Merged {len(manifests)} shards into {args.archive or args.output}")
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.exit(main())
@@ -1,51 +1,351 @@
 import pandas as pd
 import os
 import logging
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
+from itertools import islice, repeat
 from qrbatch import __version__
-from typing import Set, List, Optional
+from typing import Any, Dict, Set, List, Optional, Iterable, Iterator, Tuple, Union
 
-from qrbatch.exceptions import QRBatchProcessingError, QRGenerationError
+from qrbatch.exceptions import ConfigurationError, QRBatchProcessingError, QRGenerationError
 from qrbatch.utils.config_handler import ConfigHandler
 from qrbatch.utils.file_handler import FileHandler
-from qrbatch.utils.data_processor import DataProcessor
+from qrbatch.utils.data_processor import ColumnPlan, DataProcessor, DEFAULT_ID_POSITION, DEFAULT_IDENTIFIER_POSITION
+from qrbatch.utils.archive_writer import ArchiveWriter
+from qrbatch.utils.checkpoint_journal import CheckpointJournal
+from qrbatch.utils.error_log import ErrorLog
+from qrbatch.utils.excel_reader import StreamingExcelReader
+from qrbatch.utils.input_source import BaseInputSource, InputSourceFactory
+from qrbatch.utils.label_sheet import LabelLayout, LabelSheetWriter
+from qrbatch.utils.manifest_handler import ManifestHandler
+from qrbatch.utils.metrics import Metrics
 from qrbatch.utils.qr_generator import QRCodeGenerator
+from qrbatch.utils.shard_manifest import ShardManifest, ShardSpec, SheetPartition
+from qrbatch.worker import RowTask, encode_chunk, generate_chunk, init_worker
+
+IndexedRow = Tuple[Any, Dict[Any, Any]]
+# (row index, task, label caption)
+IndexedTask = Tuple[Any, RowTask, str]
+# (file or archive member name, bytes written, PNG bytes when encoded in this process, error when the row failed)
+GeneratedRow = Tuple[str, int, Optional[bytes], Optional[Exception]]
+
+def _chunked(iterable: Iterable[RowTask], size: int) -> Iterator[List[RowTask]]:
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
 
 class QRCodeBatchProcessor:
-    def __init__(self, 
-                 config_handler: ConfigHandler, 
+    def __init__(self,
+                 config_handler: ConfigHandler,
                  file_handler: FileHandler,
-                 data_processor: DataProcessor, 
-                 qr_generator: QRCodeGenerator):
+                 data_processor: DataProcessor,
+                 qr_generator: QRCodeGenerator,
+                 workers: int = 1,
+                 chunk_size: int = 64,
+                 streaming: bool = False,
+                 incremental: bool = False,
+                 archive: Optional[str] = None,
+                 metrics: Optional[Metrics] = None,
+                 sheet_workers: int = 1,
+                 max_in_flight_rows: int = 0,
+                 resume: bool = False,
+                 continue_on_error: bool = False,
+                 checkpoint_interval: int = 256,
+                 read_chunk_size: int = 10000,
+                 executor: Optional[Executor] = None,
+                 labels: Optional[str] = None,
+                 shard: Optional[str] = None,
+                 write_threads: int = 0):
         self.config_handler = config_handler
         self.file_handler = file_handler
         self.data_processor = data_processor
         self.qr_generator = qr_generator
-        
+        self.workers = max(1, workers)
+        self.chunk_size = max(1, chunk_size)
+        self.streaming = streaming
+        self.incremental = incremental
+        self.archive = archive
+        self.metrics = metrics or Metrics()
+        # The generator records its encode, render and save timings in this processor's metrics.
+        self.qr_generator.metrics = self.metrics
+        self.sheet_workers = max(1, sheet_workers)
+        # By default allow as many rows in the pool as a single sheet keeps in flight.
+        self.max_in_flight_rows = max_in_flight_rows if max_in_flight_rows > 0 else self.workers * 2 * self.chunk_size
+        self.resume = resume
+        self.continue_on_error = continue_on_error
+        self.checkpoint_interval = checkpoint_interval
+        self.read_chunk_size = read_chunk_size
+        # A long-lived pool shared across runs (qrbatch serve); it is not shut down after a run.
+        self.executor = executor
+        self.labels = labels
+        # Threads that PNG-encode and write while the main thread encodes the next rows (single process only).
+        self.write_threads = max(0, write_threads)
+        self.journal: Optional[CheckpointJournal] = None
+        self.shard_manifest: Optional[ShardManifest] = None
+        self._manifests: Dict[str, ManifestHandler] = {}
+        self.error_log = ErrorLog()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._lock = threading.Lock()
+        self._in_flight = threading.Condition()
+        self._in_flight_rows = 0
+
         self.config = self._load_config()
+        self.extension = "." + self.config['qr_config'].get('format', self.qr_generator.DEFAULT_CONFIG['format'])
         self.version = __version__
 
+        if self.archive and not ArchiveWriter.is_supported(self.archive):
+            raise ConfigurationError('archive', ValueError(f"Unsupported archive format: {self.archive}"))
+        if self.archive and self.incremental:
+            raise ConfigurationError('archive', ValueError("Archive output cannot be combined with incremental mode"))
+        if self.archive and self.resume:
+            raise ConfigurationError('resume', ValueError("Archive output cannot be resumed; the archive is rewritten on every run"))
+        if self.labels and self.labels not in LabelSheetWriter.FORMATS:
+            raise ConfigurationError('labels', ValueError(f"Unsupported label format '{self.labels}', "
+                                                          f"expected one of {list(LabelSheetWriter.FORMATS)}"))
+        if self.labels and self.extension != ".png":
+            raise ConfigurationError('labels', ValueError("Label sheets are built from PNG output; remove QRCode.format 'svg'"))
+        if self.labels and self.resume:
+            raise ConfigurationError('labels', ValueError("Label sheets cannot be resumed; they only contain the rows generated in one run"))
+        if self.labels and self.incremental:
+            raise ConfigurationError('labels', ValueError("Label sheets cannot be combined with incremental mode; "
+                                                          "unchanged rows are skipped and would be missing from the pages"))
+        self.label_layout = self._load_label_layout() if self.labels else None
+        self.shard = self._parse_shard(shard) if shard else None
+        if self.shard and self.archive:
+            # 每個分片寫入各自的封存檔，共用檔案系統時不會互相覆寫
+            self.archive = self._shard_path(self.archive)
+        if self.sheet_workers > 1 and self.workers <= 1:
+            raise ConfigurationError('sheet_workers', ValueError("Concurrent sheet processing requires more than one worker process"))
+
     def _load_config(self):
         return {
             'sheets': self.config_handler.parse_config_list('Sheets', 'process'),
             'include_columns': self.config_handler.parse_config_list('Columns', 'include'),
             'exclude_columns': self.config_handler.parse_config_list('Columns', 'exclude'),
-            'row_header': self.config_handler.get('Header', 'row')
+            'id_column': self.config_handler.get('Columns', 'id'),
+            'identifier_column': self.config_handler.get('Columns', 'identifier'),
+            'row_header': self.config_handler.get('Header', 'row'),
+            'qr_config': self._load_qr_config()
         }
 
+    def _load_label_layout(self) -> LabelLayout:
+        label_config = {}
+        for key in LabelLayout.DEFAULT_CONFIG:
+            value = self.config_handler.get('Labels', key)
+            if value is not None:
+                label_config[key] = value
+        try:
+            return LabelLayout(label_config)
+        except (ValueError, TypeError, OSError) as e:
+            raise ConfigurationError('Labels', e)
+
+    @staticmethod
+    def _parse_shard(shard: str) -> ShardSpec:
+        try:
+            return ShardSpec.parse(shard)
+        except ValueError as e:
+            raise ConfigurationError('shard', e)
+
+    def _shard_path(self, path: str) -> str:
+        # Per-shard files get a '_shard<i>of<N>' suffix before the extension, so shards can share an output folder.
+        if self.shard is None:
+            return path
+        suffix = f"_shard{self.shard.label}"
+        for extension in (".zip", *ArchiveWriter.TAR_MODES):
+            if path.lower().endswith(extension):
+                return path[:-len(extension)] + suffix + path[-len(extension):]
+        root, extension = os.path.splitext(path)
+        return root + suffix + extension
+
+    def _load_qr_config(self) -> Dict[str, Any]:
+        qr_config = {}
+        for key in self.qr_generator.DEFAULT_CONFIG:
+            value = self.config_handler.get('QRCode', key)
+            if value is not None:
+                qr_config[key] = value
+
+        output_profile = qr_config.get('output_profile')
+        if output_profile is not None and output_profile not in self.qr_generator.OUTPUT_PROFILES:
+            raise ConfigurationError('QRCode.output_profile',
+                                     ValueError(f"Unknown output profile '{output_profile}', "
+                                                f"expected one of {list(self.qr_generator.OUTPUT_PROFILES)}"))
+        mask_pattern = qr_config.get('mask_pattern')
+        if mask_pattern is not None and (isinstance(mask_pattern, bool) or mask_pattern not in range(8)):
+            raise ConfigurationError('QRCode.mask_pattern',
+                                     ValueError(f"Mask pattern must be an integer from 0 to 7, got {mask_pattern!r}"))
+        output_format = qr_config.get('format')
+        if output_format is not None and output_format not in self.qr_generator.FORMATS:
+            raise ConfigurationError('QRCode.format',
+                                     ValueError(f"Unknown output format '{output_format}', "
+                                                f"expected one of {list(self.qr_generator.FORMATS)}"))
+        return qr_config
+
     def process_excel(self, excel_file: str, output_folder: str) -> None:
         logging.info(f"Running QR Code Generator version {self.version}")
-        self.file_handler.ensure_directory(output_folder)
-        
+        if self.archive:
+            self.file_handler.ensure_directory(os.path.dirname(os.path.abspath(self.archive)))
+        else:
+            self.file_handler.ensure_directory(output_folder)
+
+        self.qr_generator.clear_cache()
+        self.cache_hits = self.cache_misses = 0
+        self.error_log = ErrorLog()
+        # An archive is rewritten from scratch, so there is nothing to checkpoint.
+        self.journal = None if self.archive else CheckpointJournal(output_folder, resume=self.resume,
+                                                                   flush_interval=self.checkpoint_interval,
+                                                                   filename=self._shard_path(CheckpointJournal.FILENAME))
+        if self.shard is not None:
+            self.shard_manifest = ShardManifest(self.shard, self._output_root(output_folder),
+                                                self.qr_generator.config_key(self.config['qr_config']), self.archive)
+            logging.info(f"Processing shard {self.shard.index}/{self.shard.count}")
+        if self.journal is not None and self.journal.completed:
+            logging.info(f"Resuming run: {len(self.journal.completed)} rows already completed")
+        succeeded = False
         try:
-            with pd.ExcelFile(excel_file) as xls:
-                sheets_to_process = self._get_sheets_to_process(xls.sheet_names)
+            if self.config['qr_config'].get('pin_version'):
+                self.config['qr_config'] = self._pin_version(excel_file)
+            with self.metrics.timer("total"), \
+                    self._open_workbook(excel_file) as workbook, \
+                    self._create_executor() as executor, \
+                    self._create_write_pool() as writer, \
+                    self._open_archive() as archive:
+                sheets_to_process = self._get_sheets_to_process(workbook.sheet_names)
                 row_header = self._get_row_header()
 
-                for sheet_name in sheets_to_process:
-                    self._process_sheet(xls, sheet_name, row_header, output_folder)
+                if self.sheet_workers > 1 and len(sheets_to_process) > 1:
+                    self._process_sheets_concurrently(excel_file, sheets_to_process, row_header, output_folder,
+                                                      executor, archive)
+                else:
+                    for sheet_name in sheets_to_process:
+                        self._process_sheet(workbook, sheet_name, row_header, output_folder, executor, archive, writer)
+
+            self.cache_hits += self.qr_generator.cache_hits
+            self.cache_misses += self.qr_generator.cache_misses
+            if self.qr_generator.cache_size:
+                logging.info(f"QR code cache: {self.cache_hits} hits, {self.cache_misses} misses")
+            self.metrics.increment("cache_hits", self.cache_hits)
+            self.metrics.increment("cache_misses", self.cache_misses)
+            if self.metrics.enabled:
+                stage_seconds = ", ".join(f"{name} {seconds:.3f}s" for name, seconds in sorted(self.metrics.timers.items()))
+                logging.info(f"Stage timings: {stage_seconds}")
+                self._log_write_overlap()
+            succeeded = True
         except Exception as e:
             logging.error(f"Error processing Excel file: {str(e)}")
             raise QRBatchProcessingError("Failed to process Excel file", original_exception=e)
+        finally:
+            self._finish_run(output_folder, succeeded)
+
+    def _pin_version(self, excel_file: str) -> Dict[str, Any]:
+        # One pre-pass over the formatted payloads of every sheet, before the pool starts with the config.
+        # Rows skipped later for a missing item index are included, so the version can only err on the large side.
+        # Payloads too large for any version are left out and fail on their own when the row is generated.
+        qr_config = self._load_qr_config()
+        with self.metrics.timer("pin_version"), self._open_workbook(excel_file) as workbook:
+            row_header = self._get_row_header()
+            payloads = (payload for sheet_name in sorted(self._get_sheets_to_process(workbook.sheet_names))
+                        for payload in self._scan_sheet_payloads(workbook, sheet_name, row_header))
+            version = self.qr_generator.fit_version(payloads, qr_config, metrics=self.metrics)
+        logging.info(f"Pinned QR version {version} for every code in this run")
+        return {**qr_config, 'version': version}
+
+    def _scan_sheet_payloads(self, workbook: Union[BaseInputSource, StreamingExcelReader], sheet_name: str,
+                             row_header: Optional[int]) -> Iterator[str]:
+        try:
+            yield from self._scan_payloads(workbook, sheet_name, row_header)
+        except Exception as e:
+            if not self.continue_on_error:
+                raise QRBatchProcessingError(f"Failed to process sheet '{sheet_name}'", original_exception=e)
+            # The sheet fails again in the main pass, which records it in the error log.
+            logging.warning(f"Sheet '{sheet_name}' left out of the version pre-pass: {str(e)}")
+
+    def _scan_payloads(self, workbook: Union[BaseInputSource, StreamingExcelReader], sheet_name: str,
+                       row_header: Optional[int]) -> Iterator[str]:
+        if isinstance(workbook, StreamingExcelReader):
+            _, rows = self._read_sheet_streaming(workbook, sheet_name, row_header)
+            for _, row in rows:
+                yield self.data_processor.format_data(row)
+        else:
+            for _, df in self._read_sheet_frames(workbook, sheet_name, row_header):
+                yield from self.data_processor.format_frame(df)
+
+    def _finish_run(self, output_folder: str, succeeded: bool) -> None:
+        if self.journal is not None:
+            if succeeded and not len(self.error_log):
+                self.journal.remove()
+            else:
+                # Keep the journal so a rerun with --resume only redoes unfinished or failed rows.
+                self.journal.close()
+                logging.info(f"Checkpoint saved to {self.journal.path}; rerun with --resume to continue")
+
+        if self.shard_manifest is not None:
+            self.shard_manifest.save(self.version)
+            logging.info(f"Shard manifest written to {self.shard_manifest.path}")
+
+        errors_path = self._errors_path(output_folder)
+        if len(self.error_log):
+            self.error_log.write(errors_path)
+            logging.warning(f"{len(self.error_log)} rows failed, see {errors_path}")
+        elif succeeded and os.path.exists(errors_path):
+            os.remove(errors_path)
+
+    def _output_root(self, output_folder: str) -> str:
+        return os.path.dirname(os.path.abspath(self.archive)) if self.archive else output_folder
+
+    def _errors_path(self, output_folder: str) -> str:
+        return os.path.join(self._output_root(output_folder), self._shard_path(ErrorLog.FILENAME))
+
+    def _open_workbook(self, excel_file: str) -> Union[BaseInputSource, StreamingExcelReader]:
+        return InputSourceFactory.create_source(excel_file, streaming=self.streaming, chunk_size=self.read_chunk_size)
+
+    def _open_labels(self, sheet_name: str, output_folder: str):
+        if not self.labels:
+            return nullcontext()
+        name = sheet_name.strip() if self.shard is None else f"{sheet_name.strip()}_shard{self.shard.label}"
+        path = os.path.join(self._output_root(output_folder), "labels", name)
+        self.file_handler.ensure_directory(os.path.dirname(path))
+        return LabelSheetWriter(path, self.labels, self.label_layout)
+
+    def _open_archive(self):
+        if not self.archive:
+            return nullcontext()
+        logging.info(f"Writing QR codes to archive: {self.archive}")
+        return ArchiveWriter(self.archive)
+
+    def _create_executor(self):
+        if self.executor is not None:
+            return nullcontext(self.executor)
+        if self.workers <= 1:
+            return nullcontext()
+        logo = self.config['qr_config'].get('logo')
+        if logo:
+            # Decode the logo once here so every worker starts with it loaded.
+            self.qr_generator.logo_cache.preload(logo)
+
+        logging.info(f"Starting process pool with {self.workers} workers")
+        return ProcessPoolExecutor(max_workers=self.workers,
+                                   initializer=init_worker,
+                                   initargs=(self.qr_generator, self.config['qr_config'], self.qr_generator.logo_cache,
+                                             self.metrics.enabled))
+
+    def _create_write_pool(self):
+        if self.write_threads <= 0 or self.workers > 1 or self.executor is not None:
+            # Pool workers already encode and write in parallel with the collecting thread.
+            return nullcontext()
+        return ThreadPoolExecutor(max_workers=self.write_threads, thread_name_prefix="qrbatch-write")
+
+    def _log_write_overlap(self) -> None:
+        busy = self.metrics.timers.get("write_behind")
+        if busy is None:
+            return
+        # Writer time the main thread did not spend waiting ran alongside encoding.
+        waited = self.metrics.timers.get("write_wait", 0.0)
+        overlap = max(0.0, busy - waited)
+        self.metrics.observe("write_overlap", overlap)
+        logging.info(f"Write-behind: {busy:.3f}s of PNG encoding and writes, {waited:.3f}s waited, {overlap:.3f}s overlapped")
 
     def _get_sheets_to_process(self, available_sheets: List[str]) -> Set[str]:
         available_sheets_set = set(available_sheets)
@@ -60,39 +360,512 @@ class QRCodeBatchProcessor:
             logging.error(f"Invalid row header value: {self.config['row_header']}")
             raise QRBatchProcessingError(f"Invalid row header: {self.config['row_header']} is not an integer.")
 
-    def _process_sheet(self, xls: pd.ExcelFile, sheet_name: str, row_header: Optional[int], output_folder: str) -> None:
+    def _process_sheets_concurrently(self, excel_file: str, sheet_names: Iterable[str], row_header: Optional[int],
+                                     output_folder: str, executor: Executor,
+                                     archive: Optional[ArchiveWriter] = None) -> None:
+        # Sheet threads only read, format and collect; encoding still runs in the shared process pool,
+        # and max_in_flight_rows caps the rows submitted by all sheets together.
+        logging.info(f"Processing sheets with {self.sheet_workers} threads")
+        with ThreadPoolExecutor(max_workers=self.sheet_workers, thread_name_prefix="qrbatch-sheet") as sheet_executor:
+            futures = [sheet_executor.submit(self._process_sheet_with_handle, excel_file, sheet_name, row_header,
+                                             output_folder, executor, archive)
+                       for sheet_name in sheet_names]
+            try:
+                for future in futures:
+                    future.result()
+            except Exception:
+                for future in futures:
+                    future.cancel()
+                raise
+
+    def _process_sheet_with_handle(self, excel_file: str, sheet_name: str, row_header: Optional[int],
+                                   output_folder: str, executor: Executor,
+                                   archive: Optional[ArchiveWriter] = None) -> None:
+        # Each thread reads through its own read-only workbook handle.
+        with self._open_workbook(excel_file) as workbook:
+            self._process_sheet(workbook, sheet_name, row_header, output_folder, executor, archive)
+
+    def _process_sheet(self, workbook: Union[BaseInputSource, StreamingExcelReader], sheet_name: str,
+                       row_header: Optional[int], output_folder: str, executor: Optional[Executor] = None,
+                       archive: Optional[ArchiveWriter] = None, writer: Optional[Executor] = None) -> None:
         try:
-            df = pd.read_excel(xls, sheet_name=sheet_name, header=row_header)
-            
-            logging.info(f"Columns in sheet '{sheet_name}': {df.columns.tolist()}")
-            df = self.data_processor.filter_columns(df, self.config['include_columns'], self.config['exclude_columns'])
-            logging.info(f"Columns after filtering: {df.columns.tolist()}")
+            if archive is None:
+                sheet_folder = os.path.join(output_folder, sheet_name.strip())
+            else:
+                # 封存模式下的路徑即為封存檔內的成員路徑
+                sheet_folder = sheet_name.strip()
+
+            if isinstance(workbook, StreamingExcelReader):
+                plan, rows = self._read_sheet_streaming(workbook, sheet_name, row_header)
+                tasks = self._iter_row_tasks(rows, plan, sheet_name, sheet_folder)
+            else:
+                frames = self._read_sheet_frames(workbook, sheet_name, row_header)
+                tasks = (task for plan, df in frames for task in self._iter_frame_tasks(df, plan, sheet_name, sheet_folder))
 
-            sheet_folder = os.path.join(output_folder, sheet_name.strip())
-            self.file_handler.ensure_directory(sheet_folder)
+            if archive is None:
+                self.file_handler.ensure_directory(sheet_folder)
+            manifest = self._load_manifest(sheet_folder) if self.incremental else None
+            # Digests of regenerated rows, recorded in the manifest once their file is written.
+            digests: Dict[str, str] = {}
+            partition = self.shard_manifest.partition(sheet_name) if self.shard_manifest is not None else None
+            if partition is not None:
+                tasks = self._assign_shard(tasks, partition, manifest)
+            if manifest is not None:
+                tasks = self._skip_unchanged(tasks, manifest, digests)
+            # Skip after the manifest so resumed rows are still recorded in it.
+            if self.journal is not None and self.journal.completed:
+                tasks = self._skip_completed(tasks, sheet_name, manifest, digests)
+
+            # Results come back in task order, so row indexes are matched up through a FIFO.
+            row_indexes = deque()
+            row_tasks = self._track_indexes(tasks, row_indexes)
+            if executor is None and writer is not None:
+                generated = self._generate_write_behind(writer, row_tasks, archive)
+            elif executor is None:
+                generated = (self._generate_task(task, archive) for task in row_tasks)
+            else:
+                generated = self._generate_parallel(executor, row_tasks, archive)
+
+            generated_count = 0
+            failed_count = 0
+            bytes_written = 0
+            with self._open_labels(sheet_name, output_folder) as labels:
+                for qr_filename, size, qr_bytes, error in generated:
+                    index, caption = row_indexes.popleft()
+                    if error is not None:
+                        failed_count += 1
+                        if manifest is not None:
+                            manifest.fail(os.path.basename(qr_filename))
+                            digests.pop(os.path.basename(qr_filename), None)
+                        if partition is not None:
+                            partition.fail(index, os.path.basename(qr_filename))
+                        # Stops the sheet unless --continue-on-error, which records the row and moves on.
+                        self._handle_row_error(sheet_name, index, error, qr_filename)
+                        continue
+                    logging.info(f"Generated QR code: {qr_filename}")
+                    generated_count += 1
+                    bytes_written += size
+                    if manifest is not None:
+                        self._record_digest(manifest, digests, os.path.basename(qr_filename))
+                    if self.journal is not None:
+                        self.journal.record(sheet_name, index)
+                    if labels is not None:
+                        with self.metrics.timer("labels"):
+                            labels.add(qr_bytes, caption)
+            logging.info(f"Generated {generated_count} QR codes ({bytes_written} bytes) for sheet '{sheet_name}'")
+            if labels is not None and labels.pages:
+                logging.info(f"Wrote {labels.pages} label pages for sheet '{sheet_name}' to {labels.path}")
+                self.metrics.increment("label_pages", labels.pages)
+            self.metrics.increment("sheets_processed")
+            self.metrics.increment("rows_processed", generated_count)
+            self.metrics.increment("rows_failed", failed_count)
+            self.metrics.increment("bytes_written", bytes_written)
+            if partition is not None:
+                self.shard_manifest.complete_sheet(partition)
+                self.metrics.increment("rows_other_shards", partition.rows - len(partition.assigned))
+
+            if manifest is not None:
+                removed = manifest.remove_stale()
+                unchanged_count = manifest.unchanged_count
+                manifest.save()
+                # Kept for the next run of this processor (qrbatch watch), which then skips reading it back.
+                self._manifests[sheet_folder] = manifest
+                self.metrics.increment("rows_unchanged", unchanged_count)
+                self.metrics.increment("files_removed", len(removed))
+                logging.info(f"Skipped {unchanged_count} unchanged and removed {len(removed)} stale QR codes "
+                             f"for sheet '{sheet_name}'")
 
-            df.apply(lambda row: self._process_row(row, sheet_name, sheet_folder), axis=1)
-                
         except Exception as e:
             logging.error(f"Error processing sheet '{sheet_name}': {str(e)}")
+            if self.continue_on_error:
+                self.error_log.add(sheet_name, None, e)
+                return
             raise QRBatchProcessingError(f"Failed to process sheet '{sheet_name}'", original_exception=e)
 
-    def _process_row(self, row: pd.Series, sheet_name: str, sheet_folder: str) -> None:
+    def _load_manifest(self, sheet_folder: str) -> ManifestHandler:
+        # A manifest left by an interrupted sheet is not put back, so that sheet reloads the saved one.
+        manifest = self._manifests.pop(sheet_folder, None)
+        if manifest is None:
+            manifest = ManifestHandler.load(sheet_folder, self._shard_path(ManifestHandler.FILENAME))
+        return manifest
+
+    def _column_plan(self, columns: List[Any], sheet_name: str) -> ColumnPlan:
+        logging.info(f"Columns in sheet '{sheet_name}': {columns}")
+        with self.metrics.timer("filter_columns"):
+            plan = self.data_processor.compile_plan(columns, self.config['include_columns'], self.config['exclude_columns'],
+                                                    self.config['id_column'], self.config['identifier_column'])
+        logging.info(f"Columns after filtering: {list(plan.selected)}")
+        return plan
+
+    def _read_sheet_frames(self, source: BaseInputSource, sheet_name: str,
+                           row_header: Optional[int]) -> Iterator[Tuple[ColumnPlan, pd.DataFrame]]:
+        plans = []
+
+        def select_columns(columns: List[Any]) -> ColumnPlan:
+            plans.append(self._column_plan(columns, sheet_name))
+            return plans[-1]
+
+        # Sources that can project columns only decode the selected ones.
+        frames = source.read_frames(sheet_name, row_header, select_columns)
+        while True:
+            with self.metrics.timer("read_sheet"):
+                df = next(frames, None)
+            if df is None:
+                return
+            yield plans[-1], df
+
+    def _read_sheet_streaming(self, reader: StreamingExcelReader, sheet_name: str,
+                              row_header: Optional[int]) -> Tuple[ColumnPlan, Iterator[IndexedRow]]:
+        plans = []
+
+        def select_columns(columns: List[Any]) -> ColumnPlan:
+            plans.append(self._column_plan(columns, sheet_name))
+            return plans[-1]
+
+        # Rows come back with only the selected columns, already converted to their row dtypes.
+        selected, rows = reader.read_sheet(sheet_name, header=row_header, select_columns=select_columns)
+        return plans[-1], ((index, dict(zip(selected, values))) for index, values in rows)
+
+    def _iter_frame_tasks(self, df: pd.DataFrame, plan: ColumnPlan, sheet_name: str,
+                          sheet_folder: str) -> Iterator[IndexedTask]:
+        with self.metrics.timer("format_data"):
+            # File names and captions use the values each row had under df.apply(axis=1)
+            df = self.data_processor.to_row_dtypes(df)
+            payloads = self.data_processor.format_frame(df, row_dtypes=True)
+            filenames = self._frame_filenames(df, plan, sheet_name, sheet_folder)
+            captions = self._frame_captions(df, plan)
+        for index, qr_filename, formatted_data, caption in zip(df.index, filenames, payloads, captions):
+            if qr_filename is not None:
+                yield index, (formatted_data, qr_filename), caption
+
+    def _frame_captions(self, df: pd.DataFrame, plan: ColumnPlan) -> Iterable[str]:
+        if not self.labels or df.empty:
+            return repeat("")
+        _, identifier_position = plan.require_key_columns()
+        return [self._caption(value) for value in self.data_processor.stringify_column(df.iloc[:, identifier_position])]
+
+    @staticmethod
+    def _caption(value: Any) -> str:
+        text = str(value).replace('\n', ' ').strip()
+        return "" if text.lower() == 'nan' else text
+
+    def _frame_filenames(self, df: pd.DataFrame, plan: ColumnPlan, sheet_name: str,
+                         sheet_folder: str) -> List[Optional[str]]:
+        if df.empty:
+            return []
+        id_position, identifier_position = plan.require_key_columns()
+        item_indexes = self.file_handler.clean_filenames(self.data_processor.stringify_column(df.iloc[:, id_position]))
+        item_identifiers = self.file_handler.clean_filenames(self.data_processor.stringify_column(df.iloc[:, identifier_position]))
+
+        filenames = []
+        for index, item_index, item_identifier in zip(df.index, item_indexes, item_identifiers):
+            if item_index.lower() == 'nan':
+                logging.warning(f"Skipped row with NaN identifier: {index}")
+                self.metrics.increment("rows_skipped_nan")
+                filenames.append(None)
+                continue
+            try:
+                item_number = int(item_index.split('.')[0])
+            except ValueError as e:
+                self._handle_row_error(sheet_name, index, e)
+                filenames.append(None)
+                continue
+            filenames.append(os.path.join(sheet_folder, f"f{item_number:04d}_{item_identifier}{self.extension}"))
+        return filenames
+
+    def _iter_row_tasks(self, rows: Iterable[IndexedRow], plan: ColumnPlan, sheet_name: str,
+                        sheet_folder: str) -> Iterator[IndexedTask]:
+        key_positions = None
+        for index, row in rows:
+            if key_positions is None:
+                key_positions = plan.require_key_columns()
+            task = self._prepare_row(index, row, sheet_name, sheet_folder, key_positions)
+            if task:
+                caption = self._caption(list(row.values())[key_positions[1]]) if self.labels else ""
+                yield index, task, caption
+
+    def _assign_shard(self, tasks: Iterable[IndexedTask], partition: SheetPartition,
+                      manifest: Optional[ManifestHandler] = None) -> Iterator[IndexedTask]:
+        config_key = self.qr_generator.config_key(self.config['qr_config']) if manifest is not None else None
+        for index, task, caption in tasks:
+            formatted_data, qr_filename = task
+            filename = os.path.basename(qr_filename)
+            if partition.assign(index, filename, formatted_data):
+                yield index, task, caption
+            elif manifest is not None:
+                # Rows of other shards stay in the manifest, so they are not removed as stale.
+                manifest.record(filename, manifest.digest(formatted_data, config_key))
+        logging.info(f"Shard {self.shard.index}/{self.shard.count}: {len(partition.assigned)} of {partition.rows} rows "
+                     f"in sheet '{partition.sheet_name}'")
+
+    def _skip_unchanged(self, tasks: Iterable[IndexedTask], manifest: ManifestHandler,
+                        digests: Dict[str, str]) -> Iterator[IndexedTask]:
+        config_key = self.qr_generator.config_key(self.config['qr_config'])
+        for index, task, caption in tasks:
+            formatted_data, qr_filename = task
+            filename = os.path.basename(qr_filename)
+            digest = manifest.digest(formatted_data, config_key)
+            if manifest.is_unchanged(filename, digest):
+                manifest.keep(filename, digest)
+                continue
+            digests[filename] = digest
+            yield index, task, caption
+
+    def _skip_completed(self, tasks: Iterable[IndexedTask], sheet_name: str,
+                        manifest: Optional[ManifestHandler] = None,
+                        digests: Optional[Dict[str, str]] = None) -> Iterator[IndexedTask]:
+        skipped = 0
+        for index, task, caption in tasks:
+            if self.journal.is_completed(sheet_name, index):
+                if manifest is not None:
+                    # Written by the interrupted run, so its digest can be recorded now.
+                    self._record_digest(manifest, digests, os.path.basename(task[1]))
+                skipped += 1
+                continue
+            yield index, task, caption
+        self.metrics.increment("rows_resumed", skipped)
+        logging.info(f"Skipped {skipped} rows completed by a previous run for sheet '{sheet_name}'")
+
+    @staticmethod
+    def _record_digest(manifest: ManifestHandler, digests: Dict[str, str], filename: str) -> None:
+        # Rows sharing a file name share one entry; the first of them to finish records it.
+        digest = digests.pop(filename, None)
+        if digest is not None:
+            manifest.record(filename, digest)
+
+    @staticmethod
+    def _track_indexes(tasks: Iterable[IndexedTask], row_indexes: deque) -> Iterator[RowTask]:
+        for index, task, caption in tasks:
+            row_indexes.append((index, caption))
+            yield task
+
+    def _handle_row_error(self, sheet_name: str, index: Any, error: Exception, filename: Optional[str] = None) -> None:
+        logging.error(f"Error processing row at index {index} in sheet '{sheet_name}': {str(error)}")
+        if not self.continue_on_error:
+            raise QRGenerationError(f"Failed to process row at index {index} in sheet '{sheet_name}'", original_exception=error)
+        self.error_log.add(sheet_name, index, error, filename)
+
+    def _encodes_in_memory(self, archive: Optional[ArchiveWriter]) -> bool:
+        # Archive members and label sheets need the PNG bytes in this process.
+        return archive is not None or bool(self.labels)
+
+    def _generate_task(self, task: RowTask, archive: Optional[ArchiveWriter] = None) -> GeneratedRow:
+        formatted_data, qr_filename = task
         try:
-            item_index = self.file_handler.clean_filename(str(row.iloc[0]))
-            item_identifier = self.file_handler.clean_filename(str(row.iloc[5]))
-            
+            if not self._encodes_in_memory(archive):
+                return qr_filename, self.qr_generator.save_cached_qr_code(formatted_data, qr_filename, config=self.config['qr_config']), None, None
+            qr_bytes = self.qr_generator.generate_cached_bytes(formatted_data, config=self.config['qr_config'])
+        except Exception as e:
+            return self._store_bytes(archive, qr_filename, None, e)
+        return self._store_bytes(archive, qr_filename, qr_bytes)
+
+    def _generate_write_behind(self, writer: Executor, tasks: Iterable[RowTask],
+                               archive: Optional[ArchiveWriter] = None) -> Iterator[GeneratedRow]:
+        # This thread encodes and renders; writer threads PNG-encode and write, both of which release the GIL.
+        # At most chunk_size rows are pending, and results are yielded in task order. Returning drains the
+        # pending rows, so every file of a sheet is written before the sheet is reported done.
+        pending = deque()
+        # Payloads still being PNG-encoded, so a repeat waits for those bytes instead of encoding again.
+        encoding: Dict[str, Future] = {}
+        for task in tasks:
+            pending.append(self._submit_write(writer, task, archive, encoding))
+            while pending and (pending[0][0].done() or len(pending) >= self.chunk_size):
+                yield self._collect_write(*pending.popleft(), archive, encoding)
+        while pending:
+            yield self._collect_write(*pending.popleft(), archive, encoding)
+
+    def _submit_write(self, writer: Executor, task: RowTask, archive: Optional[ArchiveWriter],
+                      encoding: Dict[str, Future]) -> Tuple[Future, Optional[str]]:
+        formatted_data, qr_filename = task
+        qr_config = self.config['qr_config']
+        encoded = encoding.get(formatted_data)
+        if encoded is not None:
+            self.qr_generator.cache_hits += 1
+            return writer.submit(self._write_repeat, qr_filename, encoded, archive is None), None
+        qr_bytes = self.qr_generator.lookup_cache(formatted_data, qr_config)
+        if qr_bytes is not None:
+            return writer.submit(self._write_behind, qr_filename, None, qr_bytes, archive is None), None
+
+        try:
+            rendered = self.qr_generator.render_qr_code(formatted_data, config=qr_config, metrics=self.metrics)
+        except Exception as e:
+            future = Future()
+            future.set_result((qr_filename, 0, None, e))
+            return future, None
+        image, qr_bytes = (None, rendered) if isinstance(rendered, bytes) else (rendered, None)
+        encoded = Future()
+        if self.qr_generator.cache_size:
+            encoding[formatted_data] = encoded
+        return writer.submit(self._write_behind, qr_filename, image, qr_bytes, archive is None, encoded), formatted_data
+
+    def _write_behind(self, qr_filename: str, image: Any, qr_bytes: Optional[bytes], to_file: bool,
+                      encoded: Optional[Future] = None) -> GeneratedRow:
+        with self.metrics.timer("write_behind"):
+            if qr_bytes is None:
+                try:
+                    qr_bytes = self.qr_generator.encode_image(image, self.config['qr_config'], metrics=self.metrics)
+                except Exception as e:
+                    if encoded is not None:
+                        encoded.set_exception(e)
+                    return qr_filename, 0, None, e
+            if encoded is not None:
+                # Set before writing, so a write error of this row does not fail its repeats.
+                encoded.set_result(qr_bytes)
+            if to_file:
+                return self._store_bytes(None, qr_filename, qr_bytes)
+            return qr_filename, len(qr_bytes), qr_bytes, None
+
+    def _write_repeat(self, qr_filename: str, encoded: Future, to_file: bool) -> GeneratedRow:
+        # Submitted after the row that encodes, so in a FIFO pool that row is already running or done.
+        try:
+            qr_bytes = encoded.result()
+        except Exception as e:
+            return qr_filename, 0, None, e
+        return self._write_behind(qr_filename, None, qr_bytes, to_file)
+
+    def _collect_write(self, future: Future, formatted_data: Optional[str],
+                       archive: Optional[ArchiveWriter], encoding: Dict[str, Future]) -> GeneratedRow:
+        # Exceptions raised in a writer thread surface here and fail the sheet like any other error.
+        with self.metrics.timer("write_wait"):
+            qr_filename, size, qr_bytes, error = future.result()
+        if formatted_data is not None:
+            encoding.pop(formatted_data, None)
+            if qr_bytes is not None:
+                self.qr_generator.store_cache(formatted_data, qr_bytes, self.config['qr_config'])
+        if archive is not None:
+            # Archive members are written here, in task order.
+            return self._store_bytes(archive, qr_filename, qr_bytes, error)
+        return qr_filename, size, qr_bytes, error
+
+    def _generate_parallel(self, executor: Executor, tasks: Iterable[RowTask],
+                           archive: Optional[ArchiveWriter] = None) -> Iterator[GeneratedRow]:
+        # Keep a bounded number of chunks in flight and yield results in submission order.
+        # Workers only encode; archive members are written by the collecting thread.
+        worker = encode_chunk if self._encodes_in_memory(archive) else generate_chunk
+        pending = deque()
+        first_rows: "OrderedDict[str, List[GeneratedRow]]" = OrderedDict()
+        for chunk in _chunked(self._mark_repeats(tasks, first_rows), self.chunk_size):
+            encode = [task for task, _, repeat in chunk if not repeat]
+            pending.append((self._submit_chunk(executor, worker, encode) if encode else None, chunk))
+            if len(pending) >= self.workers * 2:
+                yield from self._collect_chunk(*pending.popleft(), archive)
+        while pending:
+            yield from self._collect_chunk(*pending.popleft(), archive)
+
+    def _mark_repeats(self, tasks: Iterable[RowTask],
+                      first_rows: "OrderedDict[str, List[GeneratedRow]]") -> Iterator[Tuple[RowTask, List[GeneratedRow], bool]]:
+        # A payload already sent to the pool is not sent again, even while its row is still pending in a worker;
+        # the repeat takes the first row's result from the shared slot once that row is collected.
+        for task in tasks:
+            formatted_data = task[0]
+            slot = first_rows.get(formatted_data)
+            if slot is not None:
+                first_rows.move_to_end(formatted_data)
+                yield task, slot, True
+                continue
+            slot = []
+            if self.qr_generator.cache_size:
+                first_rows[formatted_data] = slot
+                if len(first_rows) > self.qr_generator.cache_size:
+                    first_rows.popitem(last=False)
+            yield task, slot, False
+
+    def _submit_chunk(self, executor: Executor, worker, chunk: List[RowTask]):
+        row_count = len(chunk)
+        with self._in_flight:
+            # A chunk larger than the cap is still submitted once nothing else is in flight.
+            self._in_flight.wait_for(lambda: self._in_flight_rows == 0
+                                     or self._in_flight_rows + row_count <= self.max_in_flight_rows)
+            self._in_flight_rows += row_count
+        try:
+            future = executor.submit(worker, chunk, self.config['qr_config'])
+        except Exception:
+            self._release_rows(row_count)
+            raise
+        # Release on completion rather than on collection so one sheet waiting for
+        # capacity never blocks another sheet from draining its finished chunks.
+        future.add_done_callback(lambda _: self._release_rows(row_count))
+        return future
+
+    def _release_rows(self, row_count: int) -> None:
+        with self._in_flight:
+            self._in_flight_rows -= row_count
+            self._in_flight.notify_all()
+
+    def _collect_chunk(self, future: Optional[Future], chunk: List[Tuple[RowTask, List[GeneratedRow], bool]],
+                       archive: Optional[ArchiveWriter]) -> Iterator[GeneratedRow]:
+        results, cache_hits, cache_misses, worker_metrics = future.result() if future is not None else ([], 0, 0, None)
+        with self._lock:
+            self.cache_hits += cache_hits + sum(1 for _, _, repeat in chunk if repeat)
+            self.cache_misses += cache_misses
+        self.metrics.merge(worker_metrics)
+        in_memory = self._encodes_in_memory(archive)
+        results = iter(results)
+        for (_, qr_filename), slot, repeat in chunk:
+            if repeat:
+                # The first row comes earlier in task order, so its chunk has already been collected.
+                yield self._store_repeat(archive, qr_filename, slot[0])
+                continue
+            if in_memory:
+                result_filename, qr_bytes, error = next(results)
+                row = self._store_bytes(archive, result_filename, qr_bytes, error)
+            else:
+                result_filename, size, error = next(results)
+                row = (result_filename, size, None, error)
+            slot.append(row)
+            yield row
+
+    def _store_repeat(self, archive: Optional[ArchiveWriter], qr_filename: str, first_row: GeneratedRow) -> GeneratedRow:
+        first_filename, _, qr_bytes, error = first_row
+        if error is not None:
+            return self._store_bytes(archive, qr_filename, None, error)
+        if qr_bytes is None:
+            # Written to its file by a worker process; the repeat is a copy of that file.
+            try:
+                with open(first_filename, 'rb') as f:
+                    qr_bytes = f.read()
+            except OSError as e:
+                return qr_filename, 0, None, e
+        return self._store_bytes(archive, qr_filename, qr_bytes)
+
+    def _store_bytes(self, archive: Optional[ArchiveWriter], qr_filename: str,
+                     qr_bytes: Optional[bytes], error: Optional[Exception] = None) -> GeneratedRow:
+        # qr_bytes is None when encoding failed with error.
+        if archive is not None:
+            member_name = qr_filename.replace(os.sep, '/')
+            if qr_bytes is None:
+                return member_name, 0, None, error
+            return member_name, archive.write(member_name, qr_bytes), qr_bytes, None
+        if qr_bytes is None:
+            return qr_filename, 0, None, error
+        try:
+            with open(qr_filename, 'wb') as f:
+                f.write(qr_bytes)
+        except OSError as e:
+            # Reported with the row like an encoding error.
+            return qr_filename, 0, None, e
+        return qr_filename, len(qr_bytes), qr_bytes, None
+
+    def _prepare_row(self, index: Any, row: Dict[Any, Any], sheet_name: str, sheet_folder: str,
+                     key_positions: Tuple[int, int] = (DEFAULT_ID_POSITION, DEFAULT_IDENTIFIER_POSITION)) -> Optional[RowTask]:
+        try:
+            values = list(row.values())
+            id_position, identifier_position = key_positions
+            item_index = self.file_handler.clean_filename(str(values[id_position]))
+            item_identifier = self.file_handler.clean_filename(str(values[identifier_position]))
+
             if pd.isna(item_index) or item_index.lower() == 'nan':
-                logging.warning(f"Skipped row with NaN identifier: {row.name}")
-                return
-            
+                logging.warning(f"Skipped row with NaN identifier: {index}")
+                self.metrics.increment("rows_skipped_nan")
+                return None
+
             item_index = int(item_index.split('.')[0])
-            
-            formatted_data = self.data_processor.format_data(row)
-            qr_filename = os.path.join(sheet_folder, f"f{item_index:04d}_{item_identifier}.png")
-            self.qr_generator.generate_qr_code(formatted_data, qr_filename)
-            logging.info(f"Generated QR code: {qr_filename}")
-            
+
+            with self.metrics.timer("format_data"):
+                formatted_data = self.data_processor.format_data(row)
+            qr_filename = os.path.join(sheet_folder, f"f{item_index:04d}_{item_identifier}{self.extension}")
+            return formatted_data, qr_filename
+
         except Exception as e:
-            logging.error(f"Error processing row at index {row.name} in sheet '{sheet_name}': {str(e)}")
-            raise QRGenerationError(f"Failed to process row at index {row.name} in sheet '{sheet_name}'", original_exception=e)
\ No newline at end of file
+            self._handle_row_error(sheet_name, index, e)
+            return None
@@ -0,0 +1,319 @@
+import os
+import sys
+import json
+import signal
+import asyncio
+import logging
+import argparse
+import tempfile
+from http import HTTPStatus
+from time import perf_counter
+from urllib.parse import parse_qs, urlsplit
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from qrbatch import __version__
+from qrbatch.exceptions import ConfigurationError, QRBatchProcessingError
+from qrbatch.utils.config_handler import ConfigHandler
+from qrbatch.utils.metrics import Metrics
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Upload formats accepted by POST /batch, mapped to the extension InputSourceFactory selects the reader by.
+UPLOAD_FORMATS = {"xlsx": ".xlsx", "csv": ".csv", "parquet": ".parquet", "feather": ".feather"}
+MAX_HEADER_LINES = 100
+
+Response = Tuple[int, str, bytes, Dict[str, str]]
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str, close: bool = False):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.close = close
+
+def parse_arguments(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="qrbatch serve",
+                                     description=f"QRBatch v{__version__} - Serve QR code generation over HTTP")
+    parser.add_argument("-c", "--config", default=os.path.join("config", "custom_config.json"), help="Path to the configuration file")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1, help="Number of worker processes kept warm")
+    parser.add_argument("--cache-size", type=int, default=1024, help="Number of encoded QR codes each worker keeps in memory (0 disables)")
+    parser.add_argument("--max-concurrency", type=int, default=8, help="Requests processed at the same time")
+    parser.add_argument("--max-queue", type=int, default=64, help="Requests waiting for a slot before new ones are rejected with 503")
+    parser.add_argument("--max-upload-mb", type=float, default=50, help="Largest accepted request body in megabytes")
+    return parser.parse_args(argv)
+
+class QRBatchServer:
+    def __init__(self, config_path: str, workers: int = 1, cache_size: int = 1024, max_concurrency: int = 8,
+                 max_queue: int = 64, max_upload_bytes: int = 50 * 1024 * 1024):
+        # Parsed once; every batch request reuses the same handler.
+        self.config_handler = ConfigHandler(config_path)
+        self.workers = max(1, workers)
+        self.cache_size = cache_size
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.max_upload_bytes = max_upload_bytes
+        self.metrics = Metrics(enabled=True)
+        self.pool: Optional["ProcessPoolExecutor"] = None
+        # Building a processor validates the configuration before the server starts listening.
+        self.qr_config = self._create_processor().config['qr_config']
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._waiting = 0
+        self._active = 0
+        self.routes = {
+            ("GET", "/health"): self._handle_health,
+            ("GET", "/metrics"): self._handle_metrics,
+            ("POST", "/qr"): self._handle_qr,
+            ("POST", "/batch"): self._handle_batch,
+        }
+
+    def _create_processor(self, archive: Optional[str] = None):
+        from qrbatch.qr_batch_processor import QRCodeBatchProcessor
+        from qrbatch.utils.data_processor import DataProcessor
+        from qrbatch.utils.file_handler import FileHandler
+        from qrbatch.utils.qr_generator import QRCodeGenerator
+
+        return QRCodeBatchProcessor(config_handler=self.config_handler, file_handler=FileHandler(),
+                                    data_processor=DataProcessor(), qr_generator=QRCodeGenerator(),
+                                    workers=self.workers, archive=archive, metrics=self.metrics,
+                                    executor=self.pool)
+
+    def start_pool(self) -> None:
+        """Start the worker processes and import the QR modules in each one before serving requests."""
+        from concurrent.futures import ProcessPoolExecutor, wait
+        from qrbatch.utils.qr_generator import QRCodeGenerator
+        from qrbatch.worker import encode_chunk, init_worker
+
+        qr_generator = QRCodeGenerator(cache_size=self.cache_size)
+        logo = self.qr_config.get('logo')
+        if logo:
+            qr_generator.logo_cache.preload(logo)
+        logger.info(f"Starting process pool with {self.workers} workers")
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker,
+                                        initargs=(qr_generator, self.qr_config, qr_generator.logo_cache, True))
+        wait([self.pool.submit(encode_chunk, []) for _ in range(self.workers)])
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+
+    async def serve(self, host: str, port: int) -> None:
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, stop.set)
+            except (NotImplementedError, RuntimeError):  # Windows
+                pass
+
+        server = await asyncio.start_server(self._handle_connection, host, port)
+        addresses = ", ".join(f"{sock.getsockname()[0]}:{sock.getsockname()[1]}" for sock in server.sockets)
+        logger.info(f"QRBatch server v{__version__} listening on {addresses}")
+        async with server:
+            await stop.wait()
+        logger.info("Shutting down")
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                    if request is None:
+                        break
+                    method, target, headers, body = request
+                    keep_alive = headers.get("connection", "").lower() != "close"
+                    status, content_type, payload, extra_headers = await self._dispatch(method, target, body)
+                except HTTPError as e:
+                    keep_alive = not e.close
+                    status, content_type, payload, extra_headers = self._error_response(e)
+                await self._write_response(writer, status, content_type, payload, extra_headers, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            # client went away, or sent a line longer than the stream limit
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        request_line = await reader.readline()
+        if not request_line.strip():
+            return None
+        try:
+            method, target, _ = request_line.decode('latin-1').split()
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Malformed request line", close=True)
+
+        headers = {}
+        for _ in range(MAX_HEADER_LINES):
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode('latin-1').partition(":")
+            headers[name.strip().lower()] = value.strip()
+        else:
+            raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Too many headers", close=True)
+
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            raise HTTPError(HTTPStatus.LENGTH_REQUIRED, "Chunked request bodies are not supported", close=True)
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length", close=True)
+        if length > self.max_upload_bytes:
+            # The body is not read, so the connection cannot be reused.
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                            f"Request body exceeds {self.max_upload_bytes} bytes", close=True)
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target, headers, body
+
+    async def _dispatch(self, method: str, target: str, body: bytes) -> Response:
+        url = urlsplit(target)
+        handler = self.routes.get((method, url.path))
+        if handler is None:
+            if any(path == url.path for _, path in self.routes):
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} is not allowed on {url.path}")
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"Unknown path {url.path}")
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        if method == "GET":
+            return await handler(query, body)
+
+        route = url.path.strip("/")
+        start = perf_counter()
+        if self._waiting >= self.max_queue and self._slots.locked():
+            self.metrics.increment("requests_rejected")
+            self.metrics.count_label("http_status", int(HTTPStatus.SERVICE_UNAVAILABLE))
+            raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, "Server is busy, retry later")
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+        self.metrics.observe("request_queue", perf_counter() - start)
+        self._active += 1
+        status = HTTPStatus.INTERNAL_SERVER_ERROR
+        try:
+            response = await handler(query, body)
+            status = response[0]
+            return response
+        except HTTPError as e:
+            status = e.status
+            raise
+        except Exception as e:
+            logger.error(f"Error handling {method} {url.path}: {e}", exc_info=True)
+            raise HTTPError(HTTPStatus.INTERNAL_SERVER_ERROR, str(e))
+        finally:
+            self._active -= 1
+            self._slots.release()
+            # Latency as seen by the client, including the time spent waiting for a slot.
+            self.metrics.observe(f"request_{route}", perf_counter() - start)
+            self.metrics.count_label("http_status", int(status))
+
+    async def _handle_health(self, query: Dict[str, str], body: bytes) -> Response:
+        status = {"status": "ok", "version": __version__, "workers": self.workers,
+                  "active": self._active, "waiting": self._waiting}
+        return self._json_response(HTTPStatus.OK, status)
+
+    async def _handle_metrics(self, query: Dict[str, str], body: bytes) -> Response:
+        if query.get("format") == "json":
+            return self._json_response(HTTPStatus.OK, self.metrics.to_dict())
+        return HTTPStatus.OK, "text/plain; version=0.0.4", self.metrics.to_prometheus().encode('utf-8'), {}
+
+    async def _handle_qr(self, query: Dict[str, str], body: bytes) -> Response:
+        from qrbatch.worker import encode_chunk
+
+        try:
+            data = body.decode('utf-8')
+        except UnicodeDecodeError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Request body must be UTF-8 text")
+        if not data:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Request body is empty")
+
+        loop = asyncio.get_running_loop()
+        results, cache_hits, cache_misses, worker_metrics = await loop.run_in_executor(self.pool, encode_chunk, [(data, "")])
+        self.metrics.merge(worker_metrics)
+        self.metrics.increment("cache_hits", cache_hits)
+        self.metrics.increment("cache_misses", cache_misses)
+        _, qr_bytes, error = results[0]
+        if error is not None:
+            raise HTTPError(HTTPStatus.INTERNAL_SERVER_ERROR, f"QR code generation failed: {error}")
+        content_type = "image/svg+xml" if self.qr_config.get('format') == "svg" else "image/png"
+        return HTTPStatus.OK, content_type, qr_bytes, {}
+
+    async def _handle_batch(self, query: Dict[str, str], body: bytes) -> Response:
+        upload_format = query.get("format", "xlsx").lower()
+        if upload_format not in UPLOAD_FORMATS:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Unsupported format '{upload_format}', "
+                                                    f"expected one of {list(UPLOAD_FORMATS)}")
+        if not body:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Request body is empty")
+
+        # Reading and formatting are blocking, so the batch runs on a thread while encoding uses the pool.
+        archive = await asyncio.get_running_loop().run_in_executor(None, self._run_batch, body,
+                                                                   UPLOAD_FORMATS[upload_format])
+        return HTTPStatus.OK, "application/zip", archive, {"Content-Disposition": 'attachment; filename="qr_codes.zip"'}
+
+    def _run_batch(self, body: bytes, extension: str) -> bytes:
+        with tempfile.TemporaryDirectory(prefix="qrbatch_serve_") as temp_dir:
+            input_path = os.path.join(temp_dir, f"upload{extension}")
+            archive_path = os.path.join(temp_dir, "qr_codes.zip")
+            with open(input_path, 'wb') as f:
+                f.write(body)
+            try:
+                self._create_processor(archive=archive_path).process_excel(input_path, temp_dir)
+            except QRBatchProcessingError as e:
+                raise HTTPError(HTTPStatus.UNPROCESSABLE_ENTITY, str(e))
+            with open(archive_path, 'rb') as f:
+                return f.read()
+
+    @staticmethod
+    def _json_response(status: int, content: Any) -> Response:
+        return status, "application/json", json.dumps(content, ensure_ascii=False).encode('utf-8'), {}
+
+    def _error_response(self, error: HTTPError) -> Response:
+        extra_headers = {"Retry-After": "1"} if error.status == HTTPStatus.SERVICE_UNAVAILABLE else {}
+        status, content_type, payload, _ = self._json_response(error.status, {"error": error.message})
+        return status, content_type, payload, extra_headers
+
+    @staticmethod
+    async def _write_response(writer: asyncio.StreamWriter, status: int, content_type: str, payload: bytes,
+                              extra_headers: Dict[str, str], keep_alive: bool) -> None:
+        headers = {"Content-Type": content_type, "Content-Length": str(len(payload)),
+                   "Connection": "keep-alive" if keep_alive else "close", "Server": f"qrbatch/{__version__}",
+                   **extra_headers}
+        head = f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+        head += "".join(f"{name}: {value}\r\n" for name, value in headers.items()) + "\r\n"
+        writer.write(head.encode('latin-1') + payload)
+        await writer.drain()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_arguments(argv)
+    try:
+        server = QRBatchServer(args.config, workers=args.workers, cache_size=args.cache_size,
+                               max_concurrency=args.max_concurrency, max_queue=args.max_queue,
+                               max_upload_bytes=int(args.max_upload_mb * 1024 * 1024))
+    except FileNotFoundError as e:
+        logger.error(f"File not found: {e}")
+        return 1
+    except ConfigurationError as e:
+        logger.error(f"Configuration error: {e}")
+        return 1
+
+    try:
+        server.start_pool()
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+    return 0
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.exit(main())
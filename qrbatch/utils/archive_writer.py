@@ -0,0 +1,150 @@
+import io
+import os
+import queue
+import tarfile
+import threading
+import time
+import warnings
+import zipfile
+from typing import Optional, Set, Union
+
+class ArchiveWriter:
+    TAR_MODES = {
+        ".tar": "w",
+        ".tar.gz": "w:gz",
+        ".tgz": "w:gz"
+    }
+
+    def __init__(self, archive_path: str, queue_size: int = 256):
+        """
+        將 QR Code 影像直接寫入單一 ZIP 或 TAR 封存檔，不建立個別檔案。
+        封存檔只由一個寫入執行緒操作；write 可由多個執行緒呼叫，成員依呼叫順序排入佇列寫入。
+        同名的成員與寫入資料夾時相同，只保留最後寫入的一個。
+
+        :param archive_path: 封存檔路徑，副檔名決定格式（.zip、.tar、.tar.gz、.tgz）
+        :param queue_size: 等待寫入的成員數上限，超過時 write 會等待
+        """
+        self.archive_path = archive_path
+        self.archive = self._open(archive_path)
+        self._names: Set[str] = set()
+        self._duplicates = 0
+        self._error: Optional[BaseException] = None
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(1, queue_size))
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="qrbatch-archive", daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def is_supported(archive_path: str) -> bool:
+        lower_path = archive_path.lower()
+        return lower_path.endswith(".zip") or any(lower_path.endswith(ext) for ext in ArchiveWriter.TAR_MODES)
+
+    @staticmethod
+    def _open(archive_path: str, path: Optional[str] = None) -> Union[zipfile.ZipFile, tarfile.TarFile]:
+        """
+        :param archive_path: 依副檔名決定格式
+        :param path: 實際寫入的路徑（選擇性），預設為 archive_path
+        """
+        lower_path = archive_path.lower()
+        path = path or archive_path
+        if lower_path.endswith(".zip"):
+            # PNG 已經過壓縮，不再重複壓縮
+            return zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_STORED)
+        for extension, mode in ArchiveWriter.TAR_MODES.items():
+            if lower_path.endswith(extension):
+                return tarfile.open(path, mode)
+        raise ValueError(f"Unsupported archive format: {archive_path}")
+
+    def write(self, member_name: str, data: bytes) -> int:
+        """
+        將一個成員排入寫入佇列。寫入執行緒先前發生的錯誤會在此拋出。
+
+        :param member_name: 封存檔內的路徑，以 "/" 分隔
+        :param data: 成員內容
+        :return: 寫入的位元組數
+        """
+        self._raise_error()
+        self._queue.put((member_name, data))
+        return len(data)
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if self._error is not None:
+                # 發生錯誤後只清空佇列，不再寫入
+                continue
+            try:
+                self._add(*item)
+            except BaseException as e:
+                self._error = e
+
+    def _add(self, member_name: str, data: bytes) -> None:
+        if member_name not in self._names:
+            self._names.add(member_name)
+            self._add_member(self.archive, member_name, data)
+            return
+        self._duplicates += 1
+        with warnings.catch_warnings():
+            # 重複的成員在 close 時移除
+            warnings.simplefilter("ignore", UserWarning)
+            self._add_member(self.archive, member_name, data)
+
+    @staticmethod
+    def _add_member(archive: Union[zipfile.ZipFile, tarfile.TarFile], member_name: str, data: bytes) -> None:
+        if isinstance(archive, zipfile.ZipFile):
+            # SVG 為文字，壓縮後約為原本的 1/4
+            compress_type = zipfile.ZIP_DEFLATED if member_name.lower().endswith(".svg") else None
+            archive.writestr(member_name, data, compress_type=compress_type)
+        else:
+            info = tarfile.TarInfo(member_name)
+            info.size = len(data)
+            info.mtime = int(time.time())
+            archive.addfile(info, io.BytesIO(data))
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            raise OSError(f"Failed to write archive {self.archive_path}: {self._error}") from self._error
+
+    def _drop_overwritten(self) -> None:
+        # ZIP 與 TAR 無法覆寫已寫入的成員，有同名成員時重新寫入一次，只保留每個名稱最後的成員
+        temp_path = f"{self.archive_path}.tmp"
+        is_zip = isinstance(self.archive, zipfile.ZipFile)
+        with (zipfile.ZipFile(self.archive_path) if is_zip else tarfile.open(self.archive_path)) as source, \
+                self._open(self.archive_path, temp_path) as target:
+            if is_zip:
+                members = source.infolist()
+                last = {info.filename: position for position, info in enumerate(members)}
+                for position, info in enumerate(members):
+                    if last[info.filename] == position:
+                        self._add_member(target, info.filename, source.read(info))
+            else:
+                members = source.getmembers()
+                last = {member.name: position for position, member in enumerate(members)}
+                for position, member in enumerate(members):
+                    if last[member.name] == position:
+                        target.addfile(member, source.extractfile(member))
+        os.replace(temp_path, self.archive_path)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        self.archive.close()
+        self._raise_error()
+        if self._duplicates:
+            self._drop_overwritten()
+
+    def __enter__(self) -> "ArchiveWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        try:
+            self.close()
+        except Exception:
+            # 已有例外時不以寫入錯誤取代
+            if exc_type is None:
+                raise
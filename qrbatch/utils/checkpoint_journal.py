@@ -0,0 +1,84 @@
+import json
+import logging
+import numbers
+import os
+import threading
+from typing import Any, List, Set, Tuple
+
+class CheckpointJournal:
+    FILENAME = ".qrbatch_checkpoint.jsonl"
+
+    def __init__(self, folder: str, resume: bool = False, flush_interval: int = 256, filename: str = FILENAME):
+        """
+        以附加方式記錄已完成的 (工作表, 列索引)，中斷後可從上次進度繼續。
+        每累積 flush_interval 筆才寫入磁碟一次，中斷時最多重做一批。
+
+        :param folder: 輸出資料夾路徑
+        :param resume: 是否讀取既有的記錄繼續執行，否則清除舊記錄
+        :param flush_interval: 每批寫入的筆數
+        :param filename: 記錄檔名，分片執行時每個分片使用各自的檔案
+        """
+        self.path = os.path.join(folder, filename)
+        self.flush_interval = max(1, flush_interval)
+        self.completed: Set[Tuple[str, Any]] = self._read(self.path) if resume else set()
+        self._pending: List[str] = []
+        self._lock = threading.Lock()
+        self._file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+
+    @staticmethod
+    def _read(path: str) -> Set[Tuple[str, Any]]:
+        completed = set()
+        if not os.path.exists(path):
+            return completed
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                try:
+                    sheet_name, index = json.loads(line)
+                except (ValueError, TypeError):
+                    # 中斷時最後一行可能只寫入一半
+                    logging.warning(f"Ignoring unreadable checkpoint line {line_number} in '{path}'")
+                    continue
+                completed.add((sheet_name, index))
+        return completed
+
+    @staticmethod
+    def _key(index: Any) -> Any:
+        return int(index) if isinstance(index, numbers.Integral) else str(index)
+
+    def is_completed(self, sheet_name: str, index: Any) -> bool:
+        return (sheet_name, self._key(index)) in self.completed
+
+    def record(self, sheet_name: str, index: Any) -> None:
+        """
+        記錄一列已完成。
+
+        :param sheet_name: 工作表名稱
+        :param index: 列索引
+        """
+        line = json.dumps([sheet_name, self._key(index)], ensure_ascii=False)
+        with self._lock:
+            self._pending.append(line)
+            if len(self._pending) >= self.flush_interval:
+                self._flush()
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        self._file.write("\n".join(self._pending) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending.clear()
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._flush()
+                self._file.close()
+
+    def remove(self) -> None:
+        """
+        關閉並刪除記錄檔，用於整批執行成功完成之後。
+        """
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -1,37 +1,109 @@
+import numpy as np
 import pandas as pd
-from typing import List, Callable, Optional
+from functools import lru_cache
+from typing import Any, List, Callable, Mapping, Optional, Sequence, Tuple
+
+# 未設定 id / identifier 欄位時，沿用篩選後第 1 欄為項目編號、第 6 欄為財產編號
+DEFAULT_ID_POSITION = 0
+DEFAULT_IDENTIFIER_POSITION = 5
+
+class ColumnPlan:
+    def __init__(self, columns: Tuple[Any, ...], positions: Tuple[int, ...],
+                 id_position: Optional[int], identifier_position: Optional[int]):
+        """
+        依標題列預先計算的欄位選取結果，相同標題列的工作表或資料批次可重複使用。
+
+        :param columns: 原始標題列
+        :param positions: 選取欄位在原始標題列中的位置（依輸出順序）
+        :param id_position: 項目編號欄位在選取欄位中的位置
+        :param identifier_position: 財產編號欄位在選取欄位中的位置
+        """
+        self.columns = columns
+        self.positions = positions
+        self.selected = tuple(columns[position] for position in positions)
+        self.id_position = id_position
+        self.identifier_position = identifier_position
+
+    def select(self, df: pd.DataFrame) -> pd.DataFrame:
+        if len(self.positions) == len(df.columns) and self.positions == tuple(range(len(df.columns))):
+            return df
+        return df.iloc[:, list(self.positions)]
+
+    def select_values(self, values: Sequence[Any]) -> Tuple[Any, ...]:
+        return tuple(values[position] for position in self.positions)
+
+    def require_key_columns(self) -> Tuple[int, int]:
+        """
+        :return: (項目編號欄位位置, 財產編號欄位位置)，找不到時拋出 ValueError
+        """
+        if self.id_position is None or self.identifier_position is None:
+            raise ValueError(f"Cannot locate the id and identifier columns in {list(self.selected)}")
+        return self.id_position, self.identifier_position
 
 class DataProcessor:
     @staticmethod
     def filter_columns(df: pd.DataFrame, 
                        include_columns: Optional[List[str]] = None, 
                        exclude_columns: Optional[List[str]] = None) -> pd.DataFrame:
-        if include_columns:
-            return DataProcessor._include_columns(df, include_columns)
-        elif exclude_columns:
-            return DataProcessor._exclude_columns(df, exclude_columns)
-        return df
+        return DataProcessor.compile_plan(df.columns, include_columns, exclude_columns).select(df)
 
     @staticmethod
-    def _include_columns(df: pd.DataFrame, include_columns: List[str]) -> pd.DataFrame:
-        columns_to_include = DataProcessor._get_matching_columns(df, include_columns)
-        return df[columns_to_include]
+    def filter_column_names(columns: Sequence[str],
+                            include_columns: Optional[List[str]] = None,
+                            exclude_columns: Optional[List[str]] = None) -> List[str]:
+        return list(DataProcessor.compile_plan(columns, include_columns, exclude_columns).selected)
 
     @staticmethod
-    def _exclude_columns(df: pd.DataFrame, exclude_columns: List[str]) -> pd.DataFrame:
-        columns_to_exclude = DataProcessor._get_matching_columns(df, exclude_columns)
-        return df.drop(columns=columns_to_exclude, errors='ignore')
+    def compile_plan(columns: Sequence[Any],
+                     include_columns: Optional[List[str]] = None,
+                     exclude_columns: Optional[List[str]] = None,
+                     id_column: Optional[str] = None,
+                     identifier_column: Optional[str] = None) -> ColumnPlan:
+        """
+        將 include/exclude 與 id/identifier 設定套用至標題列，結果依標題列快取。
+
+        :param columns: 標題列
+        :param include_columns: 要包含的欄位名稱（部分符合即可）
+        :param exclude_columns: 要排除的欄位名稱（部分符合即可）
+        :param id_column: 項目編號欄位名稱，未設定時使用第 1 個選取欄位
+        :param identifier_column: 財產編號欄位名稱，未設定時使用第 6 個選取欄位
+        :return: ColumnPlan 物件
+        """
+        return DataProcessor._compile_plan(tuple(columns), tuple(include_columns or ()), tuple(exclude_columns or ()),
+                                           id_column, identifier_column)
 
     @staticmethod
-    def _get_matching_columns(df: pd.DataFrame, patterns: List[str]) -> List[str]:
-        return [col for col in df.columns if any(DataProcessor._column_matches(pattern, col) for pattern in patterns)]
+    @lru_cache(maxsize=256)
+    def _compile_plan(columns: Tuple[Any, ...], include_columns: Tuple[str, ...], exclude_columns: Tuple[str, ...],
+                      id_column: Optional[str], identifier_column: Optional[str]) -> ColumnPlan:
+        normalized = [DataProcessor._normalize_name(column) for column in columns]
+        if include_columns:
+            patterns = [DataProcessor._normalize_name(pattern) for pattern in include_columns]
+            positions = [i for i, name in enumerate(normalized) if any(pattern in name for pattern in patterns)]
+        elif exclude_columns:
+            patterns = [DataProcessor._normalize_name(pattern) for pattern in exclude_columns]
+            positions = [i for i, name in enumerate(normalized) if not any(pattern in name for pattern in patterns)]
+        else:
+            positions = list(range(len(columns)))
+
+        selected_names = [normalized[position] for position in positions]
+        id_position = DataProcessor._find_column(selected_names, id_column, DEFAULT_ID_POSITION)
+        identifier_position = DataProcessor._find_column(selected_names, identifier_column, DEFAULT_IDENTIFIER_POSITION)
+        return ColumnPlan(columns, tuple(positions), id_position, identifier_position)
 
     @staticmethod
-    def _column_matches(pattern: str, column: str) -> bool:
-        return pattern.replace('\n', '').lower() in column.replace('\n', '').lower()
+    def _find_column(selected_names: List[str], pattern: Optional[str], default_position: int) -> Optional[int]:
+        if pattern:
+            pattern = DataProcessor._normalize_name(pattern)
+            return next((position for position, name in enumerate(selected_names) if pattern in name), None)
+        return default_position if default_position < len(selected_names) else None
 
     @staticmethod
-    def format_data(row: pd.Series, 
+    def _normalize_name(name: Any) -> str:
+        return str(name).replace('\n', '').lower()
+
+    @staticmethod
+    def format_data(row: Mapping[Any, Any], 
                     separator: str = ': ', 
                     line_separator: str = '\n',
                     value_processor: Callable[[str], str] = lambda x: x.replace('\n', ' / '),
@@ -42,6 +114,72 @@ class DataProcessor:
         ]
         return line_separator.join(formatted_lines).strip()
 
+    @staticmethod
+    def format_frame(df: pd.DataFrame,
+                     separator: str = ': ',
+                     line_separator: str = '\n',
+                     row_dtypes: bool = False) -> pd.Series:
+        """
+        以欄為單位格式化整個 DataFrame，結果與逐列呼叫 format_data 相同。
+
+        :param df: 欲格式化的 DataFrame
+        :param separator: 欄位名稱與值之間的分隔字串
+        :param line_separator: 欄位之間的分隔字串
+        :param row_dtypes: df 已經過 to_row_dtypes 轉換時設為 True，避免重複轉換
+        :return: 與 df 相同索引的格式化字串 Series
+        """
+        if len(df.columns) == 0:
+            return pd.Series('', index=df.index, dtype=object)
+
+        if not row_dtypes:
+            df = DataProcessor.to_row_dtypes(df)
+        lines = [
+            str(column).replace('\n', ' ').strip() + separator
+            + DataProcessor.stringify_column(df.iloc[:, position]).str.replace('\n', ' / ', regex=False)
+            for position, column in enumerate(df.columns)
+        ]
+        # 以陣列串接，不依索引對齊，重複的索引也不受影響
+        payloads = lines[0].str.cat([line.to_numpy() for line in lines[1:]], sep=line_separator).str.strip()
+        return payloads.astype(object)
+
+    @staticmethod
+    def to_row_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        將欄位轉換為逐列處理（df.apply(axis=1)、iterrows）時每列的型別。每列以所有欄位的共同型別建立：
+        只有數值欄位時整數會轉為浮點數（1 變成 1.0），其餘情況為 object，float32 的值成為 Python float。
+
+        :param df: DataFrame
+        :return: 轉換後的 DataFrame，不需轉換時回傳原物件
+        """
+        dtypes = set(df.dtypes)
+        if len(dtypes) <= 1:
+            return df
+        if all(isinstance(dtype, np.dtype) and dtype.kind in 'iuf' for dtype in dtypes):
+            row_dtype = np.result_type(*dtypes)
+            return df.astype(row_dtype)
+        narrow_floats = [position for position, dtype in enumerate(df.dtypes)
+                         if isinstance(dtype, np.dtype) and dtype.kind == 'f' and dtype.itemsize < 8]
+        if not narrow_floats:
+            return df
+        df = df.copy(deep=False)
+        for position in narrow_floats:
+            df.isetitem(position, df.iloc[:, position].astype(object))
+        return df
+
+    @staticmethod
+    def stringify_column(column: pd.Series) -> pd.Series:
+        """
+        將欄位的每個值轉為字串，結果與對每個值呼叫 str() 相同。
+
+        :param column: 欄位資料
+        :return: 字串 Series
+        """
+        if isinstance(column.dtype, pd.CategoricalDtype) or pd.api.types.is_datetime64_any_dtype(column) \
+                or pd.api.types.is_timedelta64_dtype(column) or isinstance(column.dtype, pd.PeriodDtype):
+            # astype(str) 對這些型別的格式與 str() 不同，例如只含日期的時間戳記
+            return column.map(str).astype(object)
+        return column.astype(str).astype(object)
+
     @staticmethod
     def safe_process(func: Callable, *args, **kwargs):
         try:
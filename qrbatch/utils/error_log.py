@@ -0,0 +1,43 @@
+import csv
+import os
+import threading
+from typing import Any, List, Optional, Tuple
+
+class ErrorLog:
+    FILENAME = "qrbatch_errors.csv"
+    COLUMNS = ("sheet", "row_index", "filename", "error")
+
+    def __init__(self):
+        """
+        收集處理失敗的列，執行結束後寫成 CSV。可由多個執行緒同時新增。
+        """
+        self.errors: List[Tuple[str, Any, str, str]] = []
+        self._lock = threading.Lock()
+
+    def add(self, sheet_name: str, index: Any, error: Any, filename: Optional[str] = None) -> None:
+        """
+        新增一筆失敗記錄。
+
+        :param sheet_name: 工作表名稱
+        :param index: 列索引，整個工作表失敗時為 None
+        :param error: 例外或錯誤訊息
+        :param filename: 預定輸出的檔名（選擇性）
+        """
+        with self._lock:
+            self.errors.append((sheet_name, "" if index is None else index, filename or "", str(error)))
+
+    def write(self, path: str) -> None:
+        """
+        寫入 CSV，使用 UTF-8 BOM 讓 Excel 正確顯示中文。
+
+        :param path: CSV 檔路徑
+        """
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(self.COLUMNS)
+            writer.writerows(self.errors)
+        os.replace(temp_path, path)
+
+    def __len__(self) -> int:
+        return len(self.errors)
@@ -0,0 +1,213 @@
+import re
+from itertools import chain, islice
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Tuple
+
+from pandas.io.parsers import TextParser
+
+from qrbatch.utils.data_processor import ColumnPlan, DataProcessor
+
+# 每次交給 pandas 轉換型別的列數
+CONVERT_BATCH_ROWS = 1024
+# 在轉換第一批之前先收集值型態範例的列數
+SAMPLE_ROWS = 10000
+# openpyxl 以字串表示錯誤儲存格，pd.read_excel 將其視為 NaN
+ERROR_CODES = frozenset(('#NULL!', '#DIV/0!', '#VALUE!', '#REF!', '#NAME?', '#NUM!', '#N/A'))
+# pd.read_excel 預設視為 NaN 的字串（pandas 的 STR_NA_VALUES 位於私有模組，在此保留一份，由測試與 pandas 比對）
+NA_STRINGS = frozenset(('', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+                        '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'))
+INT_TEXT = re.compile(r"[+-]?\d+")
+FLOAT_TEXT = re.compile(r"[+-]?(\d+\.\d*|\.\d+|\d+)([eE][+-]?\d+)?")
+
+class StreamingExcelReader:
+    def __init__(self, excel_file: str):
+        """
+        以唯讀模式開啟 Excel 檔案，逐列讀取工作表而不載入整張工作表。
+
+        :param excel_file: Excel 檔案路徑
+        """
+        import openpyxl  # 只有串流模式需要，延後載入
+
+        self.workbook = openpyxl.load_workbook(excel_file, read_only=True, data_only=True)
+
+    @property
+    def sheet_names(self) -> List[str]:
+        return self.workbook.sheetnames
+
+    def read_sheet(self, sheet_name: str, header: Optional[int] = None,
+                   select_columns: Optional[Callable[[List[Any]], ColumnPlan]] = None
+                   ) -> Tuple[List[Any], Iterator[Tuple[int, Tuple[Any, ...]]]]:
+        """
+        讀取工作表的欄位名稱，並回傳逐列產生資料的產生器。各欄的值會轉換為 pd.read_excel 讀取整張工作表時的型別
+        （例如含空白的整數欄位為 float），每列再轉換為 df.apply(axis=1) 時的共同型別（只有數值欄位時整數轉為浮點數）。
+
+        :param sheet_name: 工作表名稱
+        :param header: 標題列位置（從 0 開始），None 表示沒有標題列
+        :param select_columns: 接收完整欄位清單並回傳欄位選取計畫（選擇性），指定時只回傳選取的欄位
+        :return: (欄位名稱清單, 產生 (列索引, 列資料) 的產生器)
+        """
+        columns, rows = self._open_rows(sheet_name, header)
+        width = len(columns)
+        positions = None
+        if select_columns is not None:
+            plan = select_columns(columns)
+            columns, positions = list(plan.selected), list(plan.positions)
+        if not width:
+            return columns, iter(())
+        return columns, self._iter_data_rows(rows, width, positions)
+
+    def _open_rows(self, sheet_name: str, header: Optional[int]) -> Tuple[List[Any], Iterator[Tuple[Any, ...]]]:
+        rows = self.workbook[sheet_name].iter_rows(values_only=True)
+
+        if header is None:
+            first_row = next(rows, None)
+            if first_row is None:
+                return [], iter(())
+            return list(range(len(first_row))), _prepend(first_row, rows)
+
+        header_row = next(islice(rows, header, None), None)
+        if header_row is None:
+            return [], iter(())
+        return self._make_column_names(header_row), rows
+
+    @staticmethod
+    def _make_column_names(header_row: Tuple[Any, ...]) -> List[Any]:
+        """
+        依照 pandas 的規則產生欄位名稱：空白欄位命名為 "Unnamed: n"，重複欄位加上 ".n" 後綴。
+
+        :param header_row: 標題列資料
+        :return: 欄位名稱清單
+        """
+        columns = []
+        seen = {}
+        for position, value in enumerate(header_row):
+            name = f"Unnamed: {position}" if value is None else value
+            if name in seen:
+                seen[name] += 1
+                name = f"{name}.{seen[name]}"
+            else:
+                seen[name] = 0
+            columns.append(name)
+        return columns
+
+    @staticmethod
+    def _iter_data_rows(rows: Iterator[Tuple[Any, ...]], width: int,
+                        positions: Optional[List[int]]) -> Iterator[Tuple[int, Tuple[Any, ...]]]:
+        """
+        pandas 推斷欄位型別只取決於出現了哪些值型態，每欄的每種值型態保留第一個值作為範例，放在每批資料之前，
+        各批就會得到相同的型別。範例取自前 SAMPLE_ROWS 列；之後的批次若改變了欄位型別，該批的值型態也加入範例，
+        之後的批次沿用新的型別。工作表只讀取一次，記憶體用量不隨列數增加。
+        """
+        samples: List[Dict[Hashable, Any]] = [{} for _ in range(width)]
+        data_rows = _non_blank_rows(rows, width, samples)
+        window = list(islice(data_rows, SAMPLE_ROWS))
+        for _, values in window:
+            _add_samples(samples, values)
+        data_rows = chain(window, data_rows)
+        del window
+
+        dtypes = None
+        while True:
+            chunk = list(islice(data_rows, CONVERT_BATCH_ROWS))
+            if not chunk:
+                return
+            indexes, batch = zip(*chunk)
+            sample_rows = _sample_rows(samples)
+            # 與 pd.read_excel 使用相同的 TextParser 與預設 NaN 字串，空白儲存格轉為 NaN
+            df = TextParser(sample_rows + list(batch), header=None, skip_blank_lines=False).read()
+            if dtypes is not None and not df.dtypes.equals(dtypes):
+                for values in batch:
+                    _add_samples(samples, values)
+            dtypes = df.dtypes
+            df = df.iloc[len(sample_rows):]
+            if positions is not None:
+                df = df.iloc[:, positions]
+            df = DataProcessor.to_row_dtypes(df)
+            yield from zip(indexes, df.itertuples(index=False, name=None))
+
+    def close(self) -> None:
+        self.workbook.close()
+
+    def __enter__(self) -> "StreamingExcelReader":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+def _prepend(first: Tuple[Any, ...], rows: Iterator[Tuple[Any, ...]]) -> Iterator[Tuple[Any, ...]]:
+    yield first
+    yield from rows
+
+def _non_blank_rows(rows: Iterator[Tuple[Any, ...]], width: int,
+                    samples: List[Dict[Hashable, Any]]) -> Iterator[Tuple[int, Tuple[Any, ...]]]:
+    blank_rows = False
+    for index, values in enumerate(rows):
+        if all(value is None for value in values):
+            blank_rows = True
+            continue
+        if blank_rows:
+            # pd.read_excel 保留中間的空白列，只刪除最後的空白列
+            for sample in samples:
+                sample.setdefault("blank", "")
+            blank_rows = False
+        yield index, tuple(_convert_cell(value) for value in _pad(values, width))
+
+def _add_samples(samples: List[Dict[Hashable, Any]], values: Tuple[Any, ...]) -> None:
+    for sample, value in zip(samples, values):
+        sample.setdefault(_value_type(value), value)
+
+def _sample_rows(samples: List[Dict[Hashable, Any]]) -> List[Tuple[Any, ...]]:
+    height = max((len(sample) for sample in samples), default=0)
+    columns = [list(sample.values()) for sample in samples]
+    # 範例較少的欄位重複最後一個範例，重複相同型態的值不影響推斷結果
+    return [tuple(column[min(row, len(column) - 1)] for column in columns) for row in range(height)]
+
+def _pad(values: Tuple[Any, ...], width: int) -> Tuple[Any, ...]:
+    if len(values) < width:
+        return values + (None,) * (width - len(values))
+    return values[:width]
+
+def _convert_cell(value: Any) -> Any:
+    """
+    與 pandas 的 openpyxl 讀取器相同：空白為空字串、錯誤為 NaN、整數值的浮點數轉為 int。
+    """
+    if value is None:
+        return ""
+    if isinstance(value, str) and value in ERROR_CODES:
+        return float('nan')
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+def _value_type(value: Any) -> Hashable:
+    """
+    分類影響 pandas 型別推斷的值型態：整數依範圍（負數、int64、uint64、更大），字串依是否為 NaN 字串或數字。
+    """
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int", _int_range(value)
+    if isinstance(value, float):
+        return "float" if value == value else "nan"
+    if isinstance(value, str):
+        if value in NA_STRINGS:
+            return "blank" if value == "" else "na"
+        if INT_TEXT.fullmatch(value):
+            return "int text", _int_range(int(value))
+        if FLOAT_TEXT.fullmatch(value):
+            return "float text"
+        try:
+            float(value)
+        except ValueError:
+            return "text"
+        # 其他 Python 可以轉換的寫法（空白、底線、inf）交給 pandas 判斷
+        return "numeric text", str(TextParser([[value]], header=None).read()[0].dtype)
+    return type(value)
+
+def _int_range(value: int) -> int:
+    if value < -2 ** 63:
+        return -2
+    if value < 0:
+        return -1
+    if value < 2 ** 63:
+        return 0
+    return 1 if value < 2 ** 64 else 2
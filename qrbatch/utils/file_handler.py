@@ -1,5 +1,6 @@
 import re
 import os
+import pandas as pd
 from typing import Optional, Any, Callable
 from pathlib import Path
 
@@ -17,6 +18,19 @@ class FileHandler:
         """
         return re.sub(invalid_chars, replacement, filename)
 
+    @staticmethod
+    def clean_filenames(filenames: pd.Series, replacement: str = '_',
+                        invalid_chars: str = r'[\\/*?:"<>|\s]') -> pd.Series:
+        """
+        一次清理整個 Series 的檔名，結果與逐一呼叫 clean_filename 相同。
+
+        :param filenames: 原始檔名 Series
+        :param replacement: 用於替換無效字元的字元
+        :param invalid_chars: 定義無效字元的正規表示式
+        :return: 清理後的檔名 Series
+        """
+        return filenames.str.replace(invalid_chars, replacement, regex=True)
+
     @staticmethod
     def ensure_directory(directory: str, mode: int = 0o777) -> None:
         """
@@ -0,0 +1,227 @@
+import importlib
+import os
+import numpy as np
+import pandas as pd
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Union
+from qrbatch.utils.data_processor import ColumnPlan
+from qrbatch.utils.excel_reader import StreamingExcelReader
+
+ColumnSelector = Callable[[List[Any]], ColumnPlan]
+# CSV 以開頭的列數推斷各欄型別
+SAMPLE_ROWS = 10000
+
+class BaseInputSource(ABC):
+    @property
+    @abstractmethod
+    def sheet_names(self) -> List[str]:
+        pass
+
+    @abstractmethod
+    def read_frames(self, sheet_name: str, header: Optional[int],
+                    select_columns: ColumnSelector) -> Iterator[pd.DataFrame]:
+        """
+        逐批讀取工作表，只回傳 select_columns 選取的欄位。
+
+        :param sheet_name: 工作表名稱
+        :param header: 標題列位置（從 0 開始）
+        :param select_columns: 接收完整欄位清單並回傳欄位選取計畫
+        :return: 產生 DataFrame 的產生器，各批的索引接續編號
+        """
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "BaseInputSource":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+class ExcelInputSource(BaseInputSource):
+    def __init__(self, excel_file: str):
+        self.xls = pd.ExcelFile(excel_file)
+
+    @property
+    def sheet_names(self) -> List[str]:
+        return self.xls.sheet_names
+
+    def read_frames(self, sheet_name: str, header: Optional[int],
+                    select_columns: ColumnSelector) -> Iterator[pd.DataFrame]:
+        # openpyxl 無法只解析部分欄位，讀取整張工作表後再選取
+        df = pd.read_excel(self.xls, sheet_name=sheet_name, header=header)
+        yield select_columns(df.columns.tolist()).select(df)
+
+    def close(self) -> None:
+        self.xls.close()
+
+class FileInputSource(BaseInputSource):
+    EXTENSIONS: tuple = ()
+
+    def __init__(self, path: str, chunk_size: int = 10000):
+        """
+        每個檔案視為一個工作表。path 為資料夾時，其中每個檔案（含子資料夾中的分割檔）各為一個工作表，
+        名稱為不含副檔名的相對路徑。
+
+        :param path: 檔案或資料夾路徑
+        :param chunk_size: 每批讀取的列數
+        """
+        self.chunk_size = max(1, chunk_size)
+        self.paths: Dict[str, str] = self._find_files(path, self.EXTENSIONS)
+
+    @staticmethod
+    def _find_files(path: str, extensions: tuple) -> Dict[str, str]:
+        if not os.path.isdir(path):
+            if not os.path.exists(path):
+                raise FileNotFoundError(path)
+            return {_strip_extension(os.path.basename(path)): path}
+        paths = {}
+        for root, _, filenames in sorted(os.walk(path)):
+            for filename in sorted(filenames):
+                if filename.lower().endswith(extensions):
+                    relative = os.path.relpath(os.path.join(root, filename), path)
+                    paths[_strip_extension(relative).replace(os.sep, '/')] = os.path.join(root, filename)
+        return paths
+
+    @property
+    def sheet_names(self) -> List[str]:
+        return list(self.paths)
+
+    @staticmethod
+    def _reindex(frames: Iterator[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        offset = 0
+        for df in frames:
+            df.index = pd.RangeIndex(offset, offset + len(df))
+            offset += len(df)
+            yield df
+
+class CsvInputSource(FileInputSource):
+    EXTENSIONS = (".csv",)
+
+    def __init__(self, path: str, chunk_size: int = 10000, encoding: str = 'utf-8-sig'):
+        super().__init__(path, chunk_size)
+        self.encoding = encoding
+
+    def read_frames(self, sheet_name: str, header: Optional[int],
+                    select_columns: ColumnSelector) -> Iterator[pd.DataFrame]:
+        path = self.paths[sheet_name]
+        # CSV 匯出檔一定有標題列，未設定時使用第一列
+        header = 0 if header is None else header
+        columns = pd.read_csv(path, header=header, nrows=0, encoding=self.encoding).columns.tolist()
+        plan = select_columns(columns)
+        usecols = list(plan.positions)
+        # 每批各自推斷型別會讓同一欄在不同批次為 int 或 float，輸出隨批次大小改變，因此先以開頭的列決定型別。
+        # 文字欄位以字串讀取，保留 "01" 等寫法；之後的批次改變型別時（例如整數欄位出現空白），從該批起使用共同型別
+        dtypes = dict(pd.read_csv(path, header=header, usecols=usecols, nrows=SAMPLE_ROWS,
+                                  encoding=self.encoding).dtypes)
+        text_columns = {column: object for column, dtype in dtypes.items() if dtype == object}
+        with pd.read_csv(path, header=header, usecols=usecols, dtype=text_columns or None, chunksize=self.chunk_size,
+                         encoding=self.encoding) as reader:
+            for df in reader:
+                yield self._widen(df, dtypes)
+
+    @staticmethod
+    def _widen(df: pd.DataFrame, dtypes: Dict[Any, Any]) -> pd.DataFrame:
+        """
+        將批次的欄位轉換為目前的共同型別；批次的型別較寬時更新 dtypes，之後的批次沿用。
+
+        :param df: 一批資料
+        :param dtypes: 欄位名稱 -> 型別，會被更新
+        :return: 轉換後的 DataFrame
+        """
+        for position, (column, dtype) in enumerate(df.dtypes.items()):
+            common = _common_dtype({dtypes.get(column, dtype), dtype})
+            dtypes[column] = common
+            if dtype != common:
+                df.isetitem(position, df.iloc[:, position].astype(common))
+        return df
+
+class ParquetInputSource(FileInputSource):
+    EXTENSIONS = (".parquet", ".pq")
+
+    def __init__(self, path: str, chunk_size: int = 10000):
+        super().__init__(path, chunk_size)
+        self.parquet = _import_pyarrow("pyarrow.parquet", "Parquet")
+
+    def read_frames(self, sheet_name: str, header: Optional[int],
+                    select_columns: ColumnSelector) -> Iterator[pd.DataFrame]:
+        parquet_file = self.parquet.ParquetFile(self.paths[sheet_name])
+        plan = select_columns(parquet_file.schema_arrow.names)
+        batches = parquet_file.iter_batches(batch_size=self.chunk_size, columns=list(plan.selected))
+        yield from self._reindex(batch.to_pandas() for batch in batches)
+
+class FeatherInputSource(FileInputSource):
+    EXTENSIONS = (".feather", ".arrow")
+
+    def __init__(self, path: str, chunk_size: int = 10000):
+        super().__init__(path, chunk_size)
+        self.feather = _import_pyarrow("pyarrow.feather", "Feather")
+        self.ipc = _import_pyarrow("pyarrow.ipc", "Feather")
+        self.pyarrow = _import_pyarrow("pyarrow", "Feather")
+
+    def read_frames(self, sheet_name: str, header: Optional[int],
+                    select_columns: ColumnSelector) -> Iterator[pd.DataFrame]:
+        path = self.paths[sheet_name]
+        try:
+            with self.ipc.open_file(path) as reader:
+                names, table = reader.schema.names, None
+        except self.pyarrow.ArrowInvalid:
+            # Feather V1 不是 Arrow IPC 格式，只能整個讀取；未壓縮的欄位以 memory map 讀取，不會複製
+            table = self.feather.read_table(path, memory_map=True)
+            names = table.schema.names
+        plan = select_columns(names)
+        if table is None:
+            # 以 memory map 讀取，只解碼選取的欄位
+            table = self.feather.read_table(path, columns=list(plan.selected), memory_map=True)
+        else:
+            table = table.select(list(plan.selected))
+        yield from self._reindex(batch.to_pandas() for batch in table.to_batches(max_chunksize=self.chunk_size))
+
+class InputSourceFactory:
+    SOURCES = (CsvInputSource, ParquetInputSource, FeatherInputSource)
+
+    @staticmethod
+    def create_source(path: str, streaming: bool = False,
+                      chunk_size: int = 10000) -> Union[BaseInputSource, StreamingExcelReader]:
+        """
+        依副檔名選擇讀取方式；資料夾依其中的檔案類型選擇，其餘視為 Excel 檔。
+
+        :param path: 輸入檔案或資料夾路徑
+        :param streaming: Excel 檔是否以串流方式逐列讀取
+        :param chunk_size: CSV、Parquet、Feather 每批讀取的列數
+        :return: 輸入來源物件
+        """
+        source_class = InputSourceFactory._source_class(path)
+        if source_class is not None:
+            return source_class(path, chunk_size=chunk_size)
+        return StreamingExcelReader(path) if streaming else ExcelInputSource(path)
+
+    @staticmethod
+    def _source_class(path: str):
+        if not os.path.isdir(path):
+            lower_path = path.lower()
+            return next((source for source in InputSourceFactory.SOURCES if lower_path.endswith(source.EXTENSIONS)), None)
+
+        found = {source for source in InputSourceFactory.SOURCES for _, _, filenames in os.walk(path)
+                 for filename in filenames if filename.lower().endswith(source.EXTENSIONS)}
+        if len(found) != 1:
+            raise ValueError(f"Input folder must contain exactly one supported file type: {path}")
+        return found.pop()
+
+def _common_dtype(dtypes: Set[Any]) -> Any:
+    # 只有數值型別時與 pandas 相同地轉為共同型別（int 與 float 為 float），其餘組合保留原始字串
+    if len(dtypes) == 1:
+        return next(iter(dtypes))
+    if all(dtype.kind in 'iuf' for dtype in dtypes):
+        return np.result_type(*dtypes)
+    return np.dtype(object)
+
+def _strip_extension(filename: str) -> str:
+    return os.path.splitext(filename)[0]
+
+def _import_pyarrow(module: str, format_name: str) -> Any:
+    try:
+        return importlib.import_module(module)
+    except ImportError as e:
+        raise ImportError(f"Reading {format_name} files requires pyarrow (pip install pyarrow)") from e
@@ -0,0 +1,265 @@
+import io
+import os
+import zlib
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple, Union
+from PIL import Image, ImageDraw, ImageFont
+
+MM_PER_INCH = 25.4
+POINTS_PER_INCH = 72
+
+class LabelLayout:
+    PAGE_SIZES = {
+        "a3": (297.0, 420.0),
+        "a4": (210.0, 297.0),
+        "a5": (148.0, 210.0),
+        "letter": (215.9, 279.4),
+        "legal": (215.9, 355.6)
+    }
+
+    DEFAULT_CONFIG = {
+        "page_size": "A4",
+        "columns": 3,
+        "rows": 8,
+        "label_width_mm": None,
+        "label_height_mm": None,
+        "margin_mm": 10,
+        "gap_mm": 2,
+        "padding_mm": 1,
+        "dpi": 300,
+        "caption": True,
+        "font": None,
+        "font_size_pt": 8
+    }
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        標籤頁的版面：紙張大小、標籤格數、標籤大小與解析度。未設定標籤大小時，依紙張扣除邊界與間距後平均分配。
+
+        :param config: Labels 設定參數（選擇性），格式參考 DEFAULT_CONFIG
+        :raises ValueError: 設定值無效或標籤超出紙張範圍
+        """
+        config = {**self.DEFAULT_CONFIG, **(config or {})}
+        self.page_width_mm, self.page_height_mm = self._page_size(config["page_size"])
+        self.columns = int(config["columns"])
+        self.rows = int(config["rows"])
+        self.dpi = int(config["dpi"])
+        if self.columns < 1 or self.rows < 1:
+            raise ValueError("Label columns and rows must be at least 1")
+        if not 72 <= self.dpi <= 1200:
+            raise ValueError(f"Label dpi must be between 72 and 1200, got {self.dpi}")
+
+        margin, gap = float(config["margin_mm"]), float(config["gap_mm"])
+        label_width = config["label_width_mm"] or (self.page_width_mm - 2 * margin - (self.columns - 1) * gap) / self.columns
+        label_height = config["label_height_mm"] or (self.page_height_mm - 2 * margin - (self.rows - 1) * gap) / self.rows
+        if label_width <= 0 or label_height <= 0:
+            raise ValueError("Margins and gaps leave no room for labels")
+        if margin + self.columns * label_width + (self.columns - 1) * gap > self.page_width_mm + 1e-6 \
+                or margin + self.rows * label_height + (self.rows - 1) * gap > self.page_height_mm + 1e-6:
+            raise ValueError(f"{self.columns}x{self.rows} labels of {label_width:g}x{label_height:g}mm "
+                             f"do not fit on a {self.page_width_mm:g}x{self.page_height_mm:g}mm page")
+
+        self.page_size = (self._px(self.page_width_mm), self._px(self.page_height_mm))
+        self.label_size = (self._px(label_width), self._px(label_height))
+        self.margin = self._px(margin)
+        self.gap = self._px(gap)
+        self.padding = self._px(float(config["padding_mm"]))
+        self.caption = bool(config["caption"])
+        self.font = self._load_font(config["font"], round(float(config["font_size_pt"]) * self.dpi / POINTS_PER_INCH))
+
+    @classmethod
+    def _page_size(cls, page_size: Any) -> Tuple[float, float]:
+        if isinstance(page_size, str):
+            if page_size.lower() not in cls.PAGE_SIZES:
+                raise ValueError(f"Unknown page size '{page_size}', expected one of {list(cls.PAGE_SIZES)} "
+                                 f"or [width_mm, height_mm]")
+            return cls.PAGE_SIZES[page_size.lower()]
+        width, height = (float(value) for value in page_size)
+        return width, height
+
+    def _px(self, mm: float) -> int:
+        return round(mm * self.dpi / MM_PER_INCH)
+
+    @staticmethod
+    def _load_font(font: Optional[str], size: int) -> ImageFont.ImageFont:
+        if font:
+            return ImageFont.truetype(font, size)
+        try:
+            return ImageFont.load_default(size)
+        except TypeError:  # Pillow < 10.1 只有固定大小的點陣字型
+            return ImageFont.load_default()
+
+    @property
+    def labels_per_page(self) -> int:
+        return self.columns * self.rows
+
+    def cell_origin(self, position: int) -> Tuple[int, int]:
+        """
+        :param position: 標籤在頁面中的順序（從 0 開始，由左至右、由上至下）
+        :return: 標籤左上角的像素座標
+        """
+        row, column = divmod(position, self.columns)
+        return (self.margin + column * (self.label_size[0] + self.gap),
+                self.margin + row * (self.label_size[1] + self.gap))
+
+class LabelSheetWriter:
+    FORMATS = ("pdf", "png")
+
+    def __init__(self, path: str, output_format: str = "pdf", layout: Optional[LabelLayout] = None):
+        """
+        將 QR Code 依序排入標籤頁並逐頁寫出，記憶體中最多只保留一頁。
+        PDF 寫成單一多頁檔案，PNG 每頁一個檔案（<path>_p0001.png）。
+
+        :param path: 輸出路徑（不含副檔名）
+        :param output_format: 'pdf' 或 'png'
+        :param layout: 標籤版面（選擇性），預設為 A4 3x8
+        """
+        if output_format not in self.FORMATS:
+            raise ValueError(f"Unsupported label format '{output_format}', expected one of {list(self.FORMATS)}")
+        self.path = path
+        self.output_format = output_format
+        self.layout = layout or LabelLayout()
+        self.pages = 0
+        self.labels = 0
+        self._page: Optional[Image.Image] = None
+        self._position = 0
+        self._pdf: Optional[_PdfWriter] = None
+
+    def add(self, qr_image: Union[bytes, Image.Image], caption: str = "") -> None:
+        """
+        加入一個標籤，頁面填滿時寫出。
+
+        :param qr_image: QR Code 影像或 PNG 位元組資料
+        :param caption: 顯示於 QR Code 下方的文字
+        """
+        if isinstance(qr_image, bytes):
+            qr_image = Image.open(io.BytesIO(qr_image))
+        qr_image = self._to_page_mode(qr_image)
+        if self._page is None:
+            self._page = Image.new(qr_image.mode, self.layout.page_size, "white")
+        elif qr_image.mode == "RGB" and self._page.mode == "L":
+            self._page = self._page.convert("RGB")
+
+        self._draw_label(qr_image, caption, self.layout.cell_origin(self._position))
+        self.labels += 1
+        self._position += 1
+        if self._position == self.layout.labels_per_page:
+            self._flush_page()
+
+    def _draw_label(self, qr_image: Image.Image, caption: str, origin: Tuple[int, int]) -> None:
+        layout = self.layout
+        label_width, label_height = layout.label_size
+        draw = ImageDraw.Draw(self._page)
+        caption_height = 0
+        if layout.caption and caption:
+            left, top, right, bottom = layout.font.getbbox("Ag")
+            caption_height = bottom - top + layout.padding
+
+        side = min(label_width, label_height - caption_height) - 2 * layout.padding
+        if side <= 0:
+            raise ValueError("Label is too small for the QR code and caption")
+        # 以最近鄰縮放保持模組邊緣銳利，方便掃描
+        qr_image = qr_image.resize((side, side), Image.Resampling.NEAREST)
+        x = origin[0] + (label_width - side) // 2
+        y = origin[1] + layout.padding
+        self._page.paste(qr_image, (x, y))
+
+        if caption_height:
+            text = self._fit_text(draw, caption, label_width - 2 * layout.padding)
+            draw.text((origin[0] + label_width // 2, y + side + layout.padding), text,
+                      fill="black", font=layout.font, anchor="ma")
+
+    def _fit_text(self, draw: ImageDraw.ImageDraw, text: str, width: int) -> str:
+        if draw.textlength(text, font=self.layout.font) <= width:
+            return text
+        while text and draw.textlength(text + "...", font=self.layout.font) > width:
+            text = text[:-1]
+        return text + "..."
+
+    @staticmethod
+    def _to_page_mode(img: Image.Image) -> Image.Image:
+        if img.mode in ("1", "L"):
+            return img.convert("L")
+        img = img.convert("RGB")
+        colors = img.getcolors(256)
+        if colors is not None and all(r == g == b for _, (r, g, b) in colors):
+            return img.convert("L")
+        return img
+
+    def _flush_page(self) -> None:
+        if self._page is None:
+            return
+        self.pages += 1
+        if self.output_format == "pdf":
+            if self._pdf is None:
+                self._pdf = _PdfWriter(open(f"{self.path}.pdf.tmp", 'wb'))
+            width_pt, height_pt = (size * POINTS_PER_INCH / self.layout.dpi for size in self.layout.page_size)
+            self._pdf.add_page(self._page, width_pt, height_pt)
+        else:
+            self._page.save(f"{self.path}_p{self.pages:04d}.png", format="PNG", dpi=(self.layout.dpi, self.layout.dpi))
+        self._page = None
+        self._position = 0
+
+    def close(self) -> None:
+        """
+        寫出最後一頁；PDF 完成後才取代正式檔名，中斷時不會留下不完整的檔案。
+        """
+        self._flush_page()
+        if self._pdf is not None:
+            self._pdf.close()
+            self._pdf = None
+            os.replace(f"{self.path}.pdf.tmp", f"{self.path}.pdf")
+
+    def __enter__(self) -> "LabelSheetWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        elif self._pdf is not None:
+            self._pdf.stream.close()
+            os.remove(f"{self.path}.pdf.tmp")
+
+class _PdfWriter:
+    # 物件 1 為 Catalog、物件 2 為 Pages，頁面依序寫出後於結尾補上這兩個物件與交叉參照表
+    CATALOG_ID = 1
+    PAGES_ID = 2
+
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+        self.offsets: List[Optional[int]] = [None, None]
+        self.page_ids: List[int] = []
+        self.stream.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def _write_object(self, content: bytes, object_id: Optional[int] = None) -> int:
+        if object_id is None:
+            self.offsets.append(None)
+            object_id = len(self.offsets)
+        self.offsets[object_id - 1] = self.stream.tell()
+        self.stream.write(b"%d 0 obj\n" % object_id + content + b"\nendobj\n")
+        return object_id
+
+    def _write_stream(self, dictionary: str, data: bytes) -> int:
+        return self._write_object(f"<< {dictionary} /Length {len(data)} >>\nstream\n".encode('ascii') + data + b"\nendstream")
+
+    def add_page(self, page: Image.Image, width_pt: float, height_pt: float) -> None:
+        color_space = "/DeviceRGB" if page.mode == "RGB" else "/DeviceGray"
+        image_id = self._write_stream(f"/Type /XObject /Subtype /Image /Width {page.width} /Height {page.height} "
+                                      f"/ColorSpace {color_space} /BitsPerComponent 8 /Filter /FlateDecode",
+                                      zlib.compress(page.tobytes(), 6))
+        content_id = self._write_stream("", f"q {width_pt:.2f} 0 0 {height_pt:.2f} 0 0 cm /Im0 Do Q".encode('ascii'))
+        self.page_ids.append(self._write_object(
+            f"<< /Type /Page /Parent {self.PAGES_ID} 0 R /MediaBox [0 0 {width_pt:.2f} {height_pt:.2f}] "
+            f"/Resources << /XObject << /Im0 {image_id} 0 R >> >> /Contents {content_id} 0 R >>".encode('ascii')))
+
+    def close(self) -> None:
+        kids = " ".join(f"{page_id} 0 R" for page_id in self.page_ids)
+        self._write_object(f"<< /Type /Pages /Kids [{kids}] /Count {len(self.page_ids)} >>".encode('ascii'), self.PAGES_ID)
+        self._write_object(f"<< /Type /Catalog /Pages {self.PAGES_ID} 0 R >>".encode('ascii'), self.CATALOG_ID)
+
+        xref_offset = self.stream.tell()
+        lines = [f"xref\n0 {len(self.offsets) + 1}\n", "0000000000 65535 f \n"]
+        lines += [f"{offset:010d} 00000 n \n" for offset in self.offsets]
+        lines.append(f"trailer\n<< /Size {len(self.offsets) + 1} /Root {self.CATALOG_ID} 0 R >>\n"
+                     f"startxref\n{xref_offset}\n%%EOF\n")
+        self.stream.write("".join(lines).encode('ascii'))
+        self.stream.close()
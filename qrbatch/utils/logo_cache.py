@@ -0,0 +1,74 @@
+import io
+import os
+from typing import Dict, Tuple
+from PIL import Image
+
+class LogoCache:
+    def __init__(self):
+        """
+        快取已解碼及已縮放的標誌圖檔，避免每個 QR Code 重複讀取與縮放。
+        物件可被 pickle，可傳給工作處理程序共用已載入的標誌。
+        """
+        self._sources: Dict[Tuple[str, float], Image.Image] = {}
+        self._resized: Dict[Tuple[str, float, int], Tuple[Image.Image, Image.Image]] = {}
+        self._encoded: Dict[Tuple[str, float, int], bytes] = {}
+
+    def preload(self, logo_path: str) -> None:
+        """
+        預先解碼標誌圖檔。
+
+        :param logo_path: 標誌圖檔路徑
+        """
+        self._get_source(logo_path, os.path.getmtime(logo_path))
+
+    def get(self, logo_path: str, size: int) -> Tuple[Image.Image, Image.Image]:
+        """
+        取得縮放至指定大小的 RGBA 標誌及其透明度遮罩。
+
+        :param logo_path: 標誌圖檔路徑
+        :param size: 標誌邊長（像素）
+        :return: (RGBA 標誌, 透明度遮罩)
+        """
+        mtime = os.path.getmtime(logo_path)
+        key = (logo_path, mtime, size)
+        cached = self._resized.get(key)
+        if cached is None:
+            logo = self._get_source(logo_path, mtime).resize((size, size), Image.LANCZOS)
+            cached = (logo, logo.getchannel("A"))
+            self._resized[key] = cached
+        return cached
+
+    def get_png(self, logo_path: str, size: int) -> bytes:
+        """
+        取得縮放至指定大小的標誌 PNG 位元組資料，用於嵌入 SVG。
+
+        :param logo_path: 標誌圖檔路徑
+        :param size: 標誌邊長（像素）
+        :return: PNG 位元組資料
+        """
+        key = (logo_path, os.path.getmtime(logo_path), size)
+        encoded = self._encoded.get(key)
+        if encoded is None:
+            logo, _ = self.get(logo_path, size)
+            stream = io.BytesIO()
+            logo.save(stream, format='PNG')
+            encoded = self._encoded[key] = stream.getvalue()
+        return encoded
+
+    def _get_source(self, logo_path: str, mtime: float) -> Image.Image:
+        key = (logo_path, mtime)
+        source = self._sources.get(key)
+        if source is None:
+            # 檔案已更新時捨棄舊版本的快取
+            self._sources = {k: v for k, v in self._sources.items() if k[0] != logo_path}
+            self._resized = {k: v for k, v in self._resized.items() if k[0] != logo_path}
+            self._encoded = {k: v for k, v in self._encoded.items() if k[0] != logo_path}
+            with Image.open(logo_path) as img:
+                source = img.convert("RGBA")
+            self._sources[key] = source
+        return source
+
+    def clear(self) -> None:
+        self._sources.clear()
+        self._resized.clear()
+        self._encoded.clear()
@@ -0,0 +1,121 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, List
+
+class ManifestHandler:
+    FILENAME = ".qrbatch_manifest.json"
+
+    def __init__(self, folder: str, entries: Dict[str, str] = None, filename: str = FILENAME):
+        """
+        記錄輸出資料夾中每個 QR Code 檔案對應的內容雜湊值，用於增量產生。
+
+        :param folder: 輸出資料夾路徑
+        :param entries: 上一次執行記錄的 {檔名: 雜湊值}
+        :param filename: manifest 檔名，分片執行時每個分片使用各自的檔案
+        """
+        self.folder = folder
+        self.filename = filename
+        self.previous = entries or {}
+        self.current: Dict[str, str] = {}
+        self.unchanged_count = 0
+
+    @classmethod
+    def load(cls, folder: str, filename: str = FILENAME) -> "ManifestHandler":
+        """
+        讀取資料夾中的 manifest，不存在或無法解析時視為空白。
+
+        :param folder: 輸出資料夾路徑
+        :param filename: manifest 檔名
+        :return: ManifestHandler 物件
+        """
+        path = os.path.join(folder, filename)
+        if not os.path.exists(path):
+            return cls(folder, filename=filename)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return cls(folder, json.load(f), filename)
+        except (OSError, json.JSONDecodeError) as e:
+            logging.warning(f"Ignoring unreadable manifest '{path}': {e}")
+            return cls(folder, filename=filename)
+
+    @staticmethod
+    def digest(payload: str, config_key: str) -> str:
+        """
+        計算 QR Code 內容與產生設定的雜湊值。
+
+        :param payload: QR Code 編碼的資料
+        :param config_key: 產生設定的識別字串
+        :return: SHA-256 十六進位字串
+        """
+        return hashlib.sha256(f"{config_key}\0{payload}".encode('utf-8')).hexdigest()
+
+    def is_unchanged(self, filename: str, digest: str) -> bool:
+        """
+        判斷檔案目前的雜湊值是否與上次相同且檔案仍存在。只比對不記錄：重新產生的列在寫入成功後才以 record 記錄，
+        避免產生失敗的列下次被當成未變更而略過。
+
+        :param filename: QR Code 檔名（不含資料夾）
+        :param digest: 目前的雜湊值
+        :return: 是否可以略過重新產生
+        """
+        return self.previous.get(filename) == digest and os.path.exists(os.path.join(self.folder, filename))
+
+    def keep(self, filename: str, digest: str) -> None:
+        """
+        記錄略過的未變更列。
+
+        :param filename: QR Code 檔名（不含資料夾）
+        :param digest: 目前的雜湊值
+        """
+        self.record(filename, digest)
+        self.unchanged_count += 1
+
+    def record(self, filename: str, digest: str) -> None:
+        """
+        記錄檔案目前的雜湊值，用於寫入成功的列，以及由其他分片產生的列，避免被視為已刪除。
+
+        :param filename: QR Code 檔名（不含資料夾）
+        :param digest: 目前的雜湊值
+        """
+        self.current[filename] = digest
+
+    def fail(self, filename: str) -> None:
+        """
+        產生失敗的列保留上次的雜湊值（新增的列則不記錄），下次執行時會重新產生，舊檔案也不會被當成已刪除的列移除。
+
+        :param filename: QR Code 檔名（不含資料夾）
+        """
+        if filename in self.previous:
+            self.current[filename] = self.previous[filename]
+        else:
+            self.current.pop(filename, None)
+
+    def remove_stale(self) -> List[str]:
+        """
+        刪除上次記錄但本次已不存在的列所對應的檔案。
+
+        :return: 已刪除的檔名清單
+        """
+        removed = []
+        for filename in self.previous.keys() - self.current.keys():
+            try:
+                os.remove(os.path.join(self.folder, filename))
+            except FileNotFoundError:
+                # 可能已由其他分片刪除
+                pass
+            removed.append(filename)
+        return sorted(removed)
+
+    def save(self) -> None:
+        """
+        以原子方式寫入本次的 manifest，之後本次的記錄成為下一次比對的基準，物件可以留在記憶體中重複使用。
+        """
+        path = os.path.join(self.folder, self.filename)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.current, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(temp_path, path)
+        self.previous, self.current = self.current, {}
+        self.unchanged_count = 0
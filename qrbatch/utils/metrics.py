@@ -0,0 +1,179 @@
+import json
+import os
+import threading
+from bisect import bisect_left
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Tuple
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+class _Timer:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics: "Metrics", name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.metrics.observe(self.name, perf_counter() - self.start)
+        return False
+
+class Metrics:
+    # 延遲直方圖的上限（秒），與 Prometheus 預設值相近
+    BUCKETS: Tuple[float, ...] = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, enabled: bool = False):
+        """
+        累計各階段耗時、計數器與延遲直方圖。停用時所有方法直接返回，幾乎沒有額外負擔。
+        可由多個執行緒同時更新。
+
+        :param enabled: 是否啟用統計
+        """
+        self.enabled = enabled
+        self.timers: Dict[str, float] = {}
+        self.histograms: Dict[str, List[int]] = {}
+        self.counters: Dict[str, int] = {}
+        self.labels: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def timer(self, name: str):
+        """
+        回傳量測區塊耗時的 context manager，結果累加至 name 的計時器與直方圖。
+
+        :param name: 階段名稱
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def observe(self, name: str, seconds: float) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self.timers[name] = self.timers.get(name, 0.0) + seconds
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = [0] * (len(self.BUCKETS) + 1)
+            histogram[bisect_left(self.BUCKETS, seconds)] += 1
+
+    def increment(self, name: str, value: int = 1) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def count_label(self, name: str, label: Any) -> None:
+        """
+        依標籤值計數，例如使用到的 QR Code 版本。
+
+        :param name: 計數器名稱
+        :param label: 標籤值
+        """
+        if not self.enabled:
+            return
+        key = str(label)
+        with self._lock:
+            values = self.labels.setdefault(name, {})
+            values[key] = values.get(key, 0) + 1
+
+    def drain(self) -> Optional[Dict[str, Any]]:
+        """
+        取出目前累計的資料並清空，用於將工作處理程序的統計傳回主處理程序。
+
+        :return: 統計資料，停用時回傳 None
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            snapshot = {"timers": self.timers, "histograms": self.histograms,
+                        "counters": self.counters, "labels": self.labels}
+            self.timers, self.histograms, self.counters, self.labels = {}, {}, {}, {}
+        return snapshot
+
+    def merge(self, snapshot: Optional[Dict[str, Any]]) -> None:
+        if not self.enabled or not snapshot:
+            return
+        with self._lock:
+            for name, seconds in snapshot["timers"].items():
+                self.timers[name] = self.timers.get(name, 0.0) + seconds
+            for name, buckets in snapshot["histograms"].items():
+                histogram = self.histograms.setdefault(name, [0] * (len(self.BUCKETS) + 1))
+                for position, count in enumerate(buckets):
+                    histogram[position] += count
+            for name, value in snapshot["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            for name, values in snapshot["labels"].items():
+                target = self.labels.setdefault(name, {})
+                for label, count in values.items():
+                    target[label] = target.get(label, 0) + count
+
+    def to_dict(self) -> Dict[str, Any]:
+        histograms = {}
+        for name, buckets in self.histograms.items():
+            cumulative, total = {}, 0
+            for bound, count in zip([*map(str, self.BUCKETS), "+Inf"], buckets):
+                total += count
+                cumulative[bound] = total
+            histograms[name] = {"buckets": cumulative, "count": total, "sum": round(self.timers.get(name, 0.0), 6)}
+        return {
+            "timers_seconds": {name: round(seconds, 6) for name, seconds in sorted(self.timers.items())},
+            "counters": dict(sorted(self.counters.items())),
+            "labels": {name: dict(sorted(values.items(), key=lambda item: _sort_key(item[0])))
+                       for name, values in sorted(self.labels.items())},
+            "histograms": dict(sorted(histograms.items()))
+        }
+
+    def to_prometheus(self, prefix: str = "qrbatch") -> str:
+        """
+        以 Prometheus textfile 格式輸出統計資料。
+
+        :param prefix: 指標名稱前綴
+        :return: Prometheus 文字格式內容
+        """
+        data = self.to_dict()
+        lines = [f"# TYPE {prefix}_stage_seconds_total counter"]
+        lines += [f'{prefix}_stage_seconds_total{{stage="{name}"}} {seconds}'
+                  for name, seconds in data["timers_seconds"].items()]
+        for name, value in data["counters"].items():
+            lines += [f"# TYPE {prefix}_{name}_total counter", f"{prefix}_{name}_total {value}"]
+        for name, values in data["labels"].items():
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines += [f'{prefix}_{name}_total{{{name}="{label}"}} {count}' for label, count in values.items()]
+        lines.append(f"# TYPE {prefix}_stage_latency_seconds histogram")
+        for name, histogram in data["histograms"].items():
+            lines += [f'{prefix}_stage_latency_seconds_bucket{{stage="{name}",le="{bound}"}} {count}'
+                      for bound, count in histogram["buckets"].items()]
+            lines.append(f'{prefix}_stage_latency_seconds_sum{{stage="{name}"}} {histogram["sum"]}')
+            lines.append(f'{prefix}_stage_latency_seconds_count{{stage="{name}"}} {histogram["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def write_report(self, path: str, extra: Optional[Dict[str, Any]] = None) -> None:
+        """
+        寫入統計報告，副檔名為 .prom 時使用 Prometheus textfile 格式，其餘使用 JSON。
+
+        :param path: 報告檔路徑
+        :param extra: 額外加入 JSON 報告的欄位
+        """
+        if path.endswith(".prom"):
+            content = self.to_prometheus()
+        else:
+            content = json.dumps({**(extra or {}), **self.to_dict()}, ensure_ascii=False, indent=2)
+        # 先寫入暫存檔再取代，避免 textfile collector 讀到寫到一半的檔案
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(temp_path, path)
+
+def _sort_key(label: str) -> Tuple[int, Any]:
+    return (0, int(label)) if label.isdigit() else (1, label)
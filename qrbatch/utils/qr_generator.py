@@ -1,9 +1,12 @@
 import qrcode
-from qrcode.image.styledpil import StyledPilImage
-from qrcode.image.styles.moduledrawers import RoundedModuleDrawer
-from typing import Dict, Any, Optional
+from typing import BinaryIO, Dict, Any, Iterable, List, Optional, Tuple, Union
 from PIL import Image
+from qrbatch.utils.logo_cache import LogoCache
+from qrbatch.utils.metrics import Metrics
+from qrbatch.utils.qr_renderer import QRRenderer
 import io
+import json
+from collections import OrderedDict
 
 class QRCodeGenerator:
     DEFAULT_CONFIG = {
@@ -12,9 +15,144 @@ class QRCodeGenerator:
         "box_size": 10,
         "border": 4,
         "fill_color": "black",
-        "back_color": "white"
+        "back_color": "white",
+        "renderer": "fast",
+        "logo": None,
+        "size_percentage": 0.2,
+        "output_profile": "default",
+        "compress_level": None,
+        "optimize": None,
+        "format": "png",
+        "pin_version": False,
+        "mask_pattern": None
     }
 
+    FORMATS = ("png", "svg")
+
+    OUTPUT_PROFILES = {
+        "default": {},
+        "speed": {"compact": True, "compress_level": 1, "optimize": False},
+        "size": {"compact": True, "compress_level": 9, "optimize": True}
+    }
+
+    logo_cache = LogoCache()
+    # 靜態方法未指定 metrics 時使用的預設值（停用）；執行期間的統計記錄在各實例的 metrics
+    metrics = Metrics()
+    # 資料區段形狀（錯誤修正等級、各區段的模式與長度）-> 可容納的最小版本
+    _fit_cache: Dict[Tuple[int, Tuple[Tuple[int, int], ...]], int] = {}
+    FIT_CACHE_SIZE = 4096
+
+    def __init__(self, cache_size: int = 0, metrics: Optional[Metrics] = None):
+        """
+        :param cache_size: 執行期間快取的 PNG 數量上限，0 表示不使用快取
+        :param metrics: 記錄此產生器各階段耗時與版本分布的統計（選擇性）
+        """
+        self.cache_size = cache_size
+        self.metrics = metrics or Metrics()
+        self._cache: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # 統計含有鎖，無法傳給工作行程；工作行程在 init_worker 建立自己的統計
+        state = self.__dict__.copy()
+        state["metrics"] = None
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.metrics = Metrics()
+
+    def generate_cached_bytes(self, data: str, config: Optional[Dict[str, Any]] = None,
+                              style: Optional[str] = None,
+                              logo: Optional[str] = None) -> Optional[bytes]:
+        """
+        產生 QR Code 的 PNG（或 SVG）位元組資料，相同內容與設定的結果會從 LRU 快取取得。
+        產生失敗時拋出例外，由呼叫端記錄失敗的列。
+
+        :param data: 欲編碼的資料
+        :param config: QR Code 設定參數（選擇性）
+        :param style: QR Code 樣式（使用 'rounded' 來產生圓角模組）
+        :param logo: 欲加入 QR Code 中心的標誌圖檔路徑（選擇性）
+        :return: QR Code 影像的位元組資料
+        """
+        qr_config = {**QRCodeGenerator.DEFAULT_CONFIG, **(config or {})}
+        if not self.cache_size:
+            return self._generate_bytes(data, qr_config, style, logo, metrics=self.metrics)
+
+        qr_bytes = self.lookup_cache(data, config, style, logo)
+        if qr_bytes is not None:
+            return qr_bytes
+        qr_bytes = self._generate_bytes(data, qr_config, style, logo, metrics=self.metrics)
+        self.store_cache(data, qr_bytes, config, style, logo)
+        return qr_bytes
+
+    def lookup_cache(self, data: str, config: Optional[Dict[str, Any]] = None,
+                     style: Optional[str] = None, logo: Optional[str] = None) -> Optional[bytes]:
+        """
+        從快取取得位元組資料並記錄命中或未命中。
+
+        :param data: 欲編碼的資料
+        :param config: QR Code 設定參數（選擇性）
+        :param style: QR Code 樣式（選擇性）
+        :param logo: 標誌圖檔路徑（選擇性）
+        :return: 快取的位元組資料，未快取或停用快取時回傳 None
+        """
+        if not self.cache_size:
+            return None
+        key = (data, self.config_key(config, style, logo))
+        qr_bytes = self._cache.get(key)
+        if qr_bytes is None:
+            self.cache_misses += 1
+            return None
+        self._cache.move_to_end(key)
+        self.cache_hits += 1
+        return qr_bytes
+
+    def store_cache(self, data: str, qr_bytes: bytes, config: Optional[Dict[str, Any]] = None,
+                    style: Optional[str] = None, logo: Optional[str] = None) -> None:
+        """
+        將位元組資料加入快取，超過上限時移除最久未使用的項目。
+
+        :param data: 欲編碼的資料
+        :param qr_bytes: QR Code 的位元組資料
+        :param config: QR Code 設定參數（選擇性）
+        :param style: QR Code 樣式（選擇性）
+        :param logo: 標誌圖檔路徑（選擇性）
+        """
+        if not self.cache_size:
+            return
+        self._cache[(data, self.config_key(config, style, logo))] = qr_bytes
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def save_cached_qr_code(self, data: str, filename: str,
+                            config: Optional[Dict[str, Any]] = None,
+                            style: Optional[str] = None,
+                            logo: Optional[str] = None) -> int:
+        """
+        產生 QR Code 並儲存，相同內容與設定的 PNG 直接寫入快取中的位元組資料。產生或寫入失敗時拋出例外。
+
+        :param data: 欲編碼的資料
+        :param filename: 儲存 QR Code 影像的檔案名稱
+        :param config: QR Code 設定參數（選擇性）
+        :param style: QR Code 樣式（使用 'rounded' 來產生圓角模組）
+        :param logo: 欲加入 QR Code 中心的標誌圖檔路徑（選擇性）
+        :return: 寫入的位元組數
+        """
+        if not self.cache_size:
+            return self.save_qr_code(data, filename, config=config, style=style, logo=logo, metrics=self.metrics)
+
+        qr_bytes = self.generate_cached_bytes(data, config=config, style=style, logo=logo)
+        with open(filename, 'wb') as f:
+            f.write(qr_bytes)
+        return len(qr_bytes)
+
+    def clear_cache(self) -> None:
+        self._cache.clear()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
     @staticmethod
     def generate_qr_code(data: str, filename: Optional[str] = None, 
                          config: Optional[Dict[str, Any]] = None,
@@ -31,36 +169,259 @@ class QRCodeGenerator:
         :return: 產生的 QR Code 影像物件，若儲存至檔案則回傳 None
         """
         try:
+            if filename:
+                QRCodeGenerator.save_qr_code(data, filename, config=config, style=style, logo=logo)
+                return None
             qr_config = {**QRCodeGenerator.DEFAULT_CONFIG, **(config or {})}
-            
+            return QRCodeGenerator._make_image(data, qr_config, style, logo)
+        except Exception as e:
+            print(f"產生 QR Code 時發生錯誤: {e}")
+            return None
+
+    @staticmethod
+    def save_qr_code(data: str, filename: str,
+                     config: Optional[Dict[str, Any]] = None,
+                     style: Optional[str] = None,
+                     logo: Optional[str] = None,
+                     metrics: Optional[Metrics] = None) -> int:
+        """
+        產生 QR Code 並依照輸出設定檔儲存為 PNG，format 為 'svg' 時儲存為 SVG。產生或寫入失敗時拋出例外。
+
+        :param data: 欲編碼的資料
+        :param filename: 儲存 QR Code 影像的檔案名稱
+        :param config: QR Code 設定參數（選擇性）
+        :param style: QR Code 樣式（使用 'rounded' 來產生圓角模組）
+        :param logo: 欲加入 QR Code 中心的標誌圖檔路徑（選擇性）
+        :param metrics: 記錄各階段耗時的統計（選擇性）
+        :return: 寫入的位元組數
+        """
+        qr_config = {**QRCodeGenerator.DEFAULT_CONFIG, **(config or {})}
+        if qr_config["format"] == "svg":
+            svg = QRCodeGenerator._make_svg(data, qr_config, style, logo, metrics)
+            with open(filename, 'wb') as f:
+                f.write(svg)
+            return len(svg)
+        img = QRCodeGenerator._make_image(data, qr_config, style, logo, metrics)
+        with open(filename, 'wb') as f:
+            QRCodeGenerator._save_image(img, f, qr_config, metrics)
+            return f.tell()
+
+    @staticmethod
+    def _encode(data: str, qr_config: Dict[str, Any], metrics: Optional[Metrics] = None) -> qrcode.QRCode:
+        """
+        編碼資料。version 為最小版本，資料放不下時自動使用更大的版本（與 make(fit=True) 相同）；
+        設定 pin_version 時 version 為固定版本，資料放不下時拋出 ValueError，不會產生較大的 QR Code。
+        mask_pattern 未設定時由 qrcode 評估 8 種遮罩選出懲罰分數最低的一種。
+
+        :param data: 欲編碼的資料
+        :param qr_config: QR Code 設定參數
+        :param metrics: 記錄編碼耗時與版本分布的統計（選擇性）
+        :return: 已完成編碼的 qrcode.QRCode 物件
+        """
+        metrics = metrics or QRCodeGenerator.metrics
+        with metrics.timer("encode"):
             qr = qrcode.QRCode(
-                version=qr_config["version"],
                 error_correction=qr_config["error_correction"],
                 box_size=qr_config["box_size"],
-                border=qr_config["border"]
+                border=qr_config["border"],
+                mask_pattern=qr_config["mask_pattern"]
             )
             qr.add_data(data)
-            qr.make(fit=True)
+            version = QRCodeGenerator._fitted_version(qr)
+            if qr_config["pin_version"] and qr_config["version"]:
+                if version > qr_config["version"]:
+                    raise ValueError(f"Data needs QR version {version}, larger than the pinned version {qr_config['version']}")
+                version = qr_config["version"]
+            qr.version = max(version, qr_config["version"] or 1)
+            qr.make(fit=False)
+        metrics.count_label("qr_version", qr.version)
+        return qr
+
+    @staticmethod
+    def _fitted_version(qr: qrcode.QRCode) -> int:
+        """
+        取得可容納資料的最小版本。所需位元數只取決於各區段的模式與長度，相同形狀的資料共用結果，
+        不必每列重新寫出位元串計算。
+
+        :param qr: 已加入資料的 qrcode.QRCode 物件
+        :return: 最小版本
+        """
+        key = (qr.error_correction, tuple((chunk.mode, len(chunk)) for chunk in qr.data_list))
+        version = QRCodeGenerator._fit_cache.get(key)
+        if version is None:
+            version = qr.best_fit()
+            if len(QRCodeGenerator._fit_cache) >= QRCodeGenerator.FIT_CACHE_SIZE:
+                QRCodeGenerator._fit_cache.clear()
+            QRCodeGenerator._fit_cache[key] = version
+        return version
+
+    @staticmethod
+    def fit_version(payloads: Iterable[str], config: Optional[Dict[str, Any]] = None,
+                    metrics: Optional[Metrics] = None) -> Optional[int]:
+        """
+        找出能容納所有資料的最小版本，用於 pin_version 讓整批 QR Code 使用相同版本。
+        超過最大版本 40 的資料不列入計算（計入 pin_version_overflow），該列在產生時失敗，不影響其他列。
+
+        :param payloads: 整批欲編碼的資料
+        :param config: QR Code 設定參數（選擇性），version 視為最小版本
+        :param metrics: 記錄 pin_version_overflow 的統計（選擇性）
+        :return: 版本，沒有可容納的資料時回傳設定的 version
+        """
+        metrics = metrics or QRCodeGenerator.metrics
+        qr_config = {**QRCodeGenerator.DEFAULT_CONFIG, **(config or {})}
+        version = qr_config["version"]
+        for data in payloads:
+            qr = qrcode.QRCode(error_correction=qr_config["error_correction"])
+            qr.add_data(data)
+            try:
+                fitted = QRCodeGenerator._fitted_version(qr)
+            except (ValueError, qrcode.exceptions.DataOverflowError):
+                metrics.increment("pin_version_overflow")
+                continue
+            version = max(version or 1, fitted)
+        return version
 
-            if style == 'rounded':
-                img = qr.make_image(fill_color=qr_config["fill_color"], 
-                                    back_color=qr_config["back_color"],
-                                    image_factory=StyledPilImage, 
-                                    module_drawer=RoundedModuleDrawer())
-            else:
-                img = qr.make_image(fill_color=qr_config["fill_color"], 
-                                    back_color=qr_config["back_color"])
+    @staticmethod
+    def _make_image(data: str, qr_config: Dict[str, Any],
+                    style: Optional[str] = None,
+                    logo: Optional[str] = None,
+                    metrics: Optional[Metrics] = None) -> Image.Image:
+        metrics = metrics or QRCodeGenerator.metrics
+        qr = QRCodeGenerator._encode(data, qr_config, metrics)
+
+        with metrics.timer("render"):
+            img = QRCodeGenerator._render(qr, qr_config, style)
 
+            logo = logo or qr_config["logo"]
             if logo:
-                QRCodeGenerator._add_logo(img, logo)
+                img = QRCodeGenerator._prepare_for_logo(img)
+                QRCodeGenerator._add_logo(img, logo, qr_config["size_percentage"])
+        return img
 
-            if filename:
-                img.save(filename)
-                return None
+    @staticmethod
+    def _make_svg(data: str, qr_config: Dict[str, Any],
+                  style: Optional[str] = None,
+                  logo: Optional[str] = None,
+                  metrics: Optional[Metrics] = None) -> bytes:
+        """
+        產生 SVG 格式的 QR Code，不經過點陣影像與 PNG 壓縮。
+
+        :param data: 欲編碼的資料
+        :param qr_config: QR Code 設定參數
+        :param style: QR Code 樣式，SVG 只支援方形模組
+        :param logo: 欲加入 QR Code 中心的標誌圖檔路徑（選擇性）
+        :param metrics: 記錄各階段耗時的統計（選擇性）
+        :return: SVG 位元組資料
+        """
+        if style == 'rounded':
+            raise ValueError("The rounded style is only available for PNG output")
+        metrics = metrics or QRCodeGenerator.metrics
+        qr = QRCodeGenerator._encode(data, qr_config, metrics)
+
+        with metrics.timer("render"):
+            logo = logo or qr_config["logo"]
+            embedded_logo = None
+            if logo:
+                # 標誌以接近 PNG 輸出時的像素大小嵌入
+                logo_size = int((qr.modules_count + qr.border * 2) * qr.box_size * qr_config["size_percentage"])
+                embedded_logo = (QRCodeGenerator.logo_cache.get_png(logo, logo_size), qr_config["size_percentage"])
+            return QRRenderer.render_svg(qr.get_matrix(), qr.box_size, qr_config["fill_color"],
+                                         qr_config["back_color"], embedded_logo)
+
+    @staticmethod
+    def _prepare_for_logo(img: Image.Image) -> Image.Image:
+        if img.mode in ("L", "P"):
+            return img.convert("RGB")
+        return img
+
+    @staticmethod
+    def _save_image(img: Image.Image, stream: BinaryIO, qr_config: Dict[str, Any],
+                    metrics: Optional[Metrics] = None) -> None:
+        """
+        依照輸出設定檔將影像以 PNG 格式寫入。
+
+        :param img: QR Code 影像
+        :param stream: 可寫入的二進位串流
+        :param qr_config: QR Code 設定參數
+        :param metrics: 記錄壓縮耗時的統計（選擇性）
+        """
+        profile = QRCodeGenerator.OUTPUT_PROFILES[qr_config["output_profile"]]
+        save_options = {}
+        for option in ("compress_level", "optimize"):
+            value = qr_config[option] if qr_config[option] is not None else profile.get(option)
+            if value is not None:
+                save_options[option] = value
+
+        with (metrics or QRCodeGenerator.metrics).timer("save"):
+            if profile.get("compact"):
+                img = QRCodeGenerator._compact_image(img)
+            img.save(stream, format='PNG', **save_options)
+
+    @staticmethod
+    def _compact_image(img: Image.Image) -> Image.Image:
+        """
+        將只有兩種顏色的影像轉換為 "1" 或 "P" 模式，以 1 位元深度儲存。
+
+        :param img: QR Code 影像
+        :return: 轉換後的影像，超過兩種顏色時回傳原影像
+        """
+        if img.mode in ("1", "P"):
             return img
-        except Exception as e:
-            print(f"產生 QR Code 時發生錯誤: {e}")
-            return None
+        colors = img.getcolors(2)
+        if colors is None:
+            return img
+        if img.mode == "L" and {color for _, color in colors} <= {0, 255}:
+            return img.convert("1", dither=Image.Dither.NONE)
+        return img.convert("P", palette=Image.Palette.ADAPTIVE, colors=2)
+
+    @staticmethod
+    def _render(qr: qrcode.QRCode, qr_config: Dict[str, Any], style: Optional[str] = None):
+        """
+        將編碼完成的 QR Code 繪製成影像。renderer 為 'fast' 時直接由模組矩陣產生影像，
+        不支援的設定則改用 qrcode 內建的繪製方式。
+
+        :param qr: 已完成編碼的 qrcode.QRCode 物件
+        :param qr_config: QR Code 設定參數
+        :param style: QR Code 樣式（使用 'rounded' 來產生圓角模組）
+        :return: QR Code 影像
+        """
+        if qr_config["renderer"] == "fast":
+            img = QRRenderer.render(qr, qr_config["fill_color"], qr_config["back_color"], style)
+            if img is not None:
+                return img
+
+        if style == 'rounded':
+            # 只有快速繪製不支援的設定才需要 qrcode 的樣式模組，延後載入
+            from qrcode.image.styledpil import StyledPilImage
+            from qrcode.image.styles.colormasks import SolidFillColorMask
+            from qrcode.image.styles.moduledrawers import RoundedModuleDrawer
+
+            # StyledPilImage 不使用 fill_color/back_color，顏色由 color_mask 決定
+            fill_rgb = QRRenderer.opaque_rgb(qr_config["fill_color"])
+            back_rgb = QRRenderer.opaque_rgb(qr_config["back_color"])
+            color_mask = {"color_mask": SolidFillColorMask(back_rgb, fill_rgb)} if fill_rgb and back_rgb else {}
+            return qr.make_image(fill_color=qr_config["fill_color"], 
+                                 back_color=qr_config["back_color"],
+                                 image_factory=StyledPilImage, 
+                                 module_drawer=RoundedModuleDrawer(),
+                                 **color_mask)
+        return qr.make_image(fill_color=qr_config["fill_color"], 
+                             back_color=qr_config["back_color"])
+
+    @staticmethod
+    def config_key(config: Optional[Dict[str, Any]] = None,
+                   style: Optional[str] = None,
+                   logo: Optional[str] = None) -> str:
+        """
+        產生代表 QR Code 產生設定的穩定字串，設定相同時輸出的影像也相同。
+
+        :param config: QR Code 設定參數（選擇性）
+        :param style: QR Code 樣式（選擇性）
+        :param logo: 標誌圖檔路徑（選擇性）
+        :return: 設定的識別字串
+        """
+        qr_config = {**QRCodeGenerator.DEFAULT_CONFIG, **(config or {})}
+        return json.dumps({"config": qr_config, "style": style, "logo": logo}, sort_keys=True, ensure_ascii=False)
 
     @staticmethod
     def _add_logo(qr_img: Image.Image, logo_path: str, size_percentage: float = 0.2):
@@ -72,15 +433,68 @@ class QRCodeGenerator:
         :param size_percentage: 標誌大小佔 QR Code 的比例
         """
         try:
-            logo = Image.open(logo_path)
             qr_width, qr_height = qr_img.size
             logo_size = int(min(qr_width, qr_height) * size_percentage)
-            logo = logo.resize((logo_size, logo_size), Image.LANCZOS)
+            logo, mask = QRCodeGenerator.logo_cache.get(logo_path, logo_size)
             pos = ((qr_width - logo_size) // 2, (qr_height - logo_size) // 2)
-            qr_img.paste(logo, pos, logo)
+            qr_img.paste(logo, pos, mask)
         except Exception as e:
             print(f"加入標誌時發生錯誤: {e}")
 
+    @staticmethod
+    def add_logo_batch(qr_images: Iterable[Image.Image], logo_path: str,
+                       size_percentage: float = 0.2) -> List[Image.Image]:
+        """
+        在多個 QR Code 中心加入同一個標誌，標誌只解碼一次，每種尺寸只縮放一次。
+
+        :param qr_images: QR Code 影像
+        :param logo_path: 標誌圖檔路徑
+        :param size_percentage: 標誌大小佔 QR Code 的比例
+        :return: 加入標誌後的 QR Code 影像
+        """
+        results = []
+        for qr_img in qr_images:
+            qr_img = QRCodeGenerator._prepare_for_logo(qr_img)
+            QRCodeGenerator._add_logo(qr_img, logo_path, size_percentage)
+            results.append(qr_img)
+        return results
+
+    @staticmethod
+    def render_qr_code(data: str, config: Optional[Dict[str, Any]] = None,
+                       style: Optional[str] = None,
+                       logo: Optional[str] = None,
+                       metrics: Optional[Metrics] = None) -> Optional[Union[Image.Image, bytes]]:
+        """
+        完成編碼與繪製，但不進行 PNG 壓縮，讓呼叫端可以在其他執行緒呼叫 encode_image。產生失敗時拋出例外。
+
+        :param data: 欲編碼的資料
+        :param config: QR Code 設定參數（選擇性）
+        :param style: QR Code 樣式（使用 'rounded' 來產生圓角模組）
+        :param logo: 欲加入 QR Code 中心的標誌圖檔路徑（選擇性）
+        :param metrics: 記錄各階段耗時的統計（選擇性）
+        :return: QR Code 影像；format 為 'svg' 時直接回傳 SVG 位元組資料
+        """
+        qr_config = {**QRCodeGenerator.DEFAULT_CONFIG, **(config or {})}
+        if qr_config["format"] == "svg":
+            return QRCodeGenerator._make_svg(data, qr_config, style, logo, metrics)
+        return QRCodeGenerator._make_image(data, qr_config, style, logo, metrics)
+
+    @staticmethod
+    def encode_image(img: Image.Image, config: Optional[Dict[str, Any]] = None,
+                     metrics: Optional[Metrics] = None) -> Optional[bytes]:
+        """
+        依照輸出設定檔將影像壓縮為 PNG。PNG 壓縮期間會釋放 GIL，可在其他執行緒執行。失敗時拋出例外。
+
+        :param img: render_qr_code 產生的影像
+        :param config: QR Code 設定參數（選擇性）
+        :param metrics: 記錄壓縮耗時的統計（選擇性）
+        :return: PNG 位元組資料
+        """
+        qr_config = {**QRCodeGenerator.DEFAULT_CONFIG, **(config or {})}
+        byte_arr = io.BytesIO()
+        QRCodeGenerator._save_image(img, byte_arr, qr_config, metrics)
+        return byte_arr.getvalue()
+
     @staticmethod
     def generate_qr_code_bytes(data: str, config: Optional[Dict[str, Any]] = None, 
                                style: Optional[str] = None, 
@@ -92,14 +506,26 @@ class QRCodeGenerator:
         :param config: QR Code 設定參數（選擇性）
         :param style: QR Code 樣式（使用 'rounded' 來產生圓角模組）
         :param logo: 欲加入 QR Code 中心的標誌圖檔路徑（選擇性）
-        :return: QR Code 影像的位元組資料，若產生失敗則回傳 None
-        """
-        img = QRCodeGenerator.generate_qr_code(data, filename=None, config=config, style=style, logo=logo)
-        if img:
-            byte_arr = io.BytesIO()
-            img.save(byte_arr, format='PNG')
-            return byte_arr.getvalue()
-        return None
+        :return: QR Code 的 PNG 位元組資料（format 為 'svg' 時為 SVG），若產生失敗則回傳 None
+        """
+        try:
+            qr_config = {**QRCodeGenerator.DEFAULT_CONFIG, **(config or {})}
+            return QRCodeGenerator._generate_bytes(data, qr_config, style, logo)
+        except Exception as e:
+            print(f"產生 QR Code 時發生錯誤: {e}")
+            return None
+
+    @staticmethod
+    def _generate_bytes(data: str, qr_config: Dict[str, Any],
+                        style: Optional[str] = None,
+                        logo: Optional[str] = None,
+                        metrics: Optional[Metrics] = None) -> bytes:
+        if qr_config["format"] == "svg":
+            return QRCodeGenerator._make_svg(data, qr_config, style, logo, metrics)
+        img = QRCodeGenerator._make_image(data, qr_config, style, logo, metrics)
+        byte_arr = io.BytesIO()
+        QRCodeGenerator._save_image(img, byte_arr, qr_config, metrics)
+        return byte_arr.getvalue()
 
 if __name__ == "__main__":
     
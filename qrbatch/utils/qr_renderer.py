@@ -0,0 +1,251 @@
+import base64
+import numpy as np
+from functools import lru_cache
+from html import escape
+from typing import Any, Optional, Sequence, Tuple
+from PIL import Image, ImageColor, ImageDraw
+
+# 與 qrcode 的 RoundedModuleDrawer 相同：先以 4 倍大小繪製圓角，再縮小以達到反鋸齒效果
+ANTIALIASING_FACTOR = 4
+
+class QRRenderer:
+    @staticmethod
+    def render(qr: Any, fill_color: Any = "black", back_color: Any = "white",
+               style: Optional[str] = None) -> Optional[Image.Image]:
+        """
+        直接由模組矩陣產生 QR Code 影像，不經過 qrcode 逐一繪製模組。
+
+        :param qr: 已完成編碼的 qrcode.QRCode 物件
+        :param fill_color: 模組顏色
+        :param back_color: 背景顏色
+        :param style: QR Code 樣式（使用 'rounded' 來產生圓角模組）
+        :return: QR Code 影像，不支援的設定（例如透明背景）回傳 None
+        """
+        fill_color = QRRenderer._normalize_color(fill_color)
+        back_color = QRRenderer._normalize_color(back_color)
+
+        if style == 'rounded':
+            if qr.box_size < 2:
+                return None
+            if fill_color == "black" and back_color == "white":
+                return QRRenderer.render_rounded(qr.modules, qr.box_size, qr.border)
+            fill_rgb, back_rgb = QRRenderer.opaque_rgb(fill_color), QRRenderer.opaque_rgb(back_color)
+            # 黑色背景與 qrcode 繪製時使用的顏色相同，SolidFillColorMask 的結果特殊，交給 qrcode 處理
+            if fill_rgb is None or back_rgb is None or back_rgb == (0, 0, 0):
+                return None
+            return QRRenderer.render_rounded(qr.modules, qr.box_size, qr.border, fill_rgb, back_rgb)
+        if back_color == "transparent":
+            return None
+        return QRRenderer.render_square(qr.get_matrix(), qr.box_size, fill_color, back_color)
+
+    @staticmethod
+    def render_square(matrix: Sequence[Sequence[bool]], box_size: int,
+                      fill_color: Any = "black", back_color: Any = "white") -> Image.Image:
+        """
+        將含邊界的模組矩陣放大為方形模組影像。黑白配色產生 "1" 模式影像，其餘產生兩色 "P" 模式影像。
+
+        :param matrix: qr.get_matrix() 回傳的模組矩陣（含邊界）
+        :param box_size: 每個模組的像素大小
+        :param fill_color: 模組顏色
+        :param back_color: 背景顏色
+        :return: QR Code 影像
+        """
+        modules = np.asarray(matrix, dtype=bool)
+        pixels = np.repeat(np.repeat(modules, box_size, axis=0), box_size, axis=1)
+        size = (pixels.shape[1], pixels.shape[0])
+
+        if fill_color == "black" and back_color == "white":
+            data = np.packbits(~pixels, axis=1)
+            return Image.frombuffer("1", size, data.tobytes(), "raw", "1", 0, 1)
+
+        img = Image.frombuffer("P", size, pixels.astype(np.uint8).tobytes(), "raw", "P", 0, 1)
+        img.putpalette(QRRenderer._to_rgb(back_color) + QRRenderer._to_rgb(fill_color))
+        return img
+
+    @staticmethod
+    def render_svg(matrix: Sequence[Sequence[bool]], box_size: int, fill_color: Any = "black",
+                   back_color: Any = "white", logo: Optional[Any] = None) -> bytes:
+        """
+        直接由模組矩陣產生 SVG。同一列相鄰的模組合併為一段寬度 1 的線段，所有模組只使用一個 path，
+        同一列的線段之間以相對座標移動，縮短 path 資料。未壓縮的 SVG 仍比 1 位元 PNG 大（約 2.5 倍），
+        但壓縮後（ZIP 封存檔、gzip 傳輸）比 PNG 小。
+
+        :param matrix: qr.get_matrix() 回傳的模組矩陣（含邊界）
+        :param box_size: 每個模組的像素大小，決定 SVG 的預設寬高
+        :param fill_color: 模組顏色
+        :param back_color: 背景顏色，'transparent' 時不繪製背景
+        :param logo: (PNG 位元組資料, 邊長佔 QR Code 的比例)，放在中心（選擇性）
+        :return: SVG 文件的位元組資料
+        """
+        modules = np.asarray(matrix, dtype=np.int8)
+        size = modules.shape[0]
+        # 每列前後補 0 後取差分，1 為連續模組的起點、-1 為終點
+        edges = np.diff(np.pad(modules, ((0, 0), (1, 1))), axis=1)
+        rows, starts = np.nonzero(edges == 1)
+        ends = np.nonzero(edges == -1)[1]
+
+        segments = []
+        current_row, current_x = -1, 0
+        for y, x, end in zip(rows.tolist(), starts.tolist(), ends.tolist()):
+            if y == current_row:
+                segments.append(f"m{x - current_x} 0h{end - x}")
+            else:
+                segments.append(f"M{x} {y}.5h{end - x}")
+                current_row = y
+            current_x = end
+
+        pixels = size * box_size
+        parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{pixels}" height="{pixels}" '
+                 f'viewBox="0 0 {size} {size}" shape-rendering="crispEdges">']
+        back_color = QRRenderer._normalize_color(back_color)
+        if back_color != "transparent":
+            parts.append(f'<rect width="{size}" height="{size}" fill="{QRRenderer._to_css(back_color)}"/>')
+        parts.append(f'<path stroke="{QRRenderer._to_css(fill_color)}" d="{"".join(segments)}"/>')
+        if logo is not None:
+            logo_png, size_percentage = logo
+            logo_size = size * size_percentage
+            offset = (size - logo_size) / 2
+            parts.append(f'<image x="{offset:g}" y="{offset:g}" width="{logo_size:g}" height="{logo_size:g}" '
+                         f'href="data:image/png;base64,{base64.b64encode(logo_png).decode("ascii")}"/>')
+        parts.append('</svg>')
+        return "".join(parts).encode('utf-8')
+
+    @staticmethod
+    def render_rounded(modules: Sequence[Sequence[bool]], box_size: int, border: int,
+                       fill_color: Optional[Tuple[int, int, int]] = None,
+                       back_color: Optional[Tuple[int, int, int]] = None) -> Image.Image:
+        """
+        以預先計算的圓角遮罩產生圓角模組影像，結果與 StyledPilImage 搭配 RoundedModuleDrawer 及
+        SolidFillColorMask 相同。未指定顏色時為黑底白字的 "L" 模式影像（像素與 StyledPilImage 的 RGB 影像相同）。
+
+        :param modules: qr.modules 模組矩陣（不含邊界）
+        :param box_size: 每個模組的像素大小
+        :param border: 邊界寬度（模組數）
+        :param fill_color: 模組的 RGB 顏色（選擇性）
+        :param back_color: 背景的 RGB 顏色（選擇性）
+        :return: "L" 或 "RGB" 模式的 QR Code 影像
+        """
+        active = np.asarray(modules, dtype=bool)
+        width = active.shape[0]
+        corner_width = box_size // 2
+        if fill_color is None and back_color is None:
+            mode, front, back = "L", np.array([0], dtype=np.uint8), np.array([255], dtype=np.uint8)
+            nw_round = QRRenderer._rounded_corner(corner_width)[:, :, None]
+        else:
+            fill_color, back_color = tuple(fill_color or (0, 0, 0)), tuple(back_color or (255, 255, 255))
+            mode, front, back = "RGB", np.array(fill_color, dtype=np.uint8), np.array(back_color, dtype=np.uint8)
+            nw_round = QRRenderer._colored_corner(corner_width, fill_color, back_color)
+
+        padded = np.pad(active, 1)
+        north, south = ~padded[:-2, 1:-1], ~padded[2:, 1:-1]
+        west, east = ~padded[1:-1, :-2], ~padded[1:-1, 2:]
+        eyes = QRRenderer._eye_mask(width)
+        drawn = active & ~eyes
+
+        near, far = slice(0, corner_width), slice(corner_width, corner_width * 2)
+        corners = (
+            (near, near, north & west, nw_round),
+            (near, far, north & east, nw_round[:, ::-1]),
+            (far, far, south & east, nw_round[::-1, ::-1]),
+            (far, near, south & west, nw_round[::-1, :]),
+        )
+
+        channels = len(back)
+        canvas = np.empty((width, box_size, width, box_size, channels), dtype=np.uint8)
+        canvas[...] = back
+        for rows, cols, is_round, round_tile in corners:
+            tile = np.where(is_round[:, :, None, None, None], round_tile, front)
+            tile = np.where(drawn[:, :, None, None, None], tile, back)
+            canvas[:, rows, :, cols] = tile.transpose(0, 2, 1, 3, 4)
+        # 定位圖形使用 qrcode 預設的方形模組
+        canvas.transpose(0, 2, 1, 3, 4)[active & eyes] = front
+
+        margin = border * box_size
+        side = width * box_size + 2 * margin
+        pixels = np.empty((side, side, channels), dtype=np.uint8)
+        pixels[...] = back
+        pixels[margin:side - margin, margin:side - margin] = canvas.reshape(width * box_size, width * box_size, channels)
+        return Image.frombuffer(mode, (side, side), pixels.tobytes(), "raw", mode, 0, 1)
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _rounded_corner(corner_width: int) -> np.ndarray:
+        fake_width = corner_width * ANTIALIASING_FACTOR
+        radius = fake_width
+        base = Image.new("L", (fake_width, fake_width), 255)
+        base_draw = ImageDraw.Draw(base)
+        base_draw.ellipse((0, 0, radius * 2, radius * 2), fill=0)
+        base_draw.rectangle((radius, 0, fake_width, fake_width), fill=0)
+        base_draw.rectangle((0, radius, fake_width, fake_width), fill=0)
+        corner = np.asarray(base.resize((corner_width, corner_width), Image.Resampling.LANCZOS))
+        corner.flags.writeable = False
+        return corner
+
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _colored_corner(corner_width: int, fill_color: Tuple[int, int, int],
+                        back_color: Tuple[int, int, int]) -> np.ndarray:
+        # 與 StyledPilImage 相同：先以黑色繪製於背景色上，再依 SolidFillColorMask 的內插方式換成模組顏色
+        fake_width = corner_width * ANTIALIASING_FACTOR
+        radius = fake_width
+        base = Image.new("RGB", (fake_width, fake_width), back_color)
+        base_draw = ImageDraw.Draw(base)
+        base_draw.ellipse((0, 0, radius * 2, radius * 2), fill=(0, 0, 0))
+        base_draw.rectangle((radius, 0, fake_width, fake_width), fill=(0, 0, 0))
+        base_draw.rectangle((0, radius, fake_width, fake_width), fill=(0, 0, 0))
+        painted = base.resize((corner_width, corner_width), Image.Resampling.LANCZOS)
+
+        corner = np.empty((corner_width, corner_width, 3), dtype=np.uint8)
+        for y in range(corner_width):
+            for x in range(corner_width):
+                pixel = painted.getpixel((x, y))
+                normed = [(value - back) / -back for back, value in zip(back_color, pixel) if back != 0]
+                if not normed:
+                    corner[y, x] = back_color
+                    continue
+                norm = sum(normed) / len(normed)
+                # LANCZOS 的過衝可能超出範圍，與 putpixel 相同地限制在 0–255
+                corner[y, x] = [min(max(int(fill * norm + back * (1 - norm)), 0), 255)
+                                for fill, back in zip(fill_color, back_color)]
+        corner.flags.writeable = False
+        return corner
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _eye_mask(width: int) -> np.ndarray:
+        eyes = np.zeros((width, width), dtype=bool)
+        eyes[:7, :7] = True
+        eyes[:7, width - 7:] = True
+        eyes[width - 7:, :7] = True
+        eyes.flags.writeable = False
+        return eyes
+
+    @staticmethod
+    def _normalize_color(color: Any) -> Any:
+        return color.lower() if isinstance(color, str) else color
+
+    @staticmethod
+    def _to_css(color: Any) -> str:
+        if isinstance(color, str):
+            return escape(color, quote=True)
+        return "#{:02x}{:02x}{:02x}".format(*color[:3])
+
+    @staticmethod
+    def opaque_rgb(color: Any) -> Optional[Tuple[int, int, int]]:
+        """
+        :param color: 顏色名稱、#RGB 字串或 RGB(A) tuple
+        :return: RGB tuple，透明或無法解析的顏色回傳 None
+        """
+        try:
+            rgb = ImageColor.getrgb(color) if isinstance(color, str) else tuple(int(value) for value in color)
+        except (ValueError, TypeError):
+            return None
+        if len(rgb) not in (3, 4) or (len(rgb) == 4 and rgb[3] != 255):
+            return None
+        return rgb[:3]
+
+    @staticmethod
+    def _to_rgb(color: Any) -> list:
+        if isinstance(color, str):
+            return list(ImageColor.getrgb(color)[:3])
+        return list(color[:3])
@@ -0,0 +1,267 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+# 每列除了資料長度之外的固定成本（開檔、寫檔、遮罩評估），以位元組估計
+ROW_OVERHEAD_BYTES = 64
+KEY_DIGEST_MODULUS = 1 << 128
+
+class ShardSpec:
+    PATTERN = re.compile(r"^\s*(\d+)\s*/\s*(\d+)\s*$")
+
+    def __init__(self, index: int, count: int):
+        """
+        分片設定：本次執行處理 count 個分片中的第 index 個（從 1 開始）。
+
+        :param index: 分片編號，1 到 count
+        :param count: 分片總數
+        :raises ValueError: 編號超出範圍
+        """
+        if count < 1 or not 1 <= index <= count:
+            raise ValueError(f"Invalid shard {index}/{count}, expected i/N with 1 <= i <= N")
+        self.index = index
+        self.count = count
+
+    @classmethod
+    def parse(cls, text: str) -> "ShardSpec":
+        """
+        :param text: 'i/N' 格式的字串，例如 '2/4'
+        :return: ShardSpec 物件
+        :raises ValueError: 格式錯誤
+        """
+        match = cls.PATTERN.match(text)
+        if not match:
+            raise ValueError(f"Invalid shard '{text}', expected i/N such as 1/4")
+        return cls(int(match.group(1)), int(match.group(2)))
+
+    @property
+    def label(self) -> str:
+        return f"{self.index}of{self.count}"
+
+    @staticmethod
+    def row_hash(sheet_name: str, key: str) -> int:
+        """
+        以工作表名稱與鍵值（輸出檔名，由項目編號與財產編號組成）計算穩定的雜湊值，不受 PYTHONHASHSEED 影響。
+
+        :param sheet_name: 工作表名稱
+        :param key: 列的鍵值
+        :return: 128 位元整數
+        """
+        return int.from_bytes(hashlib.blake2b(f"{sheet_name}\0{key}".encode('utf-8'), digest_size=16).digest(), 'big')
+
+class SheetPartition:
+    def __init__(self, spec: ShardSpec, sheet_name: str):
+        """
+        依序分配一個工作表的列。每列由輸出檔名的雜湊值決定兩個候選分片，分給目前估計負載較低的一個
+        （power of two choices），所以各分片的資料量相近。每個分片都讀取完整的輸入並以相同順序計算，
+        不需要彼此溝通就能得到相同的分配結果。檔名相同的列分給同一個分片，與不分片時一樣由最後一列覆寫檔案。
+        涵蓋範圍以 (列索引, 檔名) 記錄。
+
+        :param spec: 分片設定
+        :param sheet_name: 工作表名稱
+        """
+        self.spec = spec
+        self.sheet_name = sheet_name
+        self.loads = [0] * spec.count
+        self.rows = 0
+        self.key_sum = 0
+        self.owners: Dict[str, int] = {}
+        self.assigned: List[Tuple[str, str]] = []
+        self.failed: Set[Tuple[str, str]] = set()
+
+    @staticmethod
+    def row_key(index: Any, key: str) -> str:
+        return f"{index}\0{key}"
+
+    def assign(self, index: Any, key: str, payload: str) -> bool:
+        """
+        分配一列並更新負載。
+
+        :param index: 列索引
+        :param key: 列的鍵值（輸出檔名）
+        :param payload: QR Code 編碼的資料，以 UTF-8 長度估計產生成本
+        :return: 是否屬於本分片
+        """
+        self.rows += 1
+        self.key_sum = (self.key_sum + ShardSpec.row_hash(self.sheet_name, self.row_key(index, key))) % KEY_DIGEST_MODULUS
+
+        owner = self.owners.get(key)
+        if owner is None:
+            row_hash = ShardSpec.row_hash(self.sheet_name, key)
+            count = self.spec.count
+            first = row_hash % count
+            second = (first + 1 + (row_hash >> 64) % (count - 1)) % count if count > 1 else first
+            owner = self.owners[key] = first if self.loads[first] <= self.loads[second] else second
+        self.loads[owner] += len(payload.encode('utf-8')) + ROW_OVERHEAD_BYTES
+
+        if owner != self.spec.index - 1:
+            return False
+        self.assigned.append((str(index), key))
+        return True
+
+    def fail(self, index: Any, key: str) -> None:
+        """
+        標記本分片中產生失敗的列，合併時視為未涵蓋。
+
+        :param index: 列索引
+        :param key: 列的鍵值（輸出檔名）
+        """
+        self.failed.add((str(index), key))
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "keys": f"{self.key_sum:032x}",
+            "estimated_bytes": self.loads[self.spec.index - 1],
+            "total_estimated_bytes": sum(self.loads),
+            "covered": [list(row) for row in self.assigned if row not in self.failed],
+            "failed": [list(row) for row in sorted(self.failed)]
+        }
+
+    @staticmethod
+    def files(summary: Dict[str, Any]) -> List[str]:
+        """
+        :param summary: summary() 的內容
+        :return: 分片寫入的檔名，依第一次出現的順序且不重複
+        """
+        return list(dict.fromkeys(key for _, key in summary["covered"]))
+
+class ShardManifest:
+    PREFIX = "qrbatch_shard_"
+    FILENAME_PATTERN = re.compile(r"^qrbatch_shard_\d+of\d+\.json$")
+
+    def __init__(self, spec: ShardSpec, folder: str, config_key: str, archive: Optional[str] = None):
+        """
+        記錄一個分片處理的列，供 qrbatch merge 驗證所有分片剛好涵蓋每一列一次。
+        同一資料夾可放多個分片的 manifest（共用檔案系統）。
+
+        :param spec: 分片設定
+        :param folder: manifest 所在資料夾（輸出資料夾，或封存檔所在資料夾）
+        :param config_key: 產生設定的識別字串，各分片必須相同
+        :param archive: 本分片的封存檔名（選擇性）
+        """
+        self.spec = spec
+        self.path = os.path.join(folder, f"{self.PREFIX}{spec.label}.json")
+        self.config_key = config_key
+        self.archive = archive
+        self.sheets: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def partition(self, sheet_name: str) -> SheetPartition:
+        return SheetPartition(self.spec, sheet_name)
+
+    def complete_sheet(self, partition: SheetPartition) -> None:
+        """
+        加入處理完成的工作表；工作表中途失敗時不加入，合併時會回報缺少該工作表。
+
+        :param partition: 該工作表的分配結果
+        """
+        with self._lock:
+            self.sheets[partition.sheet_name] = partition.summary()
+
+    def save(self, version: str) -> None:
+        """
+        以原子方式寫入 manifest。
+
+        :param version: 程式版本
+        """
+        content = {
+            "version": version,
+            "shard": self.spec.index,
+            "shards": self.spec.count,
+            "config_key": self.config_key,
+            "archive": os.path.basename(self.archive) if self.archive else None,
+            "sheets": self.sheets
+        }
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(content, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.path)
+
+    @classmethod
+    def find(cls, path: str) -> List[str]:
+        """
+        :param path: manifest 檔案，或包含 manifest 的資料夾
+        :return: manifest 檔案路徑清單
+        """
+        if not os.path.isdir(path):
+            return [path]
+        return sorted(os.path.join(path, name) for name in os.listdir(path) if cls.FILENAME_PATTERN.match(name))
+
+    @staticmethod
+    def load(path: str) -> Dict[str, Any]:
+        with open(path, 'r', encoding='utf-8') as f:
+            content = json.load(f)
+        content["path"] = path
+        return content
+
+    @staticmethod
+    def validate(manifests: List[Dict[str, Any]]) -> List[str]:
+        """
+        檢查所有分片是否齊全、設定一致，且合起來剛好涵蓋每個工作表的每一列一次。
+
+        :param manifests: ShardManifest.load 讀取的內容
+        :return: 問題描述清單，空白表示可以合併
+        """
+        if not manifests:
+            return ["No shard manifests found"]
+        problems = []
+        counts = {manifest["shards"] for manifest in manifests}
+        if len(counts) > 1:
+            return [f"Manifests come from runs with different shard counts: {sorted(counts)}"]
+        count = counts.pop()
+        shards: Dict[int, str] = {}
+        for manifest in manifests:
+            if manifest["shard"] in shards:
+                problems.append(f"Shard {manifest['shard']}/{count} appears twice: {shards[manifest['shard']]}, {manifest['path']}")
+            shards[manifest["shard"]] = manifest["path"]
+        missing = sorted(set(range(1, count + 1)) - shards.keys())
+        if missing:
+            problems.append(f"Missing shards: {', '.join(f'{index}/{count}' for index in missing)}")
+        if len({manifest["config_key"] for manifest in manifests}) > 1:
+            problems.append("Shards were generated with different QRCode configurations")
+
+        sheet_names = set().union(*(manifest["sheets"] for manifest in manifests))
+        for sheet_name in sorted(sheet_names):
+            summaries = [(manifest, manifest["sheets"].get(sheet_name)) for manifest in manifests]
+            incomplete = [manifest["path"] for manifest, summary in summaries if summary is None]
+            if incomplete:
+                problems.append(f"Sheet '{sheet_name}' was not completed by {', '.join(incomplete)}")
+                continue
+            if len({(summary["rows"], summary["keys"]) for _, summary in summaries}) > 1:
+                problems.append(f"Shards read different rows for sheet '{sheet_name}'; every shard must use the same input")
+                continue
+            problems.extend(ShardManifest._check_coverage(sheet_name, summaries))
+        return problems
+
+    @staticmethod
+    def _check_coverage(sheet_name: str, summaries: List[Tuple[Dict[str, Any], Dict[str, Any]]]) -> List[str]:
+        problems = []
+        owners: Dict[str, str] = {}
+        file_owners: Dict[str, str] = {}
+        covered = 0
+        key_sum = 0
+        for manifest, summary in summaries:
+            for index, key in summary["covered"]:
+                if index in owners:
+                    problems.append(f"Row {index} ('{key}') in sheet '{sheet_name}' is covered more than once "
+                                    f"({owners[index]}, {manifest['path']})")
+                owners[index] = manifest["path"]
+                covered += 1
+                key_sum += ShardSpec.row_hash(sheet_name, SheetPartition.row_key(index, key))
+            for key in SheetPartition.files(summary):
+                if file_owners.get(key, manifest["path"]) != manifest["path"]:
+                    # 相同檔名的列應分在同一個分片，否則無法決定保留哪一個檔案
+                    problems.append(f"File '{key}' in sheet '{sheet_name}' is written by more than one shard "
+                                    f"({file_owners[key]}, {manifest['path']})")
+                file_owners[key] = manifest["path"]
+            for index, key in summary["failed"]:
+                problems.append(f"Row {index} ('{key}') in sheet '{sheet_name}' failed in {manifest['path']}")
+
+        expected = summaries[0][1]
+        if covered != expected["rows"] or f"{key_sum % KEY_DIGEST_MODULUS:032x}" != expected["keys"]:
+            problems.append(f"Sheet '{sheet_name}': shards cover {covered} of {expected['rows']} rows")
+        return problems
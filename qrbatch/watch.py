@@ -0,0 +1,160 @@
+import os
+import sys
+import signal
+import logging
+import argparse
+import threading
+from time import monotonic, perf_counter
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from qrbatch import __version__
+from qrbatch.exceptions import ConfigurationError, QRBatchProcessingError
+from qrbatch.utils.metrics import Metrics
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+    from qrbatch.qr_batch_processor import QRCodeBatchProcessor
+
+logger = logging.getLogger(__name__)
+
+# (mtime_ns, size) of the input file, or of every file in an input folder and its subfolders; None while the input is missing.
+Signature = Optional[Tuple[Any, ...]]
+
+def parse_arguments(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="qrbatch watch",
+                                     description=f"QRBatch v{__version__} - Regenerate changed QR codes whenever the input changes")
+    parser.add_argument("-d", "--data", default="resources/data.xlsx", help="Input file or folder to watch")
+    parser.add_argument("-o", "--output", default="qr_codes", help="Output folder for QR codes")
+    parser.add_argument("-c", "--config", default=os.path.join("config", "custom_config.json"), help="Path to the configuration file")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="Worker processes kept warm between rebuilds")
+    parser.add_argument("-s", "--stream", action="store_true", help="Stream rows from the Excel file instead of loading whole sheets")
+    parser.add_argument("--cache-size", type=int, default=1024, help="Number of encoded QR codes kept in memory to reuse for identical rows (0 disables)")
+    parser.add_argument("--continue-on-error", action="store_true", help="Record failed rows in qrbatch_errors.csv instead of aborting the rebuild")
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds between checks of the input's modification time and size")
+    parser.add_argument("--debounce", type=float, default=2.0, help="Seconds the input must stay unchanged before a rebuild starts")
+    return parser.parse_args(argv)
+
+def input_signature(path: str) -> Signature:
+    """Return the modification time and size of path, or of every file under it when it is a folder."""
+    try:
+        if os.path.isdir(path):
+            # Subfolders are walked like FileInputSource does, since their files are sheets too.
+            files = []
+            for root, _, filenames in os.walk(path):
+                for filename in filenames:
+                    stat = os.stat(os.path.join(root, filename))
+                    files.append((os.path.relpath(os.path.join(root, filename), path), stat.st_mtime_ns, stat.st_size))
+            return tuple(sorted(files))
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+    except FileNotFoundError:
+        # 存檔時常先寫入暫存檔再改名，檔案可能短暫不存在
+        return None
+
+class Watcher:
+    def __init__(self, processor: "QRCodeBatchProcessor", input_path: str, output_folder: str,
+                 interval: float = 1.0, debounce: float = 2.0):
+        """Poll input_path and rerun the incremental processor once the input has settled after a change."""
+        self.processor = processor
+        self.input_path = input_path
+        self.output_folder = output_folder
+        self.interval = max(0.05, interval)
+        self.debounce = max(0.0, debounce)
+        self.rebuilds = 0
+        self.totals: Dict[str, int] = {}
+        self.stop_event = threading.Event()
+
+    def run(self) -> None:
+        observed = input_signature(self.input_path)
+        changed_at = float("-inf")
+        built: Signature = None
+        logger.info(f"Watching {self.input_path} (every {self.interval:g}s, debounce {self.debounce:g}s); press Ctrl+C to stop")
+        while not self.stop_event.is_set():
+            signature = input_signature(self.input_path)
+            if signature != observed:
+                # A burst of saves keeps pushing the rebuild back until the file stays unchanged.
+                observed, changed_at = signature, monotonic()
+            elif signature is not None and signature != built and monotonic() - changed_at >= self.debounce:
+                built = signature
+                self.rebuild()
+            self.stop_event.wait(self.interval)
+
+    def rebuild(self) -> Dict[str, Any]:
+        self.rebuilds += 1
+        self.processor.metrics = Metrics(enabled=True)
+        start = perf_counter()
+        try:
+            self.processor.process_excel(self.input_path, self.output_folder)
+            status = "done"
+        except QRBatchProcessingError as e:
+            # Keep watching; the next save retries. A failed sheet does not save its manifest, and failed rows
+            # keep their previous digest, so the next rebuild regenerates them.
+            logger.error(f"Rebuild failed: {e}")
+            status = "failed"
+
+        counters = self.processor.metrics.counters
+        summary = {
+            # rows_processed only counts rows whose file was written; failed rows are counted separately.
+            "regenerated": counters.get("rows_processed", 0),
+            "removed": counters.get("files_removed", 0),
+            "unchanged": counters.get("rows_unchanged", 0),
+            "failed": counters.get("rows_failed", 0),
+            "seconds": round(perf_counter() - start, 3)
+        }
+        for name in ("regenerated", "removed", "failed"):
+            self.totals[name] = self.totals.get(name, 0) + summary[name]
+        logger.info(f"Rebuild {self.rebuilds} {status}: {summary['regenerated'] + summary['removed']} rows changed "
+                    f"({summary['regenerated']} regenerated, {summary['removed']} removed), {summary['unchanged']} unchanged, "
+                    f"{summary['failed']} failed in {summary['seconds']:.2f}s")
+        return summary
+
+    def stop(self, *_: Any) -> None:
+        self.stop_event.set()
+
+def create_pool(processor: "QRCodeBatchProcessor", cache_size: int) -> "ProcessPoolExecutor":
+    from concurrent.futures import ProcessPoolExecutor
+    from qrbatch.utils.qr_generator import QRCodeGenerator
+    from qrbatch.worker import init_worker
+
+    qr_config = processor.config['qr_config']
+    qr_generator = QRCodeGenerator(cache_size=cache_size)
+    if qr_config.get('logo'):
+        qr_generator.logo_cache.preload(qr_config['logo'])
+    logger.info(f"Starting process pool with {processor.workers} workers")
+    return ProcessPoolExecutor(max_workers=processor.workers, initializer=init_worker,
+                               initargs=(qr_generator, qr_config, qr_generator.logo_cache, True))
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_arguments(argv)
+    try:
+        from qrbatch.main import setup_dependencies
+        from qrbatch.qr_batch_processor import QRCodeBatchProcessor
+
+        processor = QRCodeBatchProcessor(**setup_dependencies(args.config, cache_size=args.cache_size),
+                                         workers=args.workers, streaming=args.stream, incremental=True,
+                                         metrics=Metrics(enabled=True), continue_on_error=args.continue_on_error)
+    except FileNotFoundError as e:
+        logger.error(f"File not found: {e}")
+        return 1
+    except ConfigurationError as e:
+        logger.error(f"Configuration error: {e}")
+        return 1
+
+    watcher = Watcher(processor, args.data, args.output, interval=args.interval, debounce=args.debounce)
+    signal.signal(signal.SIGTERM, watcher.stop)
+    if processor.workers > 1:
+        processor.executor = create_pool(processor, args.cache_size)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if processor.executor is not None:
+            processor.executor.shutdown(cancel_futures=True)
+    logger.info(f"Stopped after {watcher.rebuilds} rebuilds: {watcher.totals.get('regenerated', 0)} regenerated, "
+                f"{watcher.totals.get('removed', 0)} removed, {watcher.totals.get('failed', 0)} failed")
+    return 0
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.exit(main())
@@ -0,0 +1,53 @@
+from typing import Any, Dict, List, Optional, Tuple
+from qrbatch.utils.logo_cache import LogoCache
+from qrbatch.utils.metrics import Metrics
+from qrbatch.utils.qr_generator import QRCodeGenerator
+
+# 行程池中執行的函式。此模組不匯入 pandas、openpyxl，以 spawn/forkserver 啟動的工作行程只需載入 QR Code 相關模組。
+
+RowTask = Tuple[str, str]
+
+_worker_qr_generator: Optional[QRCodeGenerator] = None
+_worker_qr_config: Dict[str, Any] = {}
+
+def init_worker(qr_generator: QRCodeGenerator, qr_config: Dict[str, Any], logo_cache: LogoCache,
+                metrics_enabled: bool = False) -> None:
+    global _worker_qr_generator, _worker_qr_config
+    _worker_qr_generator = qr_generator
+    _worker_qr_config = qr_config
+    QRCodeGenerator.logo_cache = logo_cache
+    # 每個工作行程有自己的統計，隨每個區塊傳回主行程合併
+    _worker_qr_generator.metrics = Metrics(enabled=metrics_enabled)
+
+def _cache_counts() -> Tuple[int, int]:
+    return _worker_qr_generator.cache_hits, _worker_qr_generator.cache_misses
+
+def generate_chunk(tasks: List[RowTask], qr_config: Optional[Dict[str, Any]] = None
+                   ) -> Tuple[List[Tuple[str, int, Optional[Exception]]], int, int, Optional[Dict[str, Any]]]:
+    # qr_config 覆寫啟動時的設定，例如整批固定的版本
+    qr_config = qr_config or _worker_qr_config
+    hits, misses = _cache_counts()
+    results = []
+    for formatted_data, qr_filename in tasks:
+        try:
+            results.append((qr_filename, _worker_qr_generator.save_cached_qr_code(formatted_data, qr_filename,
+                                                                                   config=qr_config), None))
+        except Exception as e:
+            # 失敗的列連同例外傳回主行程，由主行程決定中止或記錄，同一批的其他列照常產生
+            results.append((qr_filename, 0, e))
+    return (results, _worker_qr_generator.cache_hits - hits, _worker_qr_generator.cache_misses - misses,
+            _worker_qr_generator.metrics.drain())
+
+def encode_chunk(tasks: List[RowTask], qr_config: Optional[Dict[str, Any]] = None
+                 ) -> Tuple[List[Tuple[str, Optional[bytes], Optional[Exception]]], int, int, Optional[Dict[str, Any]]]:
+    qr_config = qr_config or _worker_qr_config
+    hits, misses = _cache_counts()
+    results = []
+    for formatted_data, qr_filename in tasks:
+        try:
+            results.append((qr_filename, _worker_qr_generator.generate_cached_bytes(formatted_data, config=qr_config),
+                            None))
+        except Exception as e:
+            results.append((qr_filename, None, e))
+    return (results, _worker_qr_generator.cache_hits - hits, _worker_qr_generator.cache_misses - misses,
+            _worker_qr_generator.metrics.drain())
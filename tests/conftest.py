@@ -0,0 +1,45 @@
+import json
+
+import openpyxl
+import pytest
+
+from qrbatch.main import setup_dependencies
+from qrbatch.qr_batch_processor import QRCodeBatchProcessor
+from qrbatch.utils.metrics import Metrics
+
+COLUMNS = ["項目編號", "購買日期", "型號", "單位", "數量", "存放位置", "財產編號", "備註"]
+
+@pytest.fixture
+def inventory_row():
+    """Build a data row; the file name is f{number:04d}_loc{number}.png."""
+    def row(number, note="x"):
+        return [number, "113/08/07", f"item {number}", "本", 1, f"loc{number}", f"B{number:05d}", note]
+    return row
+
+@pytest.fixture
+def write_workbook(tmp_path):
+    """Write an inventory workbook laid out like resources/data.xlsx (blank first row, header on row 1)."""
+    def write(rows, name="data.xlsx", sheet_name="A"):
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.title = sheet_name
+        sheet.append([None] * len(COLUMNS))
+        sheet.append(COLUMNS)
+        for row in rows:
+            sheet.append(row)
+        path = tmp_path / name
+        workbook.save(path)
+        return str(path)
+    return write
+
+@pytest.fixture
+def make_processor(tmp_path):
+    """Build a processor from a JSON config, like run.py does."""
+    def make(qr_config=None, **kwargs):
+        config = {"Header": {"row": 1}, "Sheets": {"process": []}, "Columns": {"include": [], "exclude": []},
+                  "QRCode": qr_config or {}}
+        config_path = tmp_path / "config.json"
+        config_path.write_text(json.dumps(config), encoding="utf-8")
+        kwargs.setdefault("metrics", Metrics(enabled=True))
+        return QRCodeBatchProcessor(**setup_dependencies(str(config_path)), **kwargs)
+    return make
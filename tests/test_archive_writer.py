@@ -0,0 +1,59 @@
+import os
+import tarfile
+import zipfile
+
+import openpyxl
+import pytest
+
+from qrbatch.utils.archive_writer import ArchiveWriter
+
+def read_archive(path):
+    if path.endswith(".zip"):
+        with zipfile.ZipFile(path) as zf:
+            return [info.filename for info in zf.infolist()], {name: zf.read(name) for name in zf.namelist()}
+    with tarfile.open(path) as tf:
+        members = tf.getmembers()
+        return [member.name for member in members], {member.name: tf.extractfile(member).read() for member in members}
+
+def read_folder(folder):
+    return {f"{sheet}/{name}": open(os.path.join(folder, sheet, name), "rb").read()
+            for sheet in os.listdir(folder) if os.path.isdir(os.path.join(folder, sheet))
+            for name in os.listdir(os.path.join(folder, sheet))}
+
+@pytest.mark.parametrize("name", ["codes.zip", "codes.tar", "codes.tar.gz"])
+def test_duplicate_members_keep_the_last_write(tmp_path, name):
+    path = str(tmp_path / name)
+    with ArchiveWriter(path) as archive:
+        archive.write("A/a.png", b"first")
+        archive.write("A/b.png", b"other")
+        archive.write("A/a.png", b"second")
+
+    names, members = read_archive(path)
+    assert sorted(names) == ["A/a.png", "A/b.png"]
+    assert members == {"A/a.png": b"second", "A/b.png": b"other"}
+
+@pytest.mark.parametrize("name", ["codes.zip", "codes.tar.gz"])
+@pytest.mark.parametrize("options", [{}, {"workers": 2, "sheet_workers": 2}])
+def test_archive_matches_folder_output(tmp_path, write_workbook, make_processor, inventory_row, name, options):
+    # Rows 2 and 5 both write f0002_loc2.png; a folder run keeps the later one.
+    data = write_workbook([inventory_row(number) for number in range(1, 5)] + [inventory_row(2, "later")])
+    workbook = openpyxl.load_workbook(data)
+    copy = workbook.copy_worksheet(workbook["A"])
+    copy.title = "B"
+    workbook.save(data)
+
+    make_processor(**options).process_excel(data, str(tmp_path / "folder"))
+    archive = str(tmp_path / name)
+    make_processor(archive=archive, **options).process_excel(data, str(tmp_path / "unused"))
+
+    names, members = read_archive(archive)
+    assert len(names) == len(set(names)) == 8
+    assert members == read_folder(str(tmp_path / "folder"))
+
+def test_write_error_is_raised(tmp_path):
+    archive = ArchiveWriter(str(tmp_path / "codes.zip"))
+    archive.write("A/a.png", b"png")
+    # Not bytes, so the writer thread fails to add the member.
+    archive.write("A/b.png", [0])
+    with pytest.raises(OSError, match="Failed to write archive"):
+        archive.close()
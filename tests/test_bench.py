@@ -0,0 +1,25 @@
+import os
+
+import pytest
+
+from qrbatch import bench
+
+def test_failed_end_to_end_run_is_reported(tmp_path):
+    workbook_path = str(tmp_path / "bench.xlsx")
+    bench.build_workbook(workbook_path, rows=2, columns=6, sheets=1, multiline=0)
+
+    # The run process fails on the missing config instead of leaving the benchmark waiting for a result.
+    with pytest.raises(RuntimeError, match="exited with code 1"):
+        bench.benchmark_end_to_end(workbook_path, str(tmp_path / "missing.json"), str(tmp_path / "out"),
+                                   workers=1, streaming=False, rows=2, timeout=60)
+
+def test_end_to_end_run_uses_cli_defaults(tmp_path):
+    workbook_path = str(tmp_path / "bench.xlsx")
+    config_path = str(tmp_path / "bench_config.json")
+    bench.build_workbook(workbook_path, rows=3, columns=6, sheets=1, multiline=0)
+    bench.write_config(config_path, "default")
+
+    run = bench.benchmark_end_to_end(workbook_path, config_path, str(tmp_path / "out"),
+                                     workers=1, streaming=False, rows=3, timeout=60)
+    assert run["rows_per_sec"] > 0
+    assert len(os.listdir(tmp_path / "out" / "Sheet1")) == 3
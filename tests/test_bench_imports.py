@@ -0,0 +1,48 @@
+import subprocess
+import sys
+
+import pytest
+
+import qrbatch
+from qrbatch import bench_imports
+
+HEAVY = ("pandas", "openpyxl", "PIL", "qrcode", "numpy")
+
+@pytest.mark.parametrize("module", bench_imports.TARGETS)
+def test_importing_entry_points_skips_heavy_dependencies(module):
+    summary = bench_imports.summarize_import(module, bench_imports.measure_import(module), top=5)
+    assert summary["modules_imported"] > 0
+    assert summary["forbidden_loaded"] == []
+
+def test_help_does_not_load_heavy_dependencies():
+    script = ("import runpy, sys\n"
+              "sys.argv = ['qrbatch', '--help']\n"
+              "try:\n"
+              "    runpy.run_module('qrbatch.main', run_name='__main__')\n"
+              "except SystemExit as e:\n"
+              "    assert e.code == 0, e.code\n"
+              f"print(','.join(sorted(name for name in {HEAVY!r} if name in sys.modules)))\n")
+    result = subprocess.run([sys.executable, "-c", script], cwd=bench_imports.PACKAGE_ROOT,
+                            capture_output=True, text=True, check=True)
+    lines = result.stdout.splitlines()
+    assert lines[0].startswith("usage:")
+    assert lines[-1] == ""
+
+def test_processor_is_loaded_on_first_use():
+    from qrbatch.qr_batch_processor import QRCodeBatchProcessor
+
+    assert qrbatch.QRCodeBatchProcessor is QRCodeBatchProcessor
+    with pytest.raises(AttributeError):
+        qrbatch.missing
+
+def test_report_checks_and_baseline_comparison():
+    report = {"imports": {"qrbatch.main": {"cumulative_ms": 30.0, "forbidden_loaded": ["pandas"]},
+                          "qrbatch.worker": {"cumulative_ms": 10.0, "forbidden_loaded": []}},
+              "help_seconds": 0.2}
+    assert bench_imports.check_report(report, budget_ms=20.0) == [
+        "importing qrbatch.main loads pandas", "importing qrbatch.main took 30.0ms (budget 20.0ms)"]
+
+    baseline = {"imports": {"qrbatch.main": {"cumulative_ms": 20.0}, "qrbatch.worker": {"cumulative_ms": 9.0}},
+                "help_seconds": 0.1}
+    assert bench_imports.compare_reports(report, baseline, tolerance=0.25) == [
+        "import qrbatch.main: 20.0ms -> 30.0ms", "--help: 0.100s -> 0.200s"]
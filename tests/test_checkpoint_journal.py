@@ -0,0 +1,48 @@
+import os
+
+import pytest
+
+from qrbatch.exceptions import QRBatchProcessingError
+from qrbatch.utils.checkpoint_journal import CheckpointJournal
+
+# Too long for any QR version.
+OVERFLOW_NOTE = "x" * 3000
+
+@pytest.mark.parametrize("options", [{}, {"streaming": True}])
+def test_resume_skips_completed_rows(tmp_path, write_workbook, make_processor, inventory_row, options):
+    output = str(tmp_path / "out")
+    rows = [inventory_row(number) for number in range(1, 6)]
+    with pytest.raises(QRBatchProcessingError):
+        make_processor(**options).process_excel(write_workbook(rows[:2] + [inventory_row(3, OVERFLOW_NOTE)] + rows[3:]), output)
+    journal_path = os.path.join(output, CheckpointJournal.FILENAME)
+    assert os.path.exists(journal_path)
+
+    # A completed row whose file is gone is not redone, which shows it was skipped.
+    os.remove(os.path.join(output, "A", "f0001_loc1.png"))
+    processor = make_processor(resume=True, **options)
+    processor.process_excel(write_workbook(rows), output)
+
+    assert processor.metrics.counters["rows_resumed"] == 2
+    assert processor.metrics.counters["rows_processed"] == 3
+    assert sorted(os.listdir(os.path.join(output, "A"))) == [f"f000{number}_loc{number}.png" for number in range(2, 6)]
+    assert not os.path.exists(journal_path)
+
+def test_journal_survives_a_torn_last_line(tmp_path):
+    journal = CheckpointJournal(str(tmp_path), flush_interval=2)
+    journal.record("A", 0)
+    journal.record("A", "r1")
+    journal.record("B", 5)
+    journal.close()
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('["B", 6')
+
+    resumed = CheckpointJournal(str(tmp_path), resume=True)
+    assert resumed.completed == {("A", 0), ("A", "r1"), ("B", 5)}
+    assert resumed.is_completed("A", 0) and not resumed.is_completed("B", 6)
+    resumed.close()
+
+    # Without resume the old journal is cleared.
+    CheckpointJournal(str(tmp_path)).close()
+    resumed = CheckpointJournal(str(tmp_path), resume=True)
+    assert resumed.completed == set()
+    resumed.close()
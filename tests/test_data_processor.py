@@ -0,0 +1,93 @@
+import numpy as np
+import openpyxl
+import pandas as pd
+import pytest
+
+from qrbatch.utils.data_processor import DataProcessor
+
+FRAMES = {
+    "mixed": pd.DataFrame({"項目編號": [1, 2, 3], "單價": [1.5, np.nan, 3.0], "存放位置": ["a\nb", None, "c"],
+                           "購買日期": pd.to_datetime(["2024-01-01 00:00", "2024-01-02 08:30", None])}),
+    "numeric": pd.DataFrame({"項目編號": [1, 2, 3], "單價": [1.5, np.nan, 3.0], "數量": [5, 6, 7]}),
+    "ints": pd.DataFrame({"項目編號": [1, 2, 3], "數量": np.array([5, 6, 7], dtype=np.int8)}),
+    "uint64": pd.DataFrame({"項目編號": [1, 2, 3], "序號": np.array([2 ** 64 - 1, 0, 1], dtype=np.uint64)}),
+    "bool_int": pd.DataFrame({"項目編號": [1, 2, 3], "已盤點": [True, False, True]}),
+    "float32": pd.DataFrame({"項目編號": [1, 2, 3], "重量": np.array([0.1, 2.5, np.nan], dtype=np.float32),
+                             "存放位置": ["a", "b", "c"]}),
+    "float32_numeric": pd.DataFrame({"項目編號": [1, 2, 3], "重量": np.array([0.1, 2.5, np.nan], dtype=np.float32)}),
+}
+
+@pytest.mark.parametrize("name", FRAMES)
+def test_format_frame_matches_apply(name):
+    # The processor used to format each row of df.apply(axis=1), which upcasts rows to a common dtype.
+    df = FRAMES[name]
+    expected = df.apply(DataProcessor.format_data, axis=1)
+    assert DataProcessor.format_frame(df).tolist() == expected.tolist()
+
+KEY_FRAMES = {
+    # The id is column 0 and the identifier column 5, as in resources/data.xlsx.
+    "numeric": pd.DataFrame({"項目編號": [1, 2], "數量": [5, 6], "單價": [1.5, np.nan], "單位": [1, 1],
+                             "年份": [113, 114], "存放位置": [101, 102]}),
+    "mixed": pd.DataFrame({"項目編號": [1, 2], "數量": [5, 6], "單價": [1.5, np.nan], "單位": ["本", "台"],
+                           "重量": np.array([0.1, 2.5], dtype=np.float32), "存放位置": [101, 102]}),
+}
+
+@pytest.mark.parametrize("name", KEY_FRAMES)
+def test_frame_tasks_match_rows(name, tmp_path, make_processor):
+    df = KEY_FRAMES[name]
+    processor = make_processor()
+    plan = processor._column_plan(list(df.columns), "A")
+    folder = str(tmp_path)
+
+    # df.iterrows() builds rows the same way df.apply(axis=1) did.
+    expected = [(index, processor._prepare_row(index, row.to_dict(), "A", folder, plan.require_key_columns()))
+                for index, row in df.iterrows()]
+    tasks = [(index, task) for index, task, _ in processor._iter_frame_tasks(df, plan, "A", folder)]
+    assert tasks == expected
+
+def test_format_frame_keeps_duplicate_indexes():
+    df = pd.DataFrame({"項目編號": [1, 2], "存放位置": ["a\nb", "c"]}, index=[7, 7])
+    assert DataProcessor.format_frame(df).tolist() == df.apply(DataProcessor.format_data, axis=1).tolist()
+
+def test_frame_tasks_convert_row_dtypes_once(make_processor, monkeypatch):
+    calls = []
+    to_row_dtypes = DataProcessor.to_row_dtypes
+    monkeypatch.setattr(DataProcessor, "to_row_dtypes", staticmethod(lambda df: calls.append(df) or to_row_dtypes(df)))
+    df = KEY_FRAMES["mixed"]
+    processor = make_processor()
+    list(processor._iter_frame_tasks(df, processor._column_plan(list(df.columns), "A"), "A", "out"))
+    assert len(calls) == 1
+
+def test_column_plan_matches_filter_settings():
+    columns = ["項目\n編號", "購買日期", "型號", "單位", "數量", "存放位置", "財產編號", "備註"]
+    plan = DataProcessor.compile_plan(columns, exclude_columns=["購買", "單位"], identifier_column="財產")
+    assert plan.selected == ("項目\n編號", "型號", "數量", "存放位置", "財產編號", "備註")
+    assert plan.require_key_columns() == (0, 4)
+    assert plan.select_values(list(range(8))) == (0, 2, 4, 5, 6, 7)
+
+    # Include takes precedence over exclude; names match without newlines and case.
+    plan = DataProcessor.compile_plan(columns + ["Note"], include_columns=["項目編號", "note"], exclude_columns=["項目"])
+    assert plan.selected == ("項目\n編號", "Note")
+    with pytest.raises(ValueError, match="Cannot locate"):
+        plan.require_key_columns()
+
+    df = pd.DataFrame([list(range(8))], columns=columns)
+    assert DataProcessor.filter_columns(df, exclude_columns=["備註"]).columns.tolist() == columns[:7]
+    assert DataProcessor.filter_columns(df) is df
+
+def test_column_plan_is_compiled_once_per_header(tmp_path, write_workbook, make_processor, inventory_row):
+    data = write_workbook([inventory_row(number) for number in range(1, 4)])
+    workbook = openpyxl.load_workbook(data)
+    workbook.copy_worksheet(workbook["A"]).title = "B"
+    workbook.save(data)
+    DataProcessor._compile_plan.cache_clear()
+    first = DataProcessor.compile_plan(["a", "b"], exclude_columns=["b"])
+    assert DataProcessor.compile_plan(["a", "b"], exclude_columns=["b"]) is first
+    assert DataProcessor.compile_plan(["a", "b"]) is not first
+
+    DataProcessor._compile_plan.cache_clear()
+    make_processor().process_excel(data, str(tmp_path / "out"))
+    make_processor(streaming=True).process_excel(data, str(tmp_path / "streamed"))
+    # Two sheets with the same header, read twice: compiled once.
+    assert DataProcessor._compile_plan.cache_info().misses == 1
+    assert DataProcessor._compile_plan.cache_info().hits == 3
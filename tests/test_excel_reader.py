@@ -0,0 +1,127 @@
+import datetime
+import os
+
+import openpyxl
+import pandas as pd
+import pytest
+
+from qrbatch.utils import excel_reader
+from qrbatch.utils.data_processor import DataProcessor
+from qrbatch.utils.excel_reader import StreamingExcelReader
+from qrbatch.utils.input_source import ExcelInputSource
+
+COLUMNS = ["項目編號", "數量", "單價", "代碼", "狀態", "已盤點", "購買日期", "財產編號"]
+ROWS = [
+    [1, 5, 1.5, "0123", "NA", True, datetime.datetime(2024, 1, 1), "B001"],
+    [2, None, 2, "45", "x", None, None, "B002"],
+    None,
+    [3, 7, 3, None, 12, False, datetime.datetime(2024, 1, 3, 8, 30), "B003"],
+    [4, 8, None, "7", "#N/A", True, datetime.datetime(2024, 1, 4), None],
+    [5, 9, 4.25, "abc", None, False, datetime.datetime(2024, 1, 5), "B005"],
+]
+
+@pytest.fixture
+def workbook_path(tmp_path):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "A"
+    sheet.append([None] * len(COLUMNS))
+    sheet.append(COLUMNS)
+    for row in ROWS:
+        sheet.append(row or [None] * len(COLUMNS))
+    path = tmp_path / "data.xlsx"
+    workbook.save(path)
+    return str(path)
+
+def default_payloads(path):
+    with ExcelInputSource(path) as source:
+        frames = list(source.read_frames("A", 1, DataProcessor.compile_plan))
+    return {index: payload for df in frames for index, payload in zip(df.index, DataProcessor.format_frame(df))}
+
+def streaming_payloads(path):
+    with StreamingExcelReader(path) as reader:
+        columns, rows = reader.read_sheet("A", header=1)
+        return {index: DataProcessor.format_data(dict(zip(columns, values))) for index, values in rows}
+
+@pytest.mark.parametrize("batch_rows", [1, 2, excel_reader.CONVERT_BATCH_ROWS])
+def test_streaming_matches_read_excel(workbook_path, monkeypatch, batch_rows):
+    monkeypatch.setattr(excel_reader, "CONVERT_BATCH_ROWS", batch_rows)
+    expected = default_payloads(workbook_path)
+    streamed = streaming_payloads(workbook_path)
+
+    # The blank row is only kept by pd.read_excel, as a row of NaN that the processor skips.
+    assert set(expected) - set(streamed) == {2}
+    assert {index: expected[index] for index in streamed} == streamed
+
+def test_numeric_column_with_blanks_is_float(workbook_path):
+    payload = streaming_payloads(workbook_path)[0]
+    assert "數量: 5.0" in payload
+    # A text value keeps the column as object, so the code stays as written.
+    assert "代碼: 0123" in payload
+    assert "狀態: nan" in payload
+
+def test_na_strings_match_read_excel(tmp_path):
+    # Near misses of the NA strings must stay text.
+    candidates = sorted(excel_reader.NA_STRINGS - {""}) + ["na", "NONE", "Null", "-NAN", "#n/a", "nil", "N/A "]
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(["值"])
+    for value in candidates:
+        sheet.append([value])
+    path = tmp_path / "na.xlsx"
+    workbook.save(path)
+
+    df = pd.read_excel(path)
+    assert {value for value, is_na in zip(candidates, df["值"].isna()) if is_na} == excel_reader.NA_STRINGS - {""}
+
+NUMERIC_COLUMNS = ["id", "a", "b", "c", "d", "ident"]
+
+def write_numeric_workbook(path, rows):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "A"
+    sheet.append([None] * len(NUMERIC_COLUMNS))
+    sheet.append(NUMERIC_COLUMNS)
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+    return str(path)
+
+def read_outputs(folder):
+    return {name: open(os.path.join(folder, name), "rb").read() for name in os.listdir(folder)}
+
+def test_streaming_rows_use_row_dtypes(tmp_path, make_processor):
+    # Only numeric columns, so df.apply(axis=1) turns every value of a row into a float.
+    data = write_numeric_workbook(tmp_path / "numeric.xlsx", [[number, 2, 1.5, 3, 4, 100 + number] for number in range(1, 4)])
+    outputs, payloads = {}, {}
+    for streaming in (False, True):
+        processor = make_processor(streaming=streaming)
+        processor.process_excel(data, str(tmp_path / str(streaming)))
+        outputs[streaming] = read_outputs(str(tmp_path / str(streaming) / "A"))
+        with processor._open_workbook(data) as workbook:
+            payloads[streaming] = list(processor._scan_payloads(workbook, "A", 1))
+
+    assert sorted(outputs[True]) == ["f0001_101.0.png", "f0002_102.0.png", "f0003_103.0.png"]
+    assert outputs[True] == outputs[False]
+    assert payloads[True] == payloads[False]
+    assert payloads[True][0].startswith("id: 1.0\na: 2.0\nb: 1.5")
+
+def test_column_type_widens_after_the_sample_window(tmp_path, monkeypatch):
+    monkeypatch.setattr(excel_reader, "SAMPLE_ROWS", 2)
+    monkeypatch.setattr(excel_reader, "CONVERT_BATCH_ROWS", 2)
+    # The first blank in column a comes after the sampled rows.
+    rows = [[number, number, "x", 1, 1, number] for number in range(1, 8)]
+    rows[4][1] = None
+    path = write_numeric_workbook(tmp_path / "late.xlsx", rows)
+    opened = []
+    with StreamingExcelReader(path) as reader:
+        open_rows = reader._open_rows
+        monkeypatch.setattr(reader, "_open_rows", lambda *args: opened.append(args) or open_rows(*args))
+        columns, values = reader.read_sheet("A", header=1)
+        a = [row[1] for _, row in values]
+
+    # The sheet is read once; rows before the widening batch keep the sampled int type.
+    assert len(opened) == 1
+    assert a[:4] == [1, 2, 3, 4]
+    assert a[4] != a[4] and a[5:] == [6.0, 7.0]
+    assert [type(value) for value in a[5:]] == [float, float]
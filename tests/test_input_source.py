@@ -0,0 +1,102 @@
+import os
+
+import pandas as pd
+import pytest
+
+from qrbatch.utils import input_source
+from qrbatch.utils.data_processor import DataProcessor
+from qrbatch.utils.input_source import CsvInputSource, FeatherInputSource, InputSourceFactory, ParquetInputSource
+
+# Each column changes type part way through: blanks in an int column, text after numbers, bools with blanks.
+CSV = """項目編號,數量,代碼,單價,已盤點,備註
+1,5,01,1.50,True,a
+2,6,02,2,False,b
+3,,03,2.25,,c
+4,8,abc,3,True,
+5,9,5,,False,e
+6,10,06,4,True,f
+"""
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text(CSV, encoding="utf-8")
+    return str(path)
+
+def read_payloads(path, chunk_size):
+    source = CsvInputSource(path, chunk_size=chunk_size)
+    frames = list(source.read_frames("data", 0, DataProcessor.compile_plan))
+    return [payload for df in frames for payload in DataProcessor.format_frame(df)]
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 100])
+def test_payloads_do_not_depend_on_chunk_size(csv_path, chunk_size):
+    expected = DataProcessor.format_frame(pd.read_csv(csv_path, low_memory=False)).tolist()
+    assert read_payloads(csv_path, chunk_size) == expected
+
+def test_column_types_cover_the_whole_file(csv_path):
+    payload = read_payloads(csv_path, 1)[0]
+    assert "數量: 5.0" in payload
+    assert "代碼: 01" in payload
+    assert "單價: 1.5" in payload
+
+def test_column_type_widens_after_the_sample_window(csv_path, monkeypatch):
+    monkeypatch.setattr(input_source, "SAMPLE_ROWS", 2)
+    reads = []
+    read_csv = pd.read_csv
+    monkeypatch.setattr(pd, "read_csv", lambda *args, **kwargs: reads.append(kwargs) or read_csv(*args, **kwargs))
+    payloads = read_payloads(csv_path, 2)
+
+    # Only the header and the sample rows are read ahead of the chunks.
+    assert [kwargs.get("nrows") for kwargs in reads] == [0, 2, None]
+    # 數量 has its first blank in the second chunk: later chunks are floats, the sampled rows stay ints.
+    assert ["數量: 5" in payloads[0], "數量: nan" in payloads[2], "數量: 9.0" in payloads[4]] == [True] * 3
+
+def frame_payloads(frames):
+    return {index: payload for df in frames for index, payload in zip(df.index, DataProcessor.format_frame(df))}
+
+@pytest.fixture
+def arrow_frame():
+    pytest.importorskip("pyarrow")
+    return pd.DataFrame({"項目編號": range(1, 8), "單價": [1.5, None, 3.0, 4.0, 5.5, 6.0, 7.0],
+                         "存放位置": list("abcdefg"), "備註": ["x\ny"] * 7})
+
+def select_without_notes(columns):
+    return DataProcessor.compile_plan(columns, exclude_columns=["備註"])
+
+def read_source(source_class, path, sheet_name, chunk_size=3):
+    with source_class(path, chunk_size=chunk_size) as source:
+        frames = list(source.read_frames(sheet_name, None, select_without_notes))
+    assert all(list(df.columns) == ["項目編號", "單價", "存放位置"] for df in frames)
+    return frames
+
+def test_parquet_batches_are_projected_and_reindexed(tmp_path, arrow_frame):
+    path = str(tmp_path / "data.parquet")
+    arrow_frame.to_parquet(path, row_group_size=4)
+    frames = read_source(ParquetInputSource, path, "data")
+
+    assert [len(df) for df in frames] == [3, 3, 1]
+    assert [index for df in frames for index in df.index] == list(range(7))
+    assert frame_payloads(frames) == frame_payloads([arrow_frame.drop(columns="備註")])
+
+@pytest.mark.filterwarnings("ignore:Feather V1:DeprecationWarning")
+@pytest.mark.parametrize("version", [1, 2])
+def test_feather_versions_are_read(tmp_path, arrow_frame, version):
+    from pyarrow import feather
+
+    path = str(tmp_path / "data.feather")
+    feather.write_feather(arrow_frame, path, version=version)
+    frames = read_source(FeatherInputSource, path, "data")
+
+    assert [index for df in frames for index in df.index] == list(range(7))
+    assert frame_payloads(frames) == frame_payloads([arrow_frame.drop(columns="備註")])
+
+def test_folder_of_parquet_files_is_one_sheet_per_file(tmp_path, arrow_frame):
+    os.makedirs(tmp_path / "data" / "2024")
+    arrow_frame.iloc[:3].to_parquet(tmp_path / "data" / "a.parquet")
+    arrow_frame.iloc[3:].to_parquet(tmp_path / "data" / "2024" / "b.parquet")
+    source = InputSourceFactory.create_source(str(tmp_path / "data"), chunk_size=2)
+
+    assert isinstance(source, ParquetInputSource)
+    assert source.sheet_names == ["a", "2024/b"]
+    frames = list(source.read_frames("2024/b", None, select_without_notes))
+    assert [index for df in frames for index in df.index] == [0, 1, 2, 3]
@@ -0,0 +1,83 @@
+import re
+
+import pytest
+from PIL import Image, ImageDraw
+
+from qrbatch.utils.label_sheet import LabelLayout, LabelSheetWriter
+
+# 254 dpi is 10 pixels per millimetre.
+LAYOUT = {"page_size": [100, 150], "columns": 2, "rows": 2, "label_width_mm": 30, "label_height_mm": 40,
+          "margin_mm": 10, "gap_mm": 2, "padding_mm": 1, "dpi": 254, "caption": False}
+
+def black_square():
+    return Image.new("L", (21, 21), 0)
+
+def is_filled(page, layout, position):
+    x, y = layout.cell_origin(position)
+    return page.getpixel((x + layout.label_size[0] // 2, y + layout.label_size[1] // 3)) == 0
+
+def test_cell_origin():
+    layout = LabelLayout(LAYOUT)
+    assert layout.page_size == (1000, 1500)
+    assert layout.label_size == (300, 400)
+    assert layout.labels_per_page == 4
+    assert [layout.cell_origin(position) for position in range(4)] == [(100, 100), (420, 100), (100, 520), (420, 520)]
+
+def test_pages_fill_in_order_and_the_last_is_partial(tmp_path):
+    layout = LabelLayout(LAYOUT)
+    path = str(tmp_path / "A")
+    with LabelSheetWriter(path, "png", layout) as writer:
+        for _ in range(5):
+            writer.add(black_square())
+        # A new page starts only once labels_per_page labels are placed.
+        assert writer.pages == 1
+
+    assert (writer.pages, writer.labels) == (2, 5)
+    with Image.open(f"{path}_p0001.png") as first, Image.open(f"{path}_p0002.png") as last:
+        assert first.size == last.size == layout.page_size
+        assert [is_filled(first, layout, position) for position in range(4)] == [True] * 4
+        assert [is_filled(last, layout, position) for position in range(4)] == [True, False, False, False]
+    assert not (tmp_path / "A_p0003.png").exists()
+
+def test_long_captions_are_truncated():
+    layout = LabelLayout({**LAYOUT, "caption": True})
+    writer = LabelSheetWriter("unused", "png", layout)
+    draw = ImageDraw.Draw(Image.new("L", (1, 1)))
+    width = layout.label_size[0] - 2 * layout.padding
+
+    assert writer._fit_text(draw, "B001", width) == "B001"
+    caption = "財產編號 B1121205-0000424 " * 10
+    text = writer._fit_text(draw, caption, width)
+    assert text.endswith("...") and caption.startswith(text[:-3])
+    assert draw.textlength(text, font=layout.font) <= width < draw.textlength(caption, font=layout.font)
+
+@pytest.mark.parametrize("page_size", ["A4", [100, 150]])
+def test_pdf_structure(tmp_path, page_size):
+    layout = LabelLayout({**LAYOUT, "page_size": page_size, "dpi": 72})
+    path = str(tmp_path / "A")
+    with LabelSheetWriter(path, "pdf", layout) as writer:
+        for number in range(9):
+            writer.add(black_square(), caption=f"B{number:03d}")
+
+    data = open(f"{path}.pdf", "rb").read()
+    assert data.startswith(b"%PDF-1.4") and data.endswith(b"%%EOF\n")
+    assert not (tmp_path / "A.pdf.tmp").exists()
+
+    xref_offset = int(re.search(rb"startxref\n(\d+)\n%%EOF", data).group(1))
+    assert data[xref_offset:].startswith(b"xref\n")
+    lines = data[xref_offset:].split(b"\n")
+    count = int(lines[1].split()[1])
+    offsets = [int(line.split()[0]) for line in lines[3:2 + count]]
+    for object_id, offset in enumerate(offsets, 1):
+        assert data[offset:].startswith(b"%d 0 obj\n" % object_id)
+    assert re.search(rb"/Size (\d+)", data).group(1) == str(count).encode()
+
+    assert writer.pages == 3
+    assert re.search(rb"/Type /Pages /Kids \[[^\]]*\] /Count (\d+)", data).group(1) == b"3"
+    width_mm, height_mm = LabelLayout._page_size(page_size)
+    media_boxes = re.findall(rb"/MediaBox \[0 0 ([\d.]+) ([\d.]+)\]", data)
+    assert len(media_boxes) == 3
+    # Pages are rendered at whole pixels, so the size can be off by up to half a pixel (1pt at 72 dpi).
+    for width_pt, height_pt in media_boxes:
+        assert float(width_pt) == pytest.approx(width_mm / 25.4 * 72, abs=0.75)
+        assert float(height_pt) == pytest.approx(height_mm / 25.4 * 72, abs=0.75)
@@ -0,0 +1,46 @@
+import os
+
+from PIL import Image
+
+from qrbatch.utils.logo_cache import LogoCache
+from qrbatch.utils.qr_generator import QRCodeGenerator
+
+def save_logo(path, color, mtime):
+    Image.new("RGBA", (40, 40), color).save(path)
+    os.utime(path, (mtime, mtime))
+
+def test_logo_is_loaded_once_per_size(tmp_path):
+    path = str(tmp_path / "logo.png")
+    save_logo(path, (255, 0, 0, 255), 1_000_000)
+    cache = LogoCache()
+
+    logo, mask = cache.get(path, 20)
+    assert cache.get(path, 20) == (logo, mask)
+    assert logo.size == (20, 20) and mask.mode == "L"
+    assert cache.get(path, 30)[0].size == (30, 30)
+    assert cache.get_png(path, 20) is cache.get_png(path, 20)
+
+def test_changed_logo_is_reloaded(tmp_path):
+    path = str(tmp_path / "logo.png")
+    save_logo(path, (255, 0, 0, 255), 1_000_000)
+    cache = LogoCache()
+    old_png = cache.get_png(path, 20)
+    assert cache.get(path, 20)[0].getpixel((10, 10)) == (255, 0, 0, 255)
+
+    save_logo(path, (0, 0, 255, 255), 1_000_010)
+    assert cache.get(path, 20)[0].getpixel((10, 10)) == (0, 0, 255, 255)
+    assert cache.get_png(path, 20) != old_png
+    # Entries for the old file are dropped rather than kept next to the new ones.
+    assert len(cache._sources) == 1 and len(cache._resized) == 1 and len(cache._encoded) == 1
+
+def test_generated_codes_follow_the_logo_file(tmp_path, monkeypatch):
+    path = str(tmp_path / "logo.png")
+    monkeypatch.setattr(QRCodeGenerator, "logo_cache", LogoCache())
+    save_logo(path, (255, 0, 0, 255), 1_000_000)
+    red = QRCodeGenerator.generate_qr_code_bytes("https://example.com", logo=path)
+
+    save_logo(path, (0, 0, 255, 255), 1_000_010)
+    blue = QRCodeGenerator.generate_qr_code_bytes("https://example.com", logo=path)
+    monkeypatch.setattr(QRCodeGenerator, "logo_cache", LogoCache())
+    assert blue != red
+    assert blue == QRCodeGenerator.generate_qr_code_bytes("https://example.com", logo=path)
@@ -0,0 +1,43 @@
+import json
+import os
+
+from qrbatch.utils.manifest_handler import ManifestHandler
+from qrbatch.utils.metrics import Metrics
+
+def test_is_unchanged_only_compares(tmp_path):
+    (tmp_path / "a.png").write_bytes(b"png")
+    manifest = ManifestHandler(str(tmp_path), {"a.png": "old"})
+
+    assert manifest.is_unchanged("a.png", "old")
+    assert not manifest.is_unchanged("a.png", "new")
+    assert manifest.current == {}
+
+def test_failed_row_keeps_previous_digest(tmp_path):
+    manifest = ManifestHandler(str(tmp_path), {"a.png": "old"})
+    manifest.record("a.png", "new")
+    manifest.fail("a.png")
+    manifest.fail("b.png")
+
+    assert manifest.current == {"a.png": "old"}
+    assert manifest.remove_stale() == []
+
+def test_failed_row_is_regenerated_by_next_incremental_run(tmp_path, write_workbook, make_processor, inventory_row):
+    output = str(tmp_path / "out")
+    rows = [inventory_row(number) for number in range(1, 6)]
+    processor = make_processor(incremental=True, continue_on_error=True)
+    processor.process_excel(write_workbook(rows), output)
+    manifest_path = os.path.join(output, "A", ManifestHandler.FILENAME)
+    with open(manifest_path, encoding="utf-8") as f:
+        before = json.load(f)
+
+    # Too long for any QR version, so regenerating the row fails.
+    rows[2] = inventory_row(3, "x" * 3000)
+    data = write_workbook(rows)
+    for _ in range(2):
+        processor.metrics = Metrics(enabled=True)
+        processor.process_excel(data, output)
+        assert processor.metrics.counters["rows_unchanged"] == 4
+        assert processor.metrics.counters["rows_failed"] == 1
+        with open(manifest_path, encoding="utf-8") as f:
+            assert json.load(f) == before
+        assert os.path.exists(os.path.join(output, "A", "f0003_loc3.png"))
@@ -0,0 +1,100 @@
+import json
+import pstats
+
+import pytest
+
+from qrbatch.main import main
+from qrbatch.utils.qr_generator import QRCodeGenerator
+from qrbatch.utils.metrics import Metrics
+
+def test_disabled_metrics_record_nothing():
+    metrics = Metrics()
+    with metrics.timer("encode"):
+        metrics.increment("rows_processed")
+        metrics.count_label("qr_version", 3)
+    assert metrics.drain() is None
+    assert metrics.to_dict() == {"timers_seconds": {}, "counters": {}, "labels": {}, "histograms": {}}
+
+def test_histograms_are_cumulative_and_merge():
+    metrics = Metrics(enabled=True)
+    for seconds in (0.0002, 0.003, 0.003, 20.0):
+        metrics.observe("encode", seconds)
+    worker = Metrics(enabled=True)
+    worker.observe("encode", 0.003)
+    worker.increment("rows_processed", 2)
+    worker.count_label("qr_version", 10)
+    worker.count_label("qr_version", 2)
+    metrics.merge(worker.drain())
+
+    assert worker.drain() == {"timers": {}, "histograms": {}, "counters": {}, "labels": {}}
+    report = metrics.to_dict()
+    histogram = report["histograms"]["encode"]
+    assert histogram["count"] == 5 and histogram["sum"] == pytest.approx(20.0092)
+    assert (histogram["buckets"]["0.0005"], histogram["buckets"]["0.005"], histogram["buckets"]["10.0"]) == (1, 4, 4)
+    assert histogram["buckets"]["+Inf"] == 5
+    assert report["counters"] == {"rows_processed": 2}
+    # Version labels sort numerically.
+    assert list(report["labels"]["qr_version"]) == ["2", "10"]
+
+def test_prometheus_textfile():
+    metrics = Metrics(enabled=True)
+    metrics.observe("save", 0.002)
+    metrics.increment("rows_processed", 3)
+    metrics.count_label("qr_version", 4)
+    lines = metrics.to_prometheus().splitlines()
+
+    assert 'qrbatch_stage_seconds_total{stage="save"} 0.002' in lines
+    assert "# TYPE qrbatch_rows_processed_total counter" in lines
+    assert "qrbatch_rows_processed_total 3" in lines
+    assert 'qrbatch_qr_version_total{qr_version="4"} 1' in lines
+    assert "# TYPE qrbatch_stage_latency_seconds histogram" in lines
+    assert 'qrbatch_stage_latency_seconds_bucket{stage="save",le="0.001"} 0' in lines
+    assert 'qrbatch_stage_latency_seconds_bucket{stage="save",le="+Inf"} 1' in lines
+    assert 'qrbatch_stage_latency_seconds_count{stage="save"} 1' in lines
+
+@pytest.mark.parametrize("options", [{}, {"write_threads": 2}, {"workers": 2}])
+def test_processors_keep_their_own_metrics(tmp_path, write_workbook, make_processor, inventory_row, options):
+    data = write_workbook([inventory_row(number) for number in range(1, 4)])
+    first, second = make_processor(**options), make_processor(**options)
+    first.process_excel(data, str(tmp_path / "first"))
+    assert sum(first.metrics.labels["qr_version"].values()) == 3
+    assert second.metrics.labels == {} and second.metrics.timers == {}
+
+    second.process_excel(data, str(tmp_path / "second"))
+    assert sum(first.metrics.labels["qr_version"].values()) == 3
+    assert sum(second.metrics.labels["qr_version"].values()) == 3
+    assert "encode" in second.metrics.timers
+    # The class-level default used by static calls never records.
+    assert not QRCodeGenerator.metrics.enabled
+
+@pytest.fixture
+def cli_run(tmp_path, write_workbook, inventory_row):
+    """Run the command line on a three-row workbook with extra arguments."""
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps({"Header": {"row": 1}, "Sheets": {"process": []},
+                                       "Columns": {"include": [], "exclude": []}, "QRCode": {}}), encoding="utf-8")
+    data = write_workbook([inventory_row(number) for number in range(1, 4)])
+
+    def run(*argv):
+        main(["-d", data, "-o", str(tmp_path / "out"), "-c", str(config_path), *argv])
+    return run
+
+def test_cli_writes_json_report_and_profile(tmp_path, cli_run):
+    report_path, profile_path = tmp_path / "report.json", tmp_path / "run.prof"
+    cli_run("--metrics", str(report_path), "--profile", str(profile_path))
+
+    report = json.loads(report_path.read_text(encoding="utf-8"))
+    assert report["workers"] == 1 and report["streaming"] is False
+    assert report["counters"]["rows_processed"] == 3
+    assert {"read_sheet", "format_data", "encode", "save", "total"} <= set(report["timers_seconds"])
+    assert sum(report["labels"]["qr_version"].values()) == 3
+    functions = {name for _, _, name in pstats.Stats(str(profile_path)).stats}
+    assert "process_excel" in functions
+
+def test_cli_writes_prometheus_report(tmp_path, cli_run):
+    report_path = tmp_path / "qrbatch.prom"
+    cli_run("--metrics", str(report_path))
+
+    lines = report_path.read_text(encoding="utf-8").splitlines()
+    assert "qrbatch_rows_processed_total 3" in lines
+    assert not (tmp_path / "qrbatch.prom.tmp").exists()
@@ -0,0 +1,188 @@
+import csv
+import os
+import threading
+import time
+
+import openpyxl
+import pytest
+
+from qrbatch.exceptions import ConfigurationError, QRBatchProcessingError, QRGenerationError
+from qrbatch.utils.checkpoint_journal import CheckpointJournal
+from qrbatch.utils.error_log import ErrorLog
+from qrbatch.utils.qr_generator import QRCodeGenerator
+
+# Too long for any QR version.
+OVERFLOW_NOTE = "x" * 3000
+
+def read_errors(output):
+    with open(os.path.join(output, ErrorLog.FILENAME), encoding="utf-8-sig") as f:
+        return list(csv.DictReader(f))
+
+@pytest.mark.parametrize("options", [{}, {"workers": 2}, {"write_threads": 2}, {"labels": "png"}])
+def test_failed_row_stops_the_run(tmp_path, write_workbook, make_processor, inventory_row, options):
+    output = str(tmp_path / "out")
+    rows = [inventory_row(1), inventory_row(2, OVERFLOW_NOTE), inventory_row(3)]
+    processor = make_processor(**options)
+
+    with pytest.raises(QRBatchProcessingError) as excinfo:
+        processor.process_excel(write_workbook(rows), output)
+
+    sheet_error = excinfo.value.original_exception.original_exception
+    assert isinstance(sheet_error, QRGenerationError)
+    assert "Invalid version" in str(sheet_error)
+    assert not os.path.exists(os.path.join(output, "A", "f0002_loc2.png"))
+    # The journal is kept, so --resume redoes the failed row.
+    assert os.path.exists(os.path.join(output, CheckpointJournal.FILENAME))
+
+@pytest.mark.parametrize("options", [{}, {"workers": 2}, {"write_threads": 2}])
+def test_failed_row_is_logged_with_its_error(tmp_path, write_workbook, make_processor, inventory_row, options):
+    output = str(tmp_path / "out")
+    rows = [inventory_row(1), inventory_row(2, OVERFLOW_NOTE), inventory_row(3)]
+    processor = make_processor(continue_on_error=True, **options)
+    processor.process_excel(write_workbook(rows), output)
+
+    assert processor.metrics.counters["rows_processed"] == 2
+    assert processor.metrics.counters["rows_failed"] == 1
+    errors = read_errors(output)
+    assert [(error["row_index"], error["filename"]) for error in errors] == [("1", os.path.join(output, "A", "f0002_loc2.png"))]
+    assert "Invalid version" in errors[0]["error"]
+
+def test_write_error_is_reported(tmp_path, write_workbook, make_processor, inventory_row):
+    output = str(tmp_path / "out")
+    # A folder in the way of the PNG makes opening it for writing fail.
+    os.makedirs(os.path.join(output, "A", "f0002_loc2.png"))
+    processor = make_processor(continue_on_error=True, labels="png")
+    processor.process_excel(write_workbook([inventory_row(number) for number in range(1, 4)]), output)
+
+    assert processor.metrics.counters["rows_processed"] == 2
+    errors = read_errors(output)
+    assert len(errors) == 1 and "Is a directory" in errors[0]["error"]
+
+    with pytest.raises(QRBatchProcessingError):
+        make_processor(labels="png").process_excel(write_workbook([inventory_row(2)]), output)
+
+@pytest.mark.parametrize("options", [{"resume": True}, {"incremental": True}])
+def test_labels_need_every_row(make_processor, options):
+    with pytest.raises(ConfigurationError):
+        make_processor(labels="pdf", **options)
+
+def read_outputs(folder):
+    return {name: open(os.path.join(folder, name), "rb").read() for name in sorted(os.listdir(folder))}
+
+@pytest.mark.parametrize("options", [{"workers": 2, "chunk_size": 3}, {"workers": 2, "chunk_size": 3, "labels": "png"}])
+def test_worker_pool_matches_serial_output(tmp_path, write_workbook, make_processor, inventory_row, options):
+    rows = [inventory_row(number, "備註\n" * (number % 4)) for number in range(1, 20)]
+    data = write_workbook(rows)
+    make_processor().process_excel(data, str(tmp_path / "serial"))
+    processor = make_processor(**options)
+    processor.process_excel(data, str(tmp_path / "pool"))
+
+    assert processor.metrics.counters["rows_processed"] == len(rows)
+    assert read_outputs(str(tmp_path / "pool" / "A")) == read_outputs(str(tmp_path / "serial" / "A"))
+
+@pytest.mark.parametrize("qr_config", [{}, {"output_profile": "size"}, {"format": "svg"}])
+def test_write_behind_matches_inline_writes(tmp_path, write_workbook, make_processor, inventory_row, qr_config):
+    # Repeated rows exercise cache hits that bypass the render step.
+    rows = [inventory_row(number) for number in range(1, 40)] + [inventory_row(3), inventory_row(7)]
+    data = write_workbook(rows)
+    make_processor(qr_config, write_threads=0).process_excel(data, str(tmp_path / "inline"))
+    processor = make_processor(qr_config, write_threads=2, chunk_size=4)
+    processor.process_excel(data, str(tmp_path / "behind"))
+
+    assert processor.metrics.timers["write_behind"] > 0
+    assert read_outputs(str(tmp_path / "behind" / "A")) == read_outputs(str(tmp_path / "inline" / "A"))
+
+def test_write_behind_reports_write_errors(tmp_path, write_workbook, make_processor, inventory_row):
+    output = str(tmp_path / "out")
+    os.makedirs(os.path.join(output, "A", "f0002_loc2.png"))
+    data = write_workbook([inventory_row(number) for number in range(1, 4)])
+    processor = make_processor(continue_on_error=True, write_threads=2)
+    processor.process_excel(data, output)
+
+    assert processor.metrics.counters["rows_processed"] == 2
+    errors = read_errors(output)
+    assert [error["row_index"] for error in errors] == ["1"] and "Is a directory" in errors[0]["error"]
+
+    with pytest.raises(QRBatchProcessingError) as excinfo:
+        make_processor(write_threads=2).process_excel(data, output)
+    assert isinstance(excinfo.value.original_exception.original_exception.original_exception, IsADirectoryError)
+
+def test_sheet_workers_share_the_in_flight_cap(tmp_path, write_workbook, make_processor, inventory_row, monkeypatch):
+    data = write_workbook([inventory_row(number) for number in range(1, 13)])
+    workbook = openpyxl.load_workbook(data)
+    for title in ("B", "C", "D"):
+        workbook.copy_worksheet(workbook["A"]).title = title
+    workbook.save(data)
+    make_processor().process_excel(data, str(tmp_path / "serial"))
+
+    processor = make_processor(workers=2, sheet_workers=3, chunk_size=2, max_in_flight_rows=4)
+    peaks, sheet_threads = [], set()
+    release_rows = processor._release_rows
+
+    def record_release(row_count):
+        # Called once per chunk, before its rows leave the in-flight count.
+        peaks.append(processor._in_flight_rows)
+        release_rows(row_count)
+
+    monkeypatch.setattr(processor, "_release_rows", record_release)
+    submit_chunk = processor._submit_chunk
+
+    def record_submit(executor, worker, chunk):
+        sheet_threads.add(threading.current_thread().name)
+        return submit_chunk(executor, worker, chunk)
+
+    monkeypatch.setattr(processor, "_submit_chunk", record_submit)
+    processor.process_excel(data, str(tmp_path / "sheets"))
+
+    assert len(peaks) == 4 * 12 // 2
+    assert max(peaks) <= 4
+    assert processor._in_flight_rows == 0
+    assert len(sheet_threads) > 1 and all(name.startswith("qrbatch-sheet") for name in sheet_threads)
+    for sheet in ("A", "B", "C", "D"):
+        assert read_outputs(str(tmp_path / "sheets" / sheet)) == read_outputs(str(tmp_path / "serial" / sheet))
+
+PAYLOADS = ["項目編號: 1\n備註: a", "項目編號: 2\n備註: b", "項目編號: 3\n備註: c"]
+
+def test_cached_bytes_are_encoded_once():
+    generator = QRCodeGenerator(cache_size=4)
+    results = [generator.generate_cached_bytes(PAYLOADS[0]) for _ in range(3)]
+    assert results[0] == results[1] == results[2] == QRCodeGenerator.generate_qr_code_bytes(PAYLOADS[0])
+    assert (generator.cache_misses, generator.cache_hits) == (1, 2)
+
+@pytest.mark.parametrize("options", [{"write_threads": 2}, {"workers": 2}, {"workers": 2, "labels": "png"}])
+def test_repeats_of_a_pending_payload_are_encoded_once(tmp_path, make_processor, monkeypatch, options):
+    encoded = []
+    encode = QRCodeGenerator._encode
+    encode_image = QRCodeGenerator.encode_image
+
+    def slow_encode_image(img, config=None, metrics=None):
+        # Keeps the first row pending in the write-behind pool while its repeats arrive.
+        time.sleep(0.1)
+        return encode_image(img, config, metrics)
+
+    monkeypatch.setattr(QRCodeGenerator, "_encode", staticmethod(lambda data, qr_config, metrics=None: encoded.append(data) or encode(data, qr_config, metrics)))
+    monkeypatch.setattr(QRCodeGenerator, "encode_image", staticmethod(slow_encode_image))
+    # One row per chunk, so a repeat is submitted while the first row is still in a worker.
+    processor = make_processor(chunk_size=1, **options)
+    processor.qr_generator.cache_size = 16
+    order = [0, 0, 1, 0, 2, 1]
+    tasks = [(PAYLOADS[payload], str(tmp_path / f"{position}.png")) for position, payload in enumerate(order)]
+
+    with processor._create_executor() as executor, processor._create_write_pool() as writer:
+        if writer is not None:
+            rows = list(processor._generate_write_behind(writer, tasks))
+            hits, misses = processor.qr_generator.cache_hits, processor.qr_generator.cache_misses
+            encodes = len(encoded)
+        else:
+            rows = list(processor._generate_parallel(executor, tasks))
+            hits, misses = processor.cache_hits, processor.cache_misses
+            # Worker processes report their encodes through the merged qr_version counts.
+            encodes = sum(processor.metrics.labels["qr_version"].values())
+
+    assert [error for _, _, _, error in rows] == [None] * len(order)
+    assert (hits, misses, encodes) == (3, 3, 3)
+    expected = {payload: QRCodeGenerator.generate_qr_code_bytes(payload) for payload in PAYLOADS}
+    for position, payload in enumerate(order):
+        assert (tmp_path / f"{position}.png").read_bytes() == expected[PAYLOADS[payload]]
+        if options.get("labels"):
+            assert rows[position][2] == expected[PAYLOADS[payload]]
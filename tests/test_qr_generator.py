@@ -0,0 +1,176 @@
+import io
+import os
+
+import pytest
+import qrcode
+from PIL import Image
+from qrcode import util
+from qrcode.base import rs_blocks
+
+from qrbatch.exceptions import QRBatchProcessingError
+from qrbatch.qr_batch_processor import QRCodeBatchProcessor
+from qrbatch.utils.qr_generator import QRCodeGenerator
+
+ERROR_CORRECTION = qrcode.constants.ERROR_CORRECT_L
+# Byte, numeric (long digit run) and alphanumeric segments.
+PAYLOADS = [
+    "https://example.com",
+    "項目編號: 1\n財產編號: 12345678901234567890123\n型號: ABCDEFGHIJKLMNOPQRSTUVWXYZ",
+    "備註: " + "說明" * 60,
+]
+
+def function_modules(version, mask_pattern):
+    """The fixed patterns and format info qrcode draws before placing data; data modules are None."""
+    qr = qrcode.QRCode(version=version, error_correction=ERROR_CORRECTION)
+    qr.modules_count = version * 4 + 17
+    qr.modules = [[None] * qr.modules_count for _ in range(qr.modules_count)]
+    qr.setup_position_probe_pattern(0, 0)
+    qr.setup_position_probe_pattern(qr.modules_count - 7, 0)
+    qr.setup_position_probe_pattern(0, qr.modules_count - 7)
+    qr.setup_position_adjust_pattern()
+    qr.setup_timing_pattern()
+    qr.setup_type_info(False, mask_pattern)
+    if version >= 7:
+        qr.setup_type_number(False)
+    return qr.modules
+
+def read_modules(png, box_size=10, border=4):
+    img = Image.open(io.BytesIO(png)).convert("L")
+    count = img.width // box_size - 2 * border
+    offset = border * box_size + box_size // 2
+    return [[img.getpixel((offset + col * box_size, offset + row * box_size)) < 128 for col in range(count)]
+            for row in range(count)]
+
+def decode(png):
+    """Read the PNG back to (payload, version, mask pattern, modules)."""
+    modules = read_modules(png)
+    version = (len(modules) - 17) // 4
+    mask_pattern, layout = next((mask, layout) for mask in range(8) for layout in [function_modules(version, mask)]
+                                if all(fixed is None or fixed == dark
+                                       for fixed_row, row in zip(layout, modules) for fixed, dark in zip(fixed_row, row)))
+
+    # Walk the data modules in qrcode's placement order (QRCode.map_data) and undo the mask.
+    mask = util.mask_func(mask_pattern)
+    bits = []
+    row, step = len(modules) - 1, -1
+    for col in range(len(modules) - 1, 0, -2):
+        if col <= 6:
+            col -= 1
+        while 0 <= row < len(modules):
+            for c in (col, col - 1):
+                if layout[row][c] is None:
+                    bits.append(modules[row][c] != mask(row, c))
+            row += step
+        row -= step
+        step = -step
+    codewords = [int("".join("1" if bit else "0" for bit in bits[i:i + 8]), 2) for i in range(0, len(bits) - 7, 8)]
+
+    # Data codewords are interleaved across the error correction blocks.
+    blocks = rs_blocks(version, ERROR_CORRECTION)
+    data = [[] for _ in blocks]
+    position = 0
+    for i in range(max(block.data_count for block in blocks)):
+        for block, block_data in zip(blocks, data):
+            if i < block.data_count:
+                block_data.append(codewords[position])
+                position += 1
+    stream = "".join(f"{byte:08b}" for block_data in data for byte in block_data)
+
+    payload = bytearray()
+    position = 0
+
+    def take(length):
+        nonlocal position
+        position += length
+        return int(stream[position - length:position], 2)
+
+    while position + 4 <= len(stream) and (mode := take(4)):
+        count = take(util.length_in_bits(mode, version))
+        if mode == util.MODE_NUMBER:
+            for size in [3] * (count // 3) + ([count % 3] if count % 3 else []):
+                payload += str(take({3: 10, 2: 7, 1: 4}[size])).zfill(size).encode()
+        elif mode == util.MODE_ALPHA_NUM:
+            for size in [2] * (count // 2) + ([1] if count % 2 else []):
+                value = take(11 if size == 2 else 6)
+                payload += bytes(util.ALPHA_NUM[i] for i in ((value // 45, value % 45) if size == 2 else (value,)))
+        else:
+            payload += bytes(take(8) for _ in range(count))
+    return payload.decode("utf-8"), version, mask_pattern, modules
+
+def reference_modules(data, version, mask_pattern):
+    qr = qrcode.QRCode(version=version, error_correction=ERROR_CORRECTION, mask_pattern=mask_pattern)
+    qr.add_data(data)
+    qr.make(fit=False)
+    return qr.modules
+
+@pytest.mark.parametrize("data", PAYLOADS)
+@pytest.mark.parametrize("config", [{}, {"mask_pattern": 3}, {"version": 15, "pin_version": True},
+                                    {"version": 15, "pin_version": True, "mask_pattern": 6}])
+def test_fixed_version_and_mask_keep_the_payload(data, config):
+    payload, version, mask_pattern, modules = decode(QRCodeGenerator.generate_qr_code_bytes(data, config=config))
+    default_payload, default_version, _, _ = decode(QRCodeGenerator.generate_qr_code_bytes(data))
+
+    assert payload == default_payload == data
+    assert version == max(default_version, config.get("version") or 1)
+    assert mask_pattern == config.get("mask_pattern", mask_pattern)
+    # Error correction included: the same modules qrcode itself draws for this version and mask.
+    assert modules == reference_modules(data, version, mask_pattern)
+
+def test_row_too_large_for_pinned_version_fails():
+    generator = QRCodeGenerator(cache_size=8)
+    with pytest.raises(ValueError, match="pinned version 1"):
+        generator.generate_cached_bytes(PAYLOADS[1], config={"version": 1, "pin_version": True})
+    # Without pin_version the version is only a minimum.
+    assert decode(generator.generate_cached_bytes(PAYLOADS[1], config={"version": 1}))[1] > 1
+
+def decode_folder(folder):
+    return {filename: decode(open(os.path.join(folder, filename), "rb").read())[:2]
+            for filename in os.listdir(folder) if filename.endswith(".png")}
+
+def test_pinned_run_keeps_every_payload(tmp_path, write_workbook, make_processor, inventory_row):
+    rows = [inventory_row(number, "備註" * number * 10) for number in range(1, 6)]
+    data = write_workbook(rows)
+    make_processor().process_excel(data, str(tmp_path / "default"))
+    make_processor({"pin_version": True, "mask_pattern": 2}).process_excel(data, str(tmp_path / "pinned"))
+
+    default = decode_folder(str(tmp_path / "default" / "A"))
+    pinned = decode_folder(str(tmp_path / "pinned" / "A"))
+    assert len(default) == 5
+    assert {filename: payload for filename, (payload, _) in pinned.items()} == \
+           {filename: payload for filename, (payload, _) in default.items()}
+    assert {version for _, version in pinned.values()} == {max(version for _, version in default.values())}
+
+def test_pinned_run_fails_rows_that_do_not_fit(tmp_path, write_workbook, make_processor, inventory_row, monkeypatch):
+    # Simulates a row whose payload is longer than any row seen by the pre-pass.
+    monkeypatch.setattr(QRCodeGenerator, "fit_version", staticmethod(lambda payloads, config=None, metrics=None: 6))
+    rows = [inventory_row(1), inventory_row(2, "x" * 200), inventory_row(3)]
+    processor = make_processor({"pin_version": True}, continue_on_error=True)
+    processor.process_excel(write_workbook(rows), str(tmp_path / "out"))
+
+    assert processor.metrics.counters["rows_failed"] == 1
+    assert [version for _, version in decode_folder(str(tmp_path / "out" / "A")).values()] == [6, 6]
+
+def test_pinned_run_fails_only_rows_too_large_for_any_version(tmp_path, write_workbook, make_processor, inventory_row):
+    rows = [inventory_row(1, "備註" * 20), inventory_row(2, "x" * 3000), inventory_row(3)]
+    data = write_workbook(rows)
+    processor = make_processor({"pin_version": True}, continue_on_error=True)
+    processor.process_excel(data, str(tmp_path / "out"))
+
+    assert processor.metrics.counters["pin_version_overflow"] == 1
+    assert processor.metrics.counters["rows_failed"] == 1
+    versions = decode_folder(str(tmp_path / "out" / "A"))
+    assert sorted(versions) == ["f0001_loc1.png", "f0003_loc3.png"]
+    assert {version for _, version in versions.values()} == {processor.config["qr_config"]["version"]}
+
+    with pytest.raises(QRBatchProcessingError):
+        make_processor({"pin_version": True}).process_excel(data, str(tmp_path / "aborted"))
+
+def test_pin_version_read_error_is_a_processing_error(tmp_path, write_workbook, make_processor, inventory_row,
+                                                     monkeypatch):
+    def fail(*args):
+        raise ValueError("unreadable sheet")
+        yield
+
+    monkeypatch.setattr(QRCodeBatchProcessor, "_scan_payloads", fail)
+    with pytest.raises(QRBatchProcessingError):
+        make_processor({"pin_version": True}).process_excel(write_workbook([inventory_row(1)]), str(tmp_path / "out"))
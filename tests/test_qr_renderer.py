@@ -0,0 +1,95 @@
+import io
+
+import pytest
+import qrcode
+from PIL import Image
+from qrcode.image.styledpil import StyledPilImage
+from qrcode.image.styles.colormasks import SolidFillColorMask
+from qrcode.image.styles.moduledrawers import RoundedModuleDrawer
+
+from qrbatch.utils.qr_generator import QRCodeGenerator
+from qrbatch.utils.qr_renderer import QRRenderer
+
+PAYLOADS = ["https://example.com", "項目編號: 1\n財產編號: B1121205-0000424\n存放位置: 幼苗班" * 3]
+
+def encode(data, box_size, border):
+    qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_L, box_size=box_size, border=border)
+    qr.add_data(data)
+    qr.make(fit=True)
+    return qr
+
+def rgb_bytes(img):
+    return img.convert("RGB").tobytes()
+
+@pytest.mark.parametrize("data", PAYLOADS)
+@pytest.mark.parametrize("box_size, border", [(1, 0), (3, 4), (10, 4)])
+@pytest.mark.parametrize("fill_color, back_color", [("black", "white"), ("navy", (255, 255, 0))])
+def test_square_matches_qrcode_drawer(data, box_size, border, fill_color, back_color):
+    qr = encode(data, box_size, border)
+    expected = qr.make_image(fill_color=fill_color, back_color=back_color).get_image()
+    rendered = QRRenderer.render(qr, fill_color, back_color)
+
+    assert rendered.size == expected.size
+    assert rgb_bytes(rendered) == rgb_bytes(expected)
+
+@pytest.mark.parametrize("data", PAYLOADS)
+@pytest.mark.parametrize("box_size", [2, 5, 10])
+def test_rounded_matches_qrcode_drawer(data, box_size):
+    qr = encode(data, box_size, 4)
+    expected = qr.make_image(image_factory=StyledPilImage, module_drawer=RoundedModuleDrawer()).get_image()
+    rendered = QRRenderer.render(qr, style='rounded')
+
+    assert rendered.size == expected.size
+    assert rgb_bytes(rendered) == rgb_bytes(expected)
+
+@pytest.mark.parametrize("data", PAYLOADS)
+@pytest.mark.parametrize("box_size", [2, 5, 10])
+@pytest.mark.parametrize("fill_color, back_color", [("navy", (255, 255, 0)), ((200, 30, 30), "#f0f0f0"),
+                                                    ("white", (0, 0, 90))])
+def test_colored_rounded_matches_qrcode_drawer(data, box_size, fill_color, back_color):
+    qr = encode(data, box_size, 4)
+    color_mask = SolidFillColorMask(QRRenderer.opaque_rgb(back_color), QRRenderer.opaque_rgb(fill_color))
+    expected = qr.make_image(image_factory=StyledPilImage, module_drawer=RoundedModuleDrawer(),
+                             color_mask=color_mask).get_image()
+    rendered = QRRenderer.render(qr, fill_color, back_color, style='rounded')
+
+    assert rendered.mode == expected.mode == "RGB"
+    assert rendered.tobytes() == expected.tobytes()
+
+def test_colored_rounded_codes_use_the_configured_colors():
+    config = {"fill_color": "navy", "back_color": (255, 255, 0)}
+    fast = QRCodeGenerator.generate_qr_code_bytes(PAYLOADS[0], config=config, style="rounded")
+    drawn = QRCodeGenerator.generate_qr_code_bytes(PAYLOADS[0], config={**config, "renderer": "qrcode"}, style="rounded")
+    assert fast == drawn
+    with Image.open(io.BytesIO(fast)) as img:
+        assert {color for _, color in img.getcolors(1 << 16)} >= {(0, 0, 128), (255, 255, 0)}
+    # Transparent and black backgrounds are left to qrcode.
+    qr = encode(PAYLOADS[0], 10, 4)
+    assert QRRenderer.render(qr, "black", "transparent", style="rounded") is None
+    assert QRRenderer.render(qr, "white", "black", style="rounded") is None
+
+@pytest.mark.parametrize("data", PAYLOADS)
+def test_default_png_bytes_unchanged(data):
+    # The rounded style is only pixel-identical: the fast path saves it as a smaller grayscale PNG.
+    fast = QRCodeGenerator.generate_qr_code_bytes(data, config={"renderer": "fast"})
+    drawn = QRCodeGenerator.generate_qr_code_bytes(data, config={"renderer": "qrcode"})
+    assert fast == drawn
+
+def decode_png(png):
+    return Image.open(io.BytesIO(png))
+
+@pytest.mark.parametrize("data", PAYLOADS)
+@pytest.mark.parametrize("config, style, mode", [({}, None, "1"), ({"fill_color": "navy", "back_color": (255, 255, 0)}, None, "P"),
+                                                 ({}, "rounded", "L")])
+def test_png_profiles_keep_pixels(data, config, style, mode):
+    sizes = {}
+    expected = decode_png(QRCodeGenerator.generate_qr_code_bytes(data, config=config, style=style))
+    for profile in QRCodeGenerator.OUTPUT_PROFILES:
+        png = QRCodeGenerator.generate_qr_code_bytes(data, config={**config, "output_profile": profile}, style=style)
+        img = decode_png(png)
+        # Two-color images are saved at 1 bit per pixel; anti-aliased rounded modules stay grayscale.
+        assert img.mode == mode
+        assert img.size == expected.size
+        assert rgb_bytes(img) == rgb_bytes(expected)
+        sizes[profile] = len(png)
+    assert sizes["size"] <= sizes["speed"]
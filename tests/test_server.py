@@ -0,0 +1,80 @@
+import asyncio
+import io
+import json
+import os
+import zipfile
+
+import pytest
+
+from qrbatch.server import QRBatchServer
+from qrbatch.utils.qr_generator import QRCodeGenerator
+
+@pytest.fixture(scope="module")
+def server(tmp_path_factory):
+    config_path = tmp_path_factory.mktemp("server") / "config.json"
+    config_path.write_text(json.dumps({"Header": {"row": 1}, "Sheets": {"process": []},
+                                       "Columns": {"include": [], "exclude": []}, "QRCode": {}}), encoding="utf-8")
+    server = QRBatchServer(str(config_path), workers=1, cache_size=16)
+    server.start_pool()
+    yield server
+    server.close()
+
+async def _exchange(server, requests):
+    server._slots = asyncio.Semaphore(server.max_concurrency)
+    listener = await asyncio.start_server(server._handle_connection, "127.0.0.1", 0)
+    port = listener.sockets[0].getsockname()[1]
+    async with listener:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        responses = []
+        # All requests share one keep-alive connection.
+        for method, target, body in requests:
+            writer.write(f"{method} {target} HTTP/1.1\r\nHost: test\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+            await writer.drain()
+            status = int((await reader.readline()).split()[1])
+            headers = {}
+            while (line := await reader.readline()) != b"\r\n":
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            responses.append((status, headers, await reader.readexactly(int(headers["content-length"]))))
+        writer.close()
+        return responses
+
+def exchange(server, *requests):
+    """Send (method, target, body) requests and return (status, headers, body) responses."""
+    return asyncio.run(_exchange(server, requests))
+
+def test_qr_returns_the_png(server):
+    data = "項目編號: 1\n存放位置: loc1"
+    (status, headers, body), (_, _, repeat) = exchange(server, ("POST", "/qr", data.encode()), ("POST", "/qr", data.encode()))
+
+    assert status == 200 and headers["content-type"] == "image/png"
+    assert body == repeat == QRCodeGenerator.generate_qr_code_bytes(data, config=server.qr_config)
+
+def test_batch_returns_a_zip_of_the_workbook(server, tmp_path, write_workbook, make_processor, inventory_row):
+    data = write_workbook([inventory_row(number) for number in range(1, 4)])
+    make_processor().process_excel(data, str(tmp_path / "out"))
+    with open(data, "rb") as f:
+        [(status, headers, body)] = exchange(server, ("POST", "/batch?format=xlsx", f.read()))
+
+    assert status == 200 and headers["content-type"] == "application/zip"
+    assert 'filename="qr_codes.zip"' in headers["content-disposition"]
+    with zipfile.ZipFile(io.BytesIO(body)) as archive:
+        members = {name: archive.read(name) for name in archive.namelist()}
+    folder = str(tmp_path / "out" / "A")
+    assert members == {f"A/{name}": open(os.path.join(folder, name), "rb").read() for name in os.listdir(folder)}
+
+def test_bad_requests_are_rejected(server):
+    responses = exchange(server, ("POST", "/qr", b""), ("POST", "/batch?format=txt", b"x"), ("GET", "/qr", b""),
+                         ("GET", "/missing", b""), ("POST", "/batch?format=csv", "項目編號\n".encode()))
+    assert [status for status, _, _ in responses] == [400, 400, 405, 404, 422]
+    assert json.loads(responses[1][2]) == {"error": "Unsupported format 'txt', expected one of "
+                                                    "['xlsx', 'csv', 'parquet', 'feather']"}
+
+def test_health_and_metrics(server):
+    exchange(server, ("POST", "/qr", b"health"))
+    (_, _, health), (_, _, prometheus), (_, _, report) = exchange(
+        server, ("GET", "/health", b""), ("GET", "/metrics", b""), ("GET", "/metrics?format=json", b""))
+
+    assert json.loads(health)["status"] == "ok"
+    assert 'qrbatch_http_status_total{http_status="200"}' in prometheus.decode()
+    assert json.loads(report)["histograms"]["request_qr"]["count"] >= 1
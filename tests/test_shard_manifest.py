@@ -0,0 +1,91 @@
+import json
+import os
+import zipfile
+
+import pytest
+
+from qrbatch import merge
+from qrbatch.utils.shard_manifest import ShardManifest, ShardSpec, SheetPartition
+
+def split(count, rows):
+    partitions = [SheetPartition(ShardSpec(index, count), "A") for index in range(1, count + 1)]
+    owners = {}
+    for index, key, payload in rows:
+        owners[index] = [partition.assign(index, key, payload) for partition in partitions].index(True)
+    return partitions, owners
+
+def test_every_row_goes_to_one_shard_and_loads_are_balanced():
+    rows = [(index, f"f{index:04d}_B{index:05d}.png", "x" * (index % 200)) for index in range(2000)]
+    partitions, owners = split(4, rows)
+
+    assert sorted(index for partition in partitions for index, _ in partition.assigned) == \
+           sorted(str(index) for index in range(2000))
+    loads = [partition.loads[position] for position, partition in enumerate(partitions)]
+    assert max(loads) / (sum(loads) / len(loads)) < 1.05
+    # Every shard computes the same assignment without talking to the others.
+    assert split(4, rows)[1] == owners
+
+def test_rows_with_the_same_file_name_share_a_shard():
+    rows = [(index, f"f{index % 50:04d}.png", "payload") for index in range(200)]
+    _, owners = split(3, rows)
+    for index, _, _ in rows:
+        assert owners[index] == owners[index % 50]
+
+@pytest.mark.parametrize("text", ["0/2", "3/2", "2", "a/b"])
+def test_invalid_shard_is_rejected(text):
+    with pytest.raises(ValueError):
+        ShardSpec.parse(text)
+
+@pytest.fixture
+def sharded_run(tmp_path, write_workbook, make_processor, inventory_row):
+    # Rows 3 and 9 both write f0003_loc3.png; the later row wins, as in an unsharded run.
+    rows = [inventory_row(number) for number in range(1, 9)] + [inventory_row(3, "later")]
+    data = write_workbook(rows)
+    make_processor().process_excel(data, str(tmp_path / "single"))
+    shards = str(tmp_path / "shards")
+    for index in (1, 2, 3):
+        make_processor(shard=f"{index}/3").process_excel(data, shards)
+    return tmp_path, shards
+
+def read_folder(folder):
+    return {name: open(os.path.join(folder, name), "rb").read() for name in os.listdir(folder)}
+
+def test_merge_matches_an_unsharded_run(sharded_run):
+    tmp_path, shards = sharded_run
+    merged = str(tmp_path / "merged" / "nested")
+    assert merge.main([shards, "-o", merged]) == 0
+    assert read_folder(os.path.join(merged, "A")) == read_folder(str(tmp_path / "single" / "A"))
+    with open(os.path.join(merged, merge.MERGED_FILENAME), encoding="utf-8") as f:
+        assert sum(shard["rows"] for shard in json.load(f)["shards"].values()) == 9
+
+def test_merge_into_archive_in_a_new_folder(sharded_run):
+    tmp_path, shards = sharded_run
+    archive = str(tmp_path / "new" / "codes.zip")
+    assert merge.main([shards, "-a", archive]) == 0
+    with zipfile.ZipFile(archive) as zf:
+        assert {name: zf.read(name) for name in zf.namelist()} == \
+               {f"A/{name}": data for name, data in read_folder(str(tmp_path / "single" / "A")).items()}
+    assert os.path.exists(str(tmp_path / "new" / merge.MERGED_FILENAME))
+
+def test_merge_rejects_a_missing_shard(sharded_run):
+    tmp_path, shards = sharded_run
+    os.remove(os.path.join(shards, "qrbatch_shard_2of3.json"))
+    manifests = [ShardManifest.load(path) for path in ShardManifest.find(shards)]
+    assert ShardManifest.validate(manifests)[0] == "Missing shards: 2/3"
+    assert merge.main([shards, "-o", str(tmp_path / "merged")]) == 1
+    assert not os.path.exists(str(tmp_path / "merged"))
+
+def test_merge_rejects_overlapping_shards(sharded_run):
+    tmp_path, shards = sharded_run
+    first_path = os.path.join(shards, "qrbatch_shard_1of3.json")
+    second = ShardManifest.load(os.path.join(shards, "qrbatch_shard_2of3.json"))
+    first = ShardManifest.load(first_path)
+    # Shard 1 claims a row that shard 2 generated.
+    first["sheets"]["A"]["covered"].append(second["sheets"]["A"]["covered"][0])
+    del first["path"]
+    with open(first_path, "w", encoding="utf-8") as f:
+        json.dump(first, f)
+
+    problems = ShardManifest.validate([ShardManifest.load(path) for path in ShardManifest.find(shards)])
+    assert any("covered more than once" in problem for problem in problems)
+    assert merge.main([shards, "-o", str(tmp_path / "merged")]) == 1
@@ -0,0 +1,57 @@
+import re
+import zipfile
+
+import pytest
+import qrcode
+
+from qrbatch.utils.archive_writer import ArchiveWriter
+from qrbatch.utils.qr_generator import QRCodeGenerator
+
+PAYLOADS = ["https://example.com", "項目編號: 1\n財產編號: B1121205-0000424\n存放位置: 幼苗班" * 3]
+
+def read_svg(svg):
+    """Rebuild the module grid (quiet zone included) from the merged runs of the SVG path."""
+    text = svg.decode("utf-8")
+    width, height, view_box = re.search(r'<svg [^>]*width="(\d+)" height="(\d+)" viewBox="0 0 (\d+) \3"', text).groups()
+    size = int(view_box)
+    grid = [[False] * size for _ in range(size)]
+    x = y = 0
+    for command, dx, dy in re.findall(r"([Mmh])(\d+)(?: (\d+)(?:\.5)?)?", re.search(r' d="([^"]*)"', text).group(1)):
+        if command == "M":
+            x, y = int(dx), int(dy)
+        elif command == "m":
+            x += int(dx)
+        else:
+            grid[y][x:x + int(dx)] = [True] * int(dx)
+            x += int(dx)
+    return int(width), int(height), grid
+
+@pytest.mark.parametrize("data", PAYLOADS)
+@pytest.mark.parametrize("box_size, border", [(1, 0), (10, 4)])
+def test_svg_modules_match_qrcode(data, box_size, border):
+    config = {"format": "svg", "box_size": box_size, "border": border}
+    width, height, grid = read_svg(QRCodeGenerator.generate_qr_code_bytes(data, config=config))
+    qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_L, border=border)
+    qr.add_data(data)
+    qr.make(fit=True)
+
+    size = qr.modules_count + 2 * border
+    assert len(grid) == size
+    assert width == height == size * box_size
+    # Quiet zone: no module drawn in the border rows and columns.
+    assert not any(grid[row][col] for row in range(size) for col in range(size)
+                   if min(row, col) < border or max(row, col) >= size - border)
+    assert [row[border:size - border] for row in grid[border:size - border]] == qr.modules
+
+def test_svg_members_are_compressed_in_zip(tmp_path):
+    svg = QRCodeGenerator.generate_qr_code_bytes(PAYLOADS[1], config={"format": "svg"})
+    png = QRCodeGenerator.generate_qr_code_bytes(PAYLOADS[1])
+    path = str(tmp_path / "codes.zip")
+    with ArchiveWriter(path) as archive:
+        archive.write("A/code.svg", svg)
+        archive.write("A/code.png", png)
+
+    with zipfile.ZipFile(path) as zf:
+        assert zf.read("A/code.svg") == svg
+        assert zf.getinfo("A/code.svg").compress_size < zf.getinfo("A/code.png").compress_size
+        assert zf.getinfo("A/code.png").compress_type == zipfile.ZIP_STORED
@@ -0,0 +1,55 @@
+import csv
+import os
+
+from qrbatch.watch import Watcher, input_signature
+
+from conftest import COLUMNS
+
+def test_rebuild_reports_changed_rows(tmp_path, write_workbook, make_processor, inventory_row):
+    output = str(tmp_path / "out")
+    rows = [inventory_row(number) for number in range(1, 7)]
+    data = write_workbook(rows)
+    watcher = Watcher(make_processor(incremental=True, continue_on_error=True), data, output)
+    first = watcher.rebuild()
+    assert (first["regenerated"], first["unchanged"], first["failed"]) == (6, 0, 0)
+
+    # Three rows change, one of them too long for any QR version, and one row is deleted.
+    rows[0] = inventory_row(1, "changed")
+    rows[1] = inventory_row(2, "x" * 3000)
+    rows[2] = inventory_row(3, "changed")
+    del rows[5]
+    signature = input_signature(data)
+    write_workbook(rows)
+    assert input_signature(data) != signature
+
+    second = watcher.rebuild()
+    assert {name: second[name] for name in ("regenerated", "removed", "unchanged", "failed")} == \
+           {"regenerated": 2, "removed": 1, "unchanged": 2, "failed": 1}
+    assert watcher.totals == {"regenerated": 8, "removed": 1, "failed": 1}
+    assert not os.path.exists(os.path.join(output, "A", "f0006_loc6.png"))
+
+    third = watcher.rebuild()
+    # The failed row keeps its previous digest, so it is retried; every other row is unchanged.
+    assert (third["regenerated"], third["unchanged"], third["failed"]) == (0, 4, 1)
+
+def write_csv(path, rows):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow([""] * len(COLUMNS))
+        writer.writerow(COLUMNS)
+        writer.writerows(rows)
+
+def test_file_added_to_a_nested_folder_is_rebuilt(tmp_path, make_processor, inventory_row):
+    data, output = str(tmp_path / "data"), str(tmp_path / "out")
+    write_csv(os.path.join(data, "a.csv"), [inventory_row(1), inventory_row(2)])
+    watcher = Watcher(make_processor(incremental=True), data, output)
+    assert watcher.rebuild()["regenerated"] == 2
+
+    signature = input_signature(data)
+    write_csv(os.path.join(data, "2024", "b.csv"), [inventory_row(3)])
+    assert input_signature(data) != signature
+
+    second = watcher.rebuild()
+    assert (second["regenerated"], second["unchanged"]) == (1, 2)
+    assert os.path.exists(os.path.join(output, "2024", "b", "f0003_loc3.png"))